@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Time every GeorchestraLdapClient method against a seeded directory.
+
+By default the directory is an in-memory ldap3 ``MOCK_SYNC`` server seeded
+with ``--users`` users, ``--roles`` roles and ``--orgs`` orgs, so the numbers
+are offline and reproducible. ``--real-server`` uses the server configured
+by the ``LDAP_*`` environment variables instead (it must already contain
+``user<N>@example.org`` users, ``ROLE_<N>`` roles and ``ORG_<N>`` orgs;
+write benchmarks create and delete their own entries).
+
+For each method the script reports latency percentiles, LDAP operations
+(searches / writes) and request round trips per call, and the number of
+connections opened. Compare runs with ``--pool-size`` / ``--cache-size``
+to check the effect of connection reuse and caching.
+
+Usage:
+    python benchmarks/bench_client.py --users 2000 --roles 50 --orgs 20 --iterations 200
+    python benchmarks/bench_client.py --cache-size 10000 --json bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import logging
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from common import BenchDirectory, format_table, measure
+
+from georchestra_ldap import LdapSettings
+
+
+def scenarios(client, settings: LdapSettings, users: int, roles: int, orgs: int, run: str) -> list:
+    """
+    Return ``(name, func(i))`` pairs, in an order where write benchmarks
+    prepare the entries later ones consume (create -> moderate -> delete).
+    """
+
+    def email(i: int) -> str:
+        return f"user{i % users}@example.org"
+
+    def dn(i: int) -> str:
+        return f"uid=user{i % users},{settings.users_base_dn}"
+
+    def role(i: int) -> str:
+        return f"ROLE_{i % roles}" if roles else settings.default_role_cn
+
+    def org(i: int) -> str:
+        return f"ORG_{i % orgs}" if orgs else settings.default_org_cn
+
+    def new_uid(i: int) -> str:
+        return f"bench{run}_{i}"
+
+    def csv_source(i: int):
+        rows = "\n".join(
+            f"bench{run}_import{i}_{k},bench{run}_import{i}_{k}@example.org,Bench,User,secret" for k in range(10)
+        )
+        return io.StringIO("uid,email,given_name,sn,password\n" + rows + "\n")
+
+    def batch(i: int) -> list:
+        return [email(i + k) for k in range(min(users, 50))]
+
+    desired = {"roles": {role(0): batch(0)}}
+
+    return [
+        # Reads
+        ("read_user_infos", lambda i: client.read_user_infos(email(i))),
+        ("get_user_infos", lambda i: client.get_user_infos(email(i))),
+        ("get_users_infos", lambda i: client.get_users_infos(batch(i))),
+        ("read_user_roles", lambda i: client.read_user_roles(email(i))),
+        ("get_user_roles", lambda i: client.get_user_roles(email(i))),
+        ("get_user_org", lambda i: client.get_user_org(email(i))),
+        ("user_is_pending", lambda i: client.user_is_pending(email(i))),
+        ("role_exists", lambda i: client.role_exists(role(i))),
+        ("get_role_infos", lambda i: client.get_role_infos(role(i))),
+        ("get_role_users", lambda i: client.get_role_users(role(i))),
+        ("iter_role_members", lambda i: sum(1 for _ in client.iter_role_members(role(i)))),
+        ("org_exists", lambda i: client.org_exists(org(i))),
+        ("get_org_users", lambda i: client.get_org_users(org(i))),
+        ("iter_org_members", lambda i: sum(1 for _ in client.iter_org_members(org(i)))),
+        ("snapshot", lambda i: client.snapshot()),
+        ("membership_report", lambda i: client.membership_report()),
+        ("reconcile_dry_run", lambda i: client.reconcile(desired, dry_run=True)),
+        ("export", lambda i: client.export(io.StringIO())),
+        ("export_gzip", lambda i: client.export(io.BytesIO(), compress=True)),
+        # Writes on existing entries
+        ("add_user_role", lambda i: client.add_user_role(email(i), settings.default_role_cn)),
+        ("remove_user_role", lambda i: client.remove_user_role(email(i), role(i))),
+        ("add_user_role_back", lambda i: client.add_user_role(email(i), role(i))),
+        ("add_user_org", lambda i: client.add_user_org(email(i), org(i + 1))),
+        ("update_user_org", lambda i: client.update_user_org(dn(i), org(i))),
+        ("update_lastname", lambda i: client.update_lastname(dn(i), f"Renamed{i}")),
+        ("set_role_members", lambda i: client.set_role_members(role(i), [dn(i + k) for k in range(20)])),
+        # Batch membership changes: part of the users are already members.
+        ("add_users_to_role", lambda i: client.add_users_to_role(role(i), batch(i))),
+        ("remove_users_from_role", lambda i: client.remove_users_from_role(role(i), batch(i))),
+        ("add_users_to_org", lambda i: client.add_users_to_org(org(i), batch(i))),
+        ("remove_users_from_org", lambda i: client.remove_users_from_org(org(i), batch(i))),
+        ("set_org_members", lambda i: client.set_org_members(org(i), [dn(i + k) for k in range(20)])),
+        # Create / consume / delete
+        ("create_role", lambda i: client.create_role(f"BENCH{run}_{i}", "benchmark role")),
+        ("delete_role", lambda i: client.delete_role(f"BENCH{run}_{i}")),
+        ("create_org", lambda i: client.create_org(f"BENCH{run}_{i}")),
+        ("create_user", lambda i: client.create_user(new_uid(i), f"{new_uid(i)}@example.org", "Bench", "User", "secret")),
+        ("moderate_user", lambda i: client.moderate_user(f"{new_uid(i)}@example.org")),
+        ("create_user_batch", lambda i: [
+            client.create_user(f"{new_uid(i)}_b{k}", f"{new_uid(i)}_b{k}@example.org", "Bench", "User", "secret")
+            for k in range(10)
+        ]),
+        ("moderate_users", lambda i: client.moderate_users([f"{new_uid(i)}_b{k}@example.org" for k in range(10)])),
+        ("delete_user", lambda i: client.delete_user(f"{new_uid(i)}@example.org")),
+        ("import_users", lambda i: client.import_users(csv_source(i), format="csv")),
+    ]
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=1000, help="validated users to seed (default 1000)")
+    parser.add_argument("--pending", type=int, default=100, help="pending users to seed (default 100)")
+    parser.add_argument("--roles", type=int, default=20, help="roles to seed besides the default one")
+    parser.add_argument("--orgs", type=int, default=10, help="orgs to seed besides the default one")
+    parser.add_argument("--roles-per-user", type=int, default=2, help="seeded role memberships per user")
+    parser.add_argument("--iterations", type=int, default=100, help="calls per method (default 100)")
+    parser.add_argument("--pool-size", type=int, default=5, help="client connection pool size")
+    parser.add_argument("--cache-size", type=int, default=0, help="client lookup cache size (0 disables it)")
+    parser.add_argument("--only", nargs="*", help="benchmark only these methods")
+    parser.add_argument("--real-server", action="store_true", help="use the LDAP_* environment instead of the mock")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="also report the peak Python allocation per call (slows every call down)")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    parser.add_argument("--verbose", action="store_true", help="show the actions' output and logs")
+    args = parser.parse_args(argv)
+
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO)
+    else:
+        logging.disable(logging.CRITICAL)
+
+    settings = LdapSettings.from_env() if args.real_server else LdapSettings()
+    settings.pool_size = args.pool_size
+    settings.cache_size = args.cache_size
+
+    directory = BenchDirectory(settings, real_server=args.real_server)
+    if not args.real_server:
+        directory.seed(args.users, args.roles, args.orgs, args.roles_per_user, args.pending)
+
+    rows = []
+    with directory.client() as client:
+        run = str(os.getpid())
+        for name, func in scenarios(client, settings, args.users, args.roles, args.orgs, run):
+            if args.only and name not in args.only:
+                continue
+            rows.append(measure(
+                directory, name, func, args.iterations, quiet=not args.verbose, trace_memory=args.trace_memory,
+            ).summary())
+        cache_stats = client.cache_stats()
+
+    print(f"{args.users} users, {args.pending} pending, {args.roles} roles, {args.orgs} orgs, "
+          f"{args.iterations} calls per method, pool size {args.pool_size}, cache size {args.cache_size}")
+    print(format_table(rows))
+    if cache_stats is not None:
+        print(f"cache: {cache_stats}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as stream:
+            json.dump({"parameters": vars(args), "results": rows, "cache": cache_stats}, stream, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Measure password hashing throughput per scheme, inline and in process pools.
+
+For every scheme of ``georchestra_ldap.hashing.SCHEMES`` (or ``--schemes``)
+the script hashes ``--count`` passwords inline, then through
+``hash_passwords`` with a ``ProcessPoolExecutor`` of each ``--workers``
+size, and reports hashes per second and the speed-up over inline hashing.
+Use it to pick ``LDAP_PASSWORD_SCHEME`` / ``LDAP_HASH_WORKERS`` for bulk
+imports. Schemes whose optional package is missing are reported and skipped.
+
+Usage:
+    python benchmarks/bench_hashing.py
+    python benchmarks/bench_hashing.py --schemes ssha pbkdf2-sha512 --count 200 --workers 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from georchestra_ldap.errors import PasswordSchemeUnavailable
+from georchestra_ldap.hashing import SCHEMES, hash_passwords
+
+
+def throughput(hasher, passwords: list, workers: int) -> float:
+    """Return hashes per second; the pool start-up is included, as in an import."""
+    start = time.perf_counter()
+    if workers <= 1:
+        hash_passwords(passwords, hasher)
+    else:
+        with ProcessPoolExecutor(workers) as executor:
+            hash_passwords(passwords, hasher, executor)
+    return len(passwords) / (time.perf_counter() - start)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--schemes", nargs="*", default=list(SCHEMES), help="schemes to measure (default: all)")
+    parser.add_argument("--count", type=int, default=100, help="passwords hashed per measure (default 100)")
+    parser.add_argument("--workers", type=int, nargs="*", default=[2, os.cpu_count() or 1],
+                        help="process pool sizes to compare with inline hashing")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    passwords = [f"Secret-{i:06d}" for i in range(args.count)]
+    pool_sizes = sorted({w for w in args.workers if w > 1})
+    rows = []
+    print(f"{args.count} passwords per measure, {os.cpu_count()} CPU(s)")
+    print(f"{'scheme':<15}{'workers':>8}{'hash/s':>12}{'ms/hash':>10}{'speed-up':>10}")
+    for name in args.schemes:
+        hasher = SCHEMES[name]
+        try:
+            hasher("probe")
+        except PasswordSchemeUnavailable as exc:
+            print(f"{name:<15}{'skipped':>8}  {exc}")
+            continue
+        inline = throughput(hasher, passwords, 1)
+        for workers in [1] + pool_sizes:
+            rate = inline if workers == 1 else throughput(hasher, passwords, workers)
+            rows.append({"scheme": name, "workers": workers, "hashes_per_second": round(rate, 1),
+                         "speedup": round(rate / inline, 2)})
+            print(f"{name:<15}{workers:>8}{rate:>12.1f}{1000 / rate:>10.3f}{rate / inline:>10.2f}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as stream:
+            json.dump({"parameters": vars(args), "results": rows}, stream, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
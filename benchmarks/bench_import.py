@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Measure the cold-start cost of importing georchestra_ldap.
+
+Each scenario runs in a fresh interpreter (``--runs`` times, median kept)
+and reports the wall time of the import, plus whether ldap3 and the
+legacy ``ldap_actions`` modules were loaded by it. ``import georchestra_ldap``
+must stay below ``--budget-ms`` and must not load either of them; the
+script exits with status 1 when it does, so it can gate a CI job.
+
+Usage:
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --runs 20 --budget-ms 30
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "import georchestra_ldap": "import georchestra_ldap",
+    "settings": "from georchestra_ldap import LdapSettings; LdapSettings.from_env()",
+    "client": "from georchestra_ldap import GeorchestraLdapClient, LdapSettings; "
+              "GeorchestraLdapClient(LdapSettings())",
+    "first action import": "from georchestra_ldap.client import _legacy; _legacy('read_user_infos:read_user_infos')",
+}
+
+# Scenarios that must not pull ldap3 / ldap_actions in.
+LAZY = ("import georchestra_ldap", "settings", "client")
+# Scenario whose median must stay below --budget-ms.
+BUDGETED = "import georchestra_ldap"
+
+PROBE = """
+import sys, time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+loaded = {{"ldap3": "ldap3" in sys.modules,
+          "actions": sum(1 for m in sys.modules if m.startswith("ldap_actions."))}}
+import json
+print(json.dumps({{"ms": elapsed * 1000, **loaded}}))
+"""
+
+
+def run_once(code: str) -> dict:
+    # The interpreter start-up itself is excluded: only the statements are timed.
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE.format(code=code)],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters per scenario (default 10)")
+    parser.add_argument("--budget-ms", type=float, default=50.0,
+                        help="maximum median time of 'import georchestra_ldap' (default 50)")
+    parser.add_argument("--json", help="also write the results to this JSON file")
+    args = parser.parse_args(argv)
+
+    rows, failures = [], []
+    for name, code in SCENARIOS.items():
+        samples = [run_once(code) for _ in range(args.runs)]
+        row = {
+            "scenario": name,
+            "median_ms": round(statistics.median(s["ms"] for s in samples), 3),
+            "max_ms": round(max(s["ms"] for s in samples), 3),
+            # Any run loading them is a regression, not only the last one.
+            "ldap3": any(s["ldap3"] for s in samples),
+            "actions": max(s["actions"] for s in samples),
+        }
+        rows.append(row)
+        if name in LAZY and (row["ldap3"] or row["actions"]):
+            failures.append(f"{name}: loaded ldap3={row['ldap3']} ldap_actions modules={row['actions']}")
+        if name == BUDGETED and row["median_ms"] > args.budget_ms:
+            failures.append(f"{name}: {row['median_ms']:.2f} ms > budget {args.budget_ms:.2f} ms")
+
+    print(f"{'scenario':<26}{'median ms':>11}{'max ms':>10}{'ldap3':>7}{'actions':>9}")
+    for row in rows:
+        print(f"{row['scenario']:<26}{row['median_ms']:>11.2f}{row['max_ms']:>10.2f}"
+              f"{str(row['ldap3']):>7}{row['actions']:>9}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as stream:
+            json.dump({"parameters": vars(args), "results": rows, "failures": failures}, stream, indent=2)
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
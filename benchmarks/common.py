@@ -0,0 +1,252 @@
+"""
+Shared helpers for the benchmark scripts: an offline geOrchestra directory on
+ldap3's ``MOCK_SYNC`` strategy (or a real server), LDAP operation counting
+and latency statistics.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import statistics
+import sys
+import threading
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from ldap3 import MOCK_SYNC, NONE, Connection, Server
+
+from georchestra_ldap import GeorchestraLdapClient, LdapSettings
+from georchestra_ldap.connection import ConnectionPool
+from georchestra_ldap.schema_cache import get_server
+
+# Usage counters summed across every connection of a directory.
+COUNTERS = (
+    "operations",
+    "search_operations",
+    "add_operations",
+    "modify_operations",
+    "delete_operations",
+    "modify_dn_operations",
+    "bind_operations",
+    "messages_transmitted",
+)
+
+
+class BenchDirectory:
+    """
+    Directory the benchmarks talk to, with usage collection on every
+    connection it opens.
+
+    Without ``real_server`` an in-memory ``MOCK_SYNC`` DIT is used and must be
+    seeded with :meth:`seed`; otherwise connections go to the real server
+    described by ``settings``.
+    """
+
+    def __init__(self, settings: LdapSettings, real_server: bool = False):
+        self.settings = settings
+        self.real_server = real_server
+        self._server = get_server(settings) if real_server else Server("mock", get_info=NONE)
+        self._connections: list = []
+        self._lock = threading.Lock()
+
+    def open(self) -> Connection:
+        s = self.settings
+        if self.real_server:
+            conn = Connection(self._server, user=s.user_dn, password=s.password, auto_bind=True, collect_usage=True)
+        else:
+            conn = Connection(self._server, user=s.user_dn, password=s.password,
+                              client_strategy=MOCK_SYNC, collect_usage=True)
+            conn.bind()
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def pool(self) -> ConnectionPool:
+        s = self.settings
+        return ConnectionPool(self.open, size=s.pool_size, timeout=s.pool_timeout, max_idle=s.pool_max_idle)
+
+    def client(self) -> GeorchestraLdapClient:
+        return GeorchestraLdapClient(self.settings, pool=self.pool())
+
+    def counters(self) -> dict:
+        """
+        Return the usage counters summed over every connection opened so far,
+        plus the number of connections.
+        """
+        with self._lock:
+            connections = list(self._connections)
+        totals = {name: 0 for name in COUNTERS}
+        for conn in connections:
+            for name in COUNTERS:
+                totals[name] += getattr(conn.usage, name)
+        totals["connections"] = len(connections)
+        return totals
+
+    def seed(self, users: int, roles: int, orgs: int, roles_per_user: int = 2, pending: int = 0) -> None:
+        """
+        Fill the mock DIT: ``users`` validated users (``user<N>@example.org``),
+        ``pending`` pending users, ``roles`` roles plus the default role and
+        ``orgs`` orgs plus the default org. Every user gets the default role,
+        ``roles_per_user`` other roles (round robin, at most ``roles``) and one org.
+        """
+        if self.real_server:
+            raise RuntimeError("Seeding is only supported on the mock directory.")
+        s = self.settings
+        strategy = self.open().strategy
+        strategy.add_entry(s.user_dn, {"userPassword": s.password, "sn": "admin", "objectClass": ["person"]})
+        strategy.add_entry(s.search_base, {"objectClass": ["top", "domain"]})
+        for base in (s.users_base_dn, s.pending_users_base_dn, s.roles_base_dn, s.orgs_base_dn):
+            strategy.add_entry(base, {"ou": base.split(",", 1)[0].split("=", 1)[1], "objectClass": ["organizationalUnit"]})
+
+        role_names = [s.default_role_cn] + [f"ROLE_{i}" for i in range(roles)]
+        org_names = [s.default_org_cn] + [f"ORG_{i}" for i in range(orgs)]
+        role_members = {name: [] for name in role_names}
+        org_members = {name: [] for name in org_names}
+
+        for i in range(users + pending):
+            is_pending = i >= users
+            uid = f"user{i}"
+            dn = f"uid={uid},{s.pending_users_base_dn if is_pending else s.users_base_dn}"
+            strategy.add_entry(dn, {
+                "objectClass": ["top", "person", "organizationalPerson", "inetOrgPerson"],
+                "uid": uid,
+                s.mail_attribute: f"{uid}@example.org",
+                "cn": f"User {i}",
+                "sn": f"{i}",
+                "givenName": "User",
+            })
+            role_members[s.default_role_cn].append(dn)
+            for k in range(min(roles_per_user, roles)):
+                role_members[role_names[1 + (i + k) % roles]].append(dn)
+            org_members[org_names[i % len(org_names)]].append(dn)
+
+        memberships: dict[str, list] = {}
+        for name, members in role_members.items():
+            dn = f"cn={name},{s.roles_base_dn}"
+            strategy.add_entry(dn, {"objectClass": ["top", "groupOfMembers", "georchestraRole"], "cn": name,
+                                    "description": name, "member": members})
+            for member in members:
+                memberships.setdefault(member, []).append(dn)
+        for name, members in org_members.items():
+            dn = f"cn={name},{s.orgs_base_dn}"
+            strategy.add_entry(dn, {"objectClass": ["top", "groupOfMembers", "georchestraOrg"], "cn": name,
+                                    "o": name, "member": members})
+            for member in members:
+                memberships.setdefault(member, []).append(dn)
+        # The mock server has no memberOf overlay: store the back-links.
+        for member, groups in memberships.items():
+            strategy.entries[member]["memberOf"] = [group.encode() for group in groups]
+
+
+@dataclass
+class Measure:
+    """
+    Timings (seconds) and LDAP counters collected for one benchmarked call.
+    """
+
+    name: str
+    timings: list = field(default_factory=list)
+    counters: dict = field(default_factory=dict)
+    errors: int = 0
+    # Largest Python allocation peak of one call, in bytes (None when not traced).
+    peak_bytes: int | None = None
+
+    def summary(self) -> dict:
+        calls = len(self.timings) or 1
+        ordered = sorted(self.timings)
+
+        def percentile(p: float) -> float:
+            if not ordered:
+                return 0.0
+            return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+        return {
+            "name": self.name,
+            "calls": len(self.timings),
+            "errors": self.errors,
+            "mean_ms": statistics.fmean(ordered) * 1000 if ordered else 0.0,
+            "p50_ms": percentile(50) * 1000,
+            "p90_ms": percentile(90) * 1000,
+            "p99_ms": percentile(99) * 1000,
+            "max_ms": (ordered[-1] if ordered else 0.0) * 1000,
+            "ops_per_call": self.counters.get("operations", 0) / calls,
+            "searches_per_call": self.counters.get("search_operations", 0) / calls,
+            "writes_per_call": sum(
+                self.counters.get(name, 0)
+                for name in ("add_operations", "modify_operations", "delete_operations", "modify_dn_operations")
+            ) / calls,
+            "round_trips_per_call": self.counters.get("messages_transmitted", 0) / calls,
+            "binds": self.counters.get("bind_operations", 0),
+            "connections_opened": self.counters.get("connections", 0),
+            "peak_kib": self.peak_bytes / 1024 if self.peak_bytes is not None else None,
+        }
+
+
+def measure(directory: BenchDirectory, name: str, func, iterations: int, quiet: bool = True,
+            trace_memory: bool = False) -> Measure:
+    """
+    Call ``func(i)`` for ``i`` in ``range(iterations)`` and record each call's
+    latency and the LDAP operations it caused. The actions return their
+    results without printing; with ``quiet`` any other output (scripts run
+    as commands, third-party code) is discarded. With ``trace_memory`` the
+    peak Python allocation of each call is traced too (tracing slows the
+    calls down, so latencies are not comparable with untraced runs).
+    """
+    result = Measure(name)
+    before = directory.counters()
+    if trace_memory:
+        tracemalloc.start()
+        result.peak_bytes = 0
+    try:
+        with open(os.devnull, "w") as devnull, (contextlib.redirect_stdout(devnull) if quiet else contextlib.nullcontext()):
+            for i in range(iterations):
+                if trace_memory:
+                    # reset_peak is Python 3.9+; clearing the traces also resets the peak.
+                    getattr(tracemalloc, "reset_peak", tracemalloc.clear_traces)()
+                    base = tracemalloc.get_traced_memory()[0]
+                start = time.perf_counter()
+                try:
+                    func(i)
+                except Exception:
+                    result.errors += 1
+                result.timings.append(time.perf_counter() - start)
+                if trace_memory:
+                    result.peak_bytes = max(result.peak_bytes, tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+    after = directory.counters()
+    result.counters = {key: after[key] - before[key] for key in after}
+    return result
+
+
+def format_table(rows: list) -> str:
+    """
+    Render :meth:`Measure.summary` dicts as a fixed-width text table.
+    """
+    columns = [
+        ("name", "method", 22, "s"),
+        ("calls", "calls", 6, "d"),
+        ("errors", "err", 4, "d"),
+        ("p50_ms", "p50 ms", 9, ".3f"),
+        ("p90_ms", "p90 ms", 9, ".3f"),
+        ("p99_ms", "p99 ms", 9, ".3f"),
+        ("ops_per_call", "ops", 7, ".1f"),
+        ("searches_per_call", "search", 7, ".1f"),
+        ("writes_per_call", "write", 6, ".1f"),
+        ("round_trips_per_call", "rtt", 7, ".1f"),
+        ("connections_opened", "conns", 6, "d"),
+    ]
+    if any(row.get("peak_kib") is not None for row in rows):
+        columns.append(("peak_kib", "peak KiB", 10, ".1f"))
+    lines = ["".join(f"{title:>{width}}" if i else f"{title:<{width}}" for i, (_, title, width, _) in enumerate(columns))]
+    for row in rows:
+        lines.append("".join(
+            f"{row[key]:<{width}{fmt}}" if i == 0 else f"{row[key]:>{width}{fmt}}"
+            for i, (key, _, width, fmt) in enumerate(columns)
+        ))
+    return "\n".join(lines)
@@ -3,8 +3,15 @@ LDAP_PORT = 389
 LDAP_USE_SSL = False
 LDAP_USER_DN = "cn=admin,dc=georchestra,dc=org"
 LDAP_USERS_DN = "ou=users"
+LDAP_PENDING_USERS_DN = "ou=pendingusers"
 LDAP_ORG_DN = "ou=orgs"
 LDAP_PASSWORD = "secret"
 LDAP_ROLE_DN = "ou=roles"
 LDAP_SEARCH_BASE = "dc=georchestra,dc=org"
 LDAP_MAIL_ATTRIBUTE = "mail"
+LDAP_DEFAULT_ROLE_CN = "USER"
+LDAP_DEFAULT_ORG_CN = "C2C"
+LDAP_SCHEMA_CACHE = None  # optional JSON file caching server info/schema between runs
+LDAP_SCHEMA_CACHE_TTL = 3600
+LDAP_PASSWORD_SCHEME = "ssha"  # ssha, ssha256, ssha512, pbkdf2-sha256, pbkdf2-sha512, argon2
+LDAP_PASSWORD_HASHER = None  # optional callable(password) -> userPassword value, overrides the scheme
@@ -17,14 +17,14 @@ logger = logging.getLogger(__name__)
 
 def user_exists(client: GeorchestraLdapClient, email: str) -> str | None:
     """Return the DN of the user if found, else None."""
-    conn = client.get_connection()
     settings = client.settings
-    conn.search(
-        search_base=settings.search_base,
-        search_filter=f"({settings.mail_attribute}={email})",
-        attributes=["uid"],
-    )
-    return conn.entries[0].entry_dn if conn.entries else None
+    with client.connection() as conn:
+        conn.search(
+            search_base=settings.search_base,
+            search_filter=f"({settings.mail_attribute}={email})",
+            attributes=["uid"],
+        )
+        return conn.entries[0].entry_dn if conn.entries else None
 
 
 def main() -> None:
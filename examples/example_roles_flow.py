@@ -16,14 +16,14 @@ logger = logging.getLogger(__name__)
 
 def user_exists(client: GeorchestraLdapClient, email: str) -> str | None:
     """Return the DN of the user if found, else None."""
-    conn = client.get_connection()
     settings = client.settings
-    conn.search(
-        search_base=settings.search_base,
-        search_filter=f"({settings.mail_attribute}={email})",
-        attributes=["uid"],
-    )
-    return conn.entries[0].entry_dn if conn.entries else None
+    with client.connection() as conn:
+        conn.search(
+            search_base=settings.search_base,
+            search_filter=f"({settings.mail_attribute}={email})",
+            attributes=["uid"],
+        )
+        return conn.entries[0].entry_dn if conn.entries else None
 
 
 def main() -> None:
@@ -43,8 +43,7 @@ def main() -> None:
     logger.info("3) Moderate user (pending -> users if needed)")
     client.moderate_user(email)
 
-    logger.info("4) Current roles for user")
-    client.read_user_roles(email)
+    logger.info("4) Current roles for user: %s", client.read_user_roles(email).roles)
 
     logger.info("5) Ensure roles FOO and BAZ exist and assign them")
     for role in ("FOO", "BAZ"):
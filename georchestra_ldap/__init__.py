@@ -1,28 +1,68 @@
-# Ensure legacy aliases are registered before importing the client, so imports
-# like ``import ldap_connection`` inside ldap_actions work after packaging.
-from georchestra_ldap.utils import ensure_legacy_import_aliases as _ensure_aliases
-
-_ensure_aliases()
-
-from georchestra_ldap.client import GeorchestraLdapClient
-from georchestra_ldap.config import LdapSettings
-from georchestra_ldap.errors import LegacyConfigMissing, LegacyScriptsMissing
-from georchestra_ldap.utils import apply_settings_to_legacy_config
-
-__all__ = [
-    "GeorchestraLdapClient",
-    "LdapSettings",
-    "LegacyConfigMissing",
-    "LegacyScriptsMissing",
-    "apply_settings_to_legacy_config",
-    "role_exists",
-    "org_exists",
-    "get_org_users",
-    "get_user_org",
-    "get_user_infos",
-    "get_role_infos",
-    "get_user_roles",
-    "get_role_users",
-    "user_is_pending",
-    "add_user_org",
-]
+# Public names are resolved on first access (PEP 562) so that importing the
+# package stays cheap: ldap3 and the legacy ldap_actions modules are only
+# loaded when a name that needs them is used. The legacy import aliases
+# (``import ldap_connection`` inside ldap_actions) are registered by
+# ``georchestra_ldap.utils.import_legacy`` at that point.
+import importlib
+
+_EXPORTS = {
+    "ActionRecord": "georchestra_ldap.metrics",
+    "ActionResult": "ldap_actions.results",
+    "AsyncGeorchestraLdapClient": "georchestra_ldap.aio",
+    "BatchMembershipResult": "georchestra_ldap.membership",
+    "ChangeEvent": "georchestra_ldap.watch",
+    "ChangeFeedUnavailable": "georchestra_ldap.errors",
+    "DirectorySnapshot": "georchestra_ldap.snapshot",
+    "ExportReport": "georchestra_ldap.export",
+    "GeorchestraLdapClient": "georchestra_ldap.client",
+    "GroupResult": "ldap_actions.results",
+    "ImportReport": "georchestra_ldap.bulk",
+    "JobReport": "georchestra_ldap.jobs",
+    "LdapSettings": "georchestra_ldap.config",
+    "LegacyConfigMissing": "georchestra_ldap.errors",
+    "LegacyScriptsMissing": "georchestra_ldap.errors",
+    "MembershipChange": "georchestra_ldap.membership",
+    "MembershipReport": "georchestra_ldap.report",
+    "MetricsRegistry": "georchestra_ldap.metrics",
+    "ModerationReport": "georchestra_ldap.moderation",
+    "ReconcilePlan": "georchestra_ldap.reconcile",
+    "UserResult": "ldap_actions.results",
+    "apply_settings_to_legacy_config": "georchestra_ldap.utils",
+    "format_result": "ldap_actions.results",
+}
+
+# Legacy action functions re-exported as is: name -> "module:function".
+_LEGACY_EXPORTS = {
+    "role_exists": "role_exist:role_exists",
+    "org_exists": "org_exists:org_exists",
+    "get_org_users": "get_org_users:get_org_users",
+    "get_user_org": "get_user_org:get_user_org",
+    "get_user_infos": "get_user_infos:get_user_infos",
+    "get_role_infos": "get_role_infos:get_role_infos",
+    "get_user_roles": "get_user_roles:get_user_roles",
+    "get_role_users": "get_role_users:get_role_users",
+    "user_is_pending": "user_is_pending:user_is_pending",
+    "user_pending_status": "user_is_pending:user_pending_status",
+    "add_user_org": "add_user_org:add_user_to_org",
+}
+
+__all__ = [*_EXPORTS, *_LEGACY_EXPORTS]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        value = getattr(importlib.import_module(_EXPORTS[name]), name)
+    elif name in _LEGACY_EXPORTS:
+        from georchestra_ldap.utils import import_legacy
+
+        module_name, func_name = _LEGACY_EXPORTS[name].split(":")
+        value = getattr(import_legacy(module_name), func_name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    # Cache it: later lookups no longer go through __getattr__.
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -0,0 +1,5 @@
+import sys
+
+from georchestra_ldap.cli import main
+
+sys.exit(main())
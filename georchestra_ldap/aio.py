@@ -0,0 +1,381 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable
+
+from ldap3 import ASYNC, BASE, MODIFY_ADD, MODIFY_DELETE, MODIFY_REPLACE, SUBTREE, Connection
+from ldap3.utils.conv import escape_filter_chars
+
+from georchestra_ldap.config import LdapSettings
+from georchestra_ldap.hashing import get_hasher
+from georchestra_ldap.schema_cache import get_server
+from ldap_actions.create_user import build_user_attributes
+
+logger = logging.getLogger(__name__)
+
+
+def _rdn_value(dn: str) -> str:
+    return dn.split(",", 1)[0].split("=", 1)[1]
+
+
+class AsyncGeorchestraLdapClient:
+    """
+    asyncio counterpart of :class:`GeorchestraLdapClient`.
+
+    All operations share a single connection using ldap3's ``ASYNC``
+    strategy: requests are written to the socket immediately and only the
+    wait for each response is awaited, so many lookups run at the same time
+    over one bind. ``max_concurrency`` bounds the number of requests in flight.
+
+    Methods keep the names and arguments of the synchronous client but do not
+    print anything; entries are returned as ldap3 response dicts (``dn`` and
+    ``attributes`` keys).
+
+    Common usage example :
+    ----------------------
+    >>> async with AsyncGeorchestraLdapClient(LdapSettings.from_env()) as client:
+    ...     roles = await asyncio.gather(*(client.get_user_roles(e) for e in emails))
+    """
+
+    def __init__(self, settings: LdapSettings | None = None, max_concurrency: int = 64):
+        self.settings = settings or LdapSettings.from_env()
+        self.max_concurrency = max_concurrency
+        self._conn: Connection | None = None
+        # Created by _bind in the running loop: before Python 3.10 asyncio
+        # primitives stick to the loop current when they are built.
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._open_lock: asyncio.Lock | None = None
+        self._slots: asyncio.Semaphore | None = None
+        # Threads only wait on the events set by ldap3's receiver thread.
+        self._waiters: ThreadPoolExecutor | None = None
+
+    async def __aenter__(self) -> "AsyncGeorchestraLdapClient":
+        await self._connection()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        """
+        Unbind the shared connection and stop the waiter threads. The client
+        can be used again afterwards: it reconnects on the next operation.
+        """
+        conn, self._conn = self._conn, None
+        waiters, self._waiters = self._waiters, None
+        if conn is not None:
+            await asyncio.get_running_loop().run_in_executor(waiters, conn.unbind)
+        if waiters is not None:
+            waiters.shutdown(wait=False)
+
+    def _bind(self) -> asyncio.AbstractEventLoop:
+        """
+        Return the running loop, creating the lock, the semaphore and the
+        waiter threads on first use in it (again after :meth:`close`).
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._open_lock = asyncio.Lock()
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        if self._waiters is None:
+            self._waiters = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="ldap-async")
+        return loop
+
+    async def _connection(self) -> Connection:
+        loop = self._bind()
+        if self._conn is not None and not self._conn.closed:
+            return self._conn
+        async with self._open_lock:
+            if self._conn is None or self._conn.closed:
+                settings = self.settings
+
+                def _open() -> Connection:
+                    return Connection(
+                        get_server(settings),
+                        user=settings.user_dn,
+                        password=settings.password,
+                        client_strategy=ASYNC,
+                        auto_bind=True,
+                    )
+
+                self._conn = await loop.run_in_executor(self._waiters, _open)
+        return self._conn
+
+    async def _call(self, operation: str, *args, **kwargs) -> tuple[list, dict]:
+        conn = await self._connection()
+        async with self._slots:
+            message_id = getattr(conn, operation)(*args, **kwargs)
+            response, result = await self._loop.run_in_executor(self._waiters, conn.get_response, message_id)
+        return response or [], result
+
+    async def _search(self, base: str, search_filter: str, attributes=None, scope=SUBTREE) -> list:
+        response, _ = await self._call(
+            "search", base, search_filter, search_scope=scope, attributes=attributes or ["1.1"]
+        )
+        return [entry for entry in response if entry.get("type") == "searchResEntry"]
+
+    async def _write(self, operation: str, *args, **kwargs) -> bool:
+        _, result = await self._call(operation, *args, **kwargs)
+        if result["result"] != 0:
+            logger.warning("%s failed on %s: %s", operation, args[0] if args else "", result["description"])
+            return False
+        return True
+
+    async def _find_user(self, email: str, attributes=None) -> dict | None:
+        # Only the users and pending users branches, searched concurrently.
+        search_filter = f"({self.settings.mail_attribute}={escape_filter_chars(email)})"
+        results = await asyncio.gather(*(
+            self._search(base, search_filter, attributes)
+            for base in (self.settings.users_base_dn, self.settings.pending_users_base_dn)
+        ))
+        for entries in results:
+            if entries:
+                return entries[0]
+        return None
+
+    async def _read(self, dn: str, attributes) -> dict | None:
+        entries = await self._search(dn, "(objectClass=*)", attributes, scope=BASE)
+        return entries[0] if entries else None
+
+    def _role_dn(self, role_cn: str) -> str:
+        return f"cn={role_cn},{self.settings.roles_base_dn}"
+
+    def _org_dn(self, org_cn: str) -> str:
+        return f"cn={org_cn},{self.settings.orgs_base_dn}"
+
+    async def get_user_infos(self, email: str) -> dict | None:
+        """
+        Return the user entry (DN, uid, cn, mail, memberOf) for an email, or None.
+        """
+        return await self._find_user(email, ["cn", "uid", "mail", "memberOf"])
+
+    async def read_user_infos(self, email: str) -> dict | None:
+        """
+        Same as :meth:`get_user_infos`.
+        """
+        return await self.get_user_infos(email)
+
+    async def get_role_infos(self, role_cn: str) -> dict | None:
+        """
+        Return the role entry (DN, cn, description, members), or None.
+        """
+        return await self._read(self._role_dn(role_cn), ["cn", "description", "member"])
+
+    async def get_user_roles(self, email: str) -> list:
+        """
+        Return the list of role CNs for a given user email.
+        """
+        user = await self._find_user(email, ["memberOf"])
+        if user is None:
+            return []
+        suffix = self.settings.roles_base_dn
+        return [_rdn_value(dn) for dn in user["attributes"].get("memberOf", []) if dn.endswith(suffix)]
+
+    async def read_user_roles(self, email: str) -> list:
+        """
+        Same as :meth:`get_user_roles`.
+        """
+        return await self.get_user_roles(email)
+
+    async def get_user_org(self, email: str) -> str | None:
+        """
+        Return the organization CN for a given user email, or None.
+        """
+        user = await self._find_user(email, ["memberOf"])
+        if user is None:
+            return None
+        suffix = self.settings.orgs_base_dn
+        for dn in user["attributes"].get("memberOf", []):
+            if dn.endswith(suffix):
+                return _rdn_value(dn)
+        return None
+
+    async def role_exists(self, role_cn: str) -> bool:
+        """
+        Return True if a role exists under the configured roles DN.
+        """
+        return await self._read(self._role_dn(role_cn), ["1.1"]) is not None
+
+    async def org_exists(self, org_cn: str) -> bool:
+        """
+        Return True if an organization exists under the configured orgs DN.
+        """
+        return await self._read(self._org_dn(org_cn), ["1.1"]) is not None
+
+    async def get_role_users(self, role_cn: str) -> list:
+        """
+        Return the members (DNs) of a role.
+        """
+        role = await self._read(self._role_dn(role_cn), ["member"])
+        return list(role["attributes"].get("member", [])) if role else []
+
+    async def get_org_users(self, org_cn: str) -> list:
+        """
+        Return the members (DNs) of an organization.
+        """
+        org = await self._read(self._org_dn(org_cn), ["member"])
+        return list(org["attributes"].get("member", [])) if org else []
+
+    async def user_is_pending(self, email: str) -> bool:
+        """
+        Return True if the user (by email) is in pending users.
+        """
+        user = await self._find_user(email)
+        return user is not None and self.settings.pending_users_base_dn in user["dn"]
+
+    async def add_user_role(self, email: str, role_cn: str) -> bool:
+        """
+        Add an existing role to the user identified by email.
+        """
+        user, role = await asyncio.gather(
+            self._find_user(email), self._read(self._role_dn(role_cn), ["member"])
+        )
+        if user is None or role is None:
+            logger.info("User or role not found: %s / %s", email, role_cn)
+            return False
+        if user["dn"] in role["attributes"].get("member", []):
+            return True
+        return await self._write("modify", role["dn"], {"member": [(MODIFY_ADD, [user["dn"]])]})
+
+    async def remove_user_role(self, email: str, role_cn: str) -> bool:
+        """
+        Remove a role from the user identified by email.
+        """
+        user = await self._find_user(email)
+        if user is None:
+            logger.info("User not found: %s", email)
+            return False
+        return await self._write("modify", self._role_dn(role_cn), {"member": [(MODIFY_DELETE, [user["dn"]])]})
+
+    async def add_user_org(self, email: str, org_cn: str) -> bool:
+        """
+        Add a user (by email) to an organization, removing them from other orgs first.
+        """
+        org_dn = self._org_dn(org_cn)
+        user, org = await asyncio.gather(self._find_user(email), self._read(org_dn, ["member"]))
+        if user is None or org is None:
+            logger.info("User or organization not found: %s / %s", email, org_cn)
+            return False
+        user_dn = user["dn"]
+        if user_dn in org["attributes"].get("member", []):
+            return True
+        current = await self._search(
+            self.settings.orgs_base_dn, f"(member={escape_filter_chars(user_dn)})"
+        )
+        await asyncio.gather(*(
+            self._write("modify", entry["dn"], {"member": [(MODIFY_DELETE, [user_dn])]})
+            for entry in current if entry["dn"] != org_dn
+        ))
+        return await self._write("modify", org_dn, {"member": [(MODIFY_ADD, [user_dn])]})
+
+    async def update_user_org(self, user_dn: str, org_cn: str) -> bool:
+        """
+        Add a user DN to the given organization group.
+        """
+        return await self._write("modify", self._org_dn(org_cn), {"member": [(MODIFY_ADD, [user_dn])]})
+
+    async def update_lastname(self, user_dn: str, new_lastname: str) -> bool:
+        """
+        Replace the ``sn`` attribute of a user DN.
+        """
+        return await self._write("modify", user_dn, {"sn": [(MODIFY_REPLACE, [new_lastname])]})
+
+    async def create_role(
+        self, role_cn: str, description: str = "Role created via script", members: Iterable[str] | None = None
+    ) -> str | None:
+        """
+        Create a role if missing (idempotent); optionally seed members. Returns the role DN.
+        """
+        role_dn = self._role_dn(role_cn)
+        if await self._read(role_dn, ["1.1"]) is not None:
+            return role_dn
+        attributes = {
+            "objectClass": ["top", "groupOfMembers", "georchestraRole"],
+            "cn": role_cn,
+            "description": description,
+            "georchestraObjectIdentifier": str(uuid.uuid4()),
+        }
+        if members:
+            attributes["member"] = list(members)
+        return role_dn if await self._write("add", role_dn, attributes=attributes) else None
+
+    async def create_org(self, org_cn: str, org_name: str | None = None) -> str | None:
+        """
+        Create an organization if it does not exist. Returns the org DN.
+        """
+        org_dn = self._org_dn(org_cn)
+        if await self._read(org_dn, ["1.1"]) is not None:
+            return org_dn
+        attributes = {"cn": org_cn, "o": org_name or org_cn}
+        created = await self._write("add", org_dn, ["groupOfMembers", "top", "georchestraOrg"], attributes)
+        return org_dn if created else None
+
+    async def create_user(self, uid: str, email: str, given_name: str, sn: str, password: str) -> str | None:
+        """
+        Create a pending user with the default role and organization. Returns the user DN.
+        """
+        # uid is the RDN: two base reads instead of a search of the whole tree.
+        existing = await asyncio.gather(*(
+            self._read(f"uid={uid},{base}", ["1.1"])
+            for base in (self.settings.users_base_dn, self.settings.pending_users_base_dn)
+        ))
+        if any(entry is not None for entry in existing):
+            logger.info("User already exists: %s", uid)
+            return None
+        user_dn = f"uid={uid},{self.settings.pending_users_base_dn}"
+        hashed = await asyncio.get_running_loop().run_in_executor(None, get_hasher(self.settings), password)
+        attributes = build_user_attributes(uid, email, given_name, sn, hashed)
+        if not await self._write("add", user_dn, attributes=attributes):
+            return None
+        await asyncio.gather(
+            self._write("modify", self._role_dn(self.settings.default_role_cn), {"member": [(MODIFY_ADD, [user_dn])]}),
+            self._write("modify", self._org_dn(self.settings.default_org_cn), {"member": [(MODIFY_ADD, [user_dn])]}),
+        )
+        return user_dn
+
+    async def moderate_user(self, email: str) -> str | None:
+        """
+        Move a user from pending to users if present in pending. Returns the new DN.
+        """
+        user = await self._find_user(email)
+        if user is None or self.settings.pending_users_base_dn not in user["dn"]:
+            return None
+        rdn = user["dn"].split(",", 1)[0]
+        new_superior = self.settings.users_base_dn
+        if not await self._write("modify_dn", user["dn"], rdn, new_superior=new_superior):
+            return None
+        return f"{rdn},{new_superior}"
+
+    async def delete_user(self, email: str) -> bool | None:
+        """
+        Remove a user from all roles/orgs then delete the entry. Returns True
+        once deleted, False when a removal or the delete failed (the entry is
+        kept if it could not leave every group), None when the user is not found.
+        """
+        user = await self._find_user(email, ["memberOf"])
+        if user is None:
+            return None
+        user_dn = user["dn"]
+        removed = await asyncio.gather(*(
+            self._write("modify", group_dn, {"member": [(MODIFY_DELETE, [user_dn])]})
+            for group_dn in user["attributes"].get("memberOf", [])
+        ))
+        if not all(removed):
+            return False
+        return await self._write("delete", user_dn)
+
+    async def delete_role(self, role_cn: str) -> bool | None:
+        """
+        Delete a role after removing its members.
+        """
+        role = await self._read(self._role_dn(role_cn), ["member"])
+        if role is None:
+            return None
+        members = list(role["attributes"].get("member", []))
+        if members:
+            await self._write("modify", role["dn"], {"member": [(MODIFY_DELETE, members)]})
+        return await self._write("delete", role["dn"])
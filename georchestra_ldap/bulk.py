@@ -0,0 +1,366 @@
+from __future__ import annotations
+
+import base64
+import csv
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import IO, Iterable, Iterator
+
+from ldap3 import MODIFY_ADD, SUBTREE
+from ldap3.core.exceptions import LDAPCommunicationError, LDAPException
+from ldap3.utils.conv import escape_filter_chars
+
+from georchestra_ldap.config import LdapSettings
+from georchestra_ldap.connection import ConnectionPool
+from georchestra_ldap.hashing import get_hasher, hash_passwords
+from georchestra_ldap.metrics import bind_context
+from ldap_actions.create_user import build_user_attributes
+
+logger = logging.getLogger(__name__)
+
+# LDAP result codes handled explicitly.
+_ENTRY_ALREADY_EXISTS = 68
+_ATTRIBUTE_OR_VALUE_EXISTS = 20
+
+
+@dataclass
+class ImportReport:
+    """
+    Outcome of :func:`import_users`.
+
+    ``errors`` holds ``(uid or dn, message)`` pairs for failed entries and
+    failed membership writes.
+    """
+
+    created: int = 0
+    skipped: int = 0
+    failed: int = 0
+    memberships: int = 0
+    errors: list = field(default_factory=list)
+
+
+@dataclass
+class _UserRow:
+    dn: str
+    uid: str
+    attributes: dict
+    groups: list
+    # Plain password still to be hashed into userPassword.
+    password: str | None = None
+    # Why the row cannot be imported (counted as failed, never sent).
+    invalid: str | None = None
+
+
+def iter_ldif(stream: IO[str]) -> Iterator[tuple[str, dict]]:
+    """
+    Yield ``(dn, attributes)`` records from an LDIF stream, one at a time.
+
+    Supports comments, folded lines and base64 (``::``) values; attribute
+    values are returned as lists of str (or bytes when not valid UTF-8).
+    """
+    dn = None
+    attributes: dict = {}
+    logical = None
+
+    def _flush_line(line):
+        nonlocal dn
+        name, sep, value = line.partition(":")
+        if not sep:
+            raise ValueError(f"Invalid LDIF line: {line!r}")
+        if value.startswith(":"):
+            raw = base64.b64decode(value[1:].strip())
+            try:
+                value = raw.decode("utf-8")
+            except UnicodeDecodeError:
+                value = raw
+        elif value.startswith("<"):
+            raise ValueError(f"URL values are not supported in LDIF: {line!r}")
+        else:
+            value = value.strip()
+        if name.lower() == "dn":
+            dn = value
+        elif name.lower() not in ("version", "changetype"):
+            attributes.setdefault(name, []).append(value)
+
+    for raw_line in stream:
+        line = raw_line.rstrip("\r\n")
+        if line.startswith(" ") and logical is not None:
+            logical += line[1:]
+            continue
+        if logical is not None:
+            _flush_line(logical)
+            logical = None
+        if not line:
+            if dn is not None:
+                yield dn, attributes
+            dn, attributes = None, {}
+            continue
+        if line.startswith("#"):
+            continue
+        logical = line
+    if logical is not None:
+        _flush_line(logical)
+    if dn is not None:
+        yield dn, attributes
+
+
+def _group_dn(cn: str, base_dn: str) -> str:
+    return f"cn={cn},{base_dn}"
+
+
+def _split(value: str | None) -> list:
+    return [item.strip() for item in (value or "").replace(",", ";").split(";") if item.strip()]
+
+
+def _rows_from_csv(stream: IO[str], settings: LdapSettings, parent_dn: str) -> Iterator[_UserRow]:
+    default_role = _group_dn(settings.default_role_cn, settings.roles_base_dn)
+    for row in csv.DictReader(stream):
+        uid = (row.get("uid") or "").strip()
+        mail = (row.get("email") or row.get("mail") or "").strip()
+        hashed = row.get("userPassword")
+        attributes = build_user_attributes(
+            uid,
+            mail,
+            (row.get("given_name") or row.get("givenName") or "").strip(),
+            (row.get("sn") or "").strip(),
+            hashed,
+        )
+        groups = [default_role]
+        groups += [_group_dn(cn, settings.roles_base_dn) for cn in _split(row.get("roles"))]
+        org = (row.get("org") or "").strip() or settings.default_org_cn
+        groups.append(_group_dn(org, settings.orgs_base_dn))
+        password = None if hashed else row.get("password") or ""
+        missing = [name for name, value in (("uid", uid), ("email", mail), ("password", hashed or password)) if not value]
+        invalid = f"Missing {', '.join(missing)}" if missing else None
+        yield _UserRow(f"uid={uid},{parent_dn}", uid, attributes, list(dict.fromkeys(groups)), password, invalid)
+
+
+def _rows_from_ldif(stream: IO[str], settings: LdapSettings) -> Iterator[_UserRow]:
+    default_role = _group_dn(settings.default_role_cn, settings.roles_base_dn)
+    default_org = _group_dn(settings.default_org_cn, settings.orgs_base_dn)
+    orgs_suffix = settings.orgs_base_dn.lower()
+    for dn, attributes in iter_ldif(stream):
+        groups = [default_role] + attributes.pop("memberOf", [])
+        if not any(g.lower().endswith(orgs_suffix) for g in groups):
+            groups.append(default_org)
+        attributes.setdefault("objectClass", build_user_attributes("", "", "", "", "")["objectClass"])
+        uid = attributes["uid"][0] if "uid" in attributes else dn.split(",", 1)[0].partition("=")[2]
+        yield _UserRow(dn, uid, attributes, list(dict.fromkeys(groups)), invalid=None if uid else "Missing uid")
+
+
+def _detect_format(source) -> str:
+    name = source if isinstance(source, (str, os.PathLike)) else getattr(source, "name", "")
+    return "ldif" if str(name).lower().endswith(".ldif") else "csv"
+
+
+def _chunks(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class _MembershipWriter:
+    """
+    Buffer new member DNs per group and write them as multi-value modifies.
+    """
+
+    def __init__(self, pool: ConnectionPool, batch_size: int, report: ImportReport):
+        self._pool = pool
+        self._batch_size = batch_size
+        self._report = report
+        self._pending: dict[str, list] = {}
+
+    def add(self, group_dn: str, member_dn: str) -> None:
+        members = self._pending.setdefault(group_dn, [])
+        members.append(member_dn)
+        if len(members) >= self._batch_size:
+            self._write(group_dn, self._pending.pop(group_dn))
+
+    def flush(self) -> None:
+        while self._pending:
+            group_dn, members = self._pending.popitem()
+            self._write(group_dn, members)
+
+    def _write(self, group_dn: str, members: list) -> None:
+        with self._pool.connection() as conn:
+            if conn.modify(group_dn, {"member": [(MODIFY_ADD, members)]}):
+                self._report.memberships += len(members)
+                return
+            if conn.result.get("result") != _ATTRIBUTE_OR_VALUE_EXISTS:
+                self._fail(group_dn, members, conn.result.get("description"))
+                return
+            # One value already present rejects the whole modify: retry one by one.
+            for member in members:
+                if conn.modify(group_dn, {"member": [(MODIFY_ADD, [member])]}):
+                    self._report.memberships += 1
+                elif conn.result.get("result") != _ATTRIBUTE_OR_VALUE_EXISTS:
+                    self._fail(group_dn, [member], conn.result.get("description"))
+
+    def _fail(self, group_dn: str, members: list, description) -> None:
+        logger.warning("Could not add %d member(s) to %s: %s", len(members), group_dn, description)
+        self._report.errors.append((group_dn, f"{len(members)} member(s) not added: {description}"))
+
+
+def _existing_uids(pool: ConnectionPool, settings: LdapSettings, uids: list) -> set:
+    search_filter = "(|" + "".join(f"(uid={escape_filter_chars(uid)})" for uid in uids) + ")"
+    existing = set()
+    with pool.connection() as conn:
+        # Users only live under the users and pending users branches.
+        for base in (settings.users_base_dn, settings.pending_users_base_dn):
+            conn.search(base, search_filter, search_scope=SUBTREE, attributes=["uid"])
+            existing.update(value for entry in conn.entries for value in entry.uid.values)
+    return existing
+
+
+def _hash_rows(rows: list, hasher, executor) -> None:
+    pending = [row for row in rows if row.password is not None]
+    for row, hashed in zip(pending, hash_passwords([row.password for row in pending], hasher, executor)):
+        row.attributes["userPassword"] = hashed
+        row.password = None
+
+
+def _add_entry(pool: ConnectionPool, row: _UserRow) -> tuple[bool, int | None, str | None]:
+    try:
+        with pool.connection() as conn:
+            if conn.add(row.dn, attributes=row.attributes):
+                return True, None, None
+            return False, conn.result.get("result"), conn.result.get("description")
+    except LDAPCommunicationError:
+        raise
+    except LDAPException as exc:
+        # Rejected by ldap3 before sending (invalid DN or attribute): this row only.
+        return False, None, str(exc)
+
+
+def _import_chunk(pool: ConnectionPool, settings: LdapSettings, chunk: list, executor, hasher, hash_executor,
+                 memberships: _MembershipWriter, report: ImportReport) -> None:
+    """
+    Import one chunk of rows (see :func:`import_users`): skip the uids that
+    already exist, hash the passwords of the others, add the entries on
+    ``executor`` and buffer their memberships in ``memberships``.
+    """
+    for row in chunk:
+        if row.invalid:
+            report.failed += 1
+            report.errors.append((row.uid or row.attributes.get("mail") or row.dn, row.invalid))
+    chunk = [row for row in chunk if not row.invalid]
+    if not chunk:
+        return
+    existing = _existing_uids(pool, settings, [row.uid for row in chunk])
+    to_add = [row for row in chunk if row.uid not in existing]
+    report.skipped += len(chunk) - len(to_add)
+    # Only users that will be created are hashed.
+    _hash_rows(to_add, hasher, hash_executor)
+    outcomes = executor.map(bind_context(lambda row: _add_entry(pool, row)), to_add)
+    for row, (created, code, description) in zip(to_add, outcomes):
+        if created:
+            report.created += 1
+            for group_dn in row.groups:
+                memberships.add(group_dn, row.dn)
+        elif code == _ENTRY_ALREADY_EXISTS:
+            report.skipped += 1
+        else:
+            report.failed += 1
+            report.errors.append((row.uid, description))
+
+
+def import_batch(pool: ConnectionPool, settings: LdapSettings, rows: list, workers: int | None = None) -> ImportReport:
+    """
+    Import rows already read by :func:`iter_rows` as one chunk, memberships
+    included, hashing the passwords in this process (one shard of a sharded
+    import, see :mod:`georchestra_ldap.jobs`).
+    """
+    report = ImportReport()
+    memberships = _MembershipWriter(pool, max(len(rows), 1), report)
+    with ThreadPoolExecutor(max_workers=workers or pool.size) as executor:
+        _import_chunk(pool, settings, rows, executor, get_hasher(settings), None, memberships, report)
+    memberships.flush()
+    return report
+
+
+def iter_rows(source, settings: LdapSettings, format: str | None = None, pending: bool = True) -> Iterator:
+    """
+    Open ``source`` and yield its user rows (see :func:`import_users` for
+    the CSV and LDIF layouts); the file is closed once exhausted.
+    """
+    format = (format or _detect_format(source)).lower()
+    if format not in ("csv", "ldif"):
+        raise ValueError(f"Unsupported import format: {format}")
+    parent_dn = settings.pending_users_base_dn if pending else settings.users_base_dn
+    stream = open(source, encoding="utf-8", newline="") if isinstance(source, (str, os.PathLike)) else source
+    try:
+        if format == "ldif":
+            yield from _rows_from_ldif(stream, settings)
+        else:
+            yield from _rows_from_csv(stream, settings, parent_dn)
+    finally:
+        if stream is not source:
+            stream.close()
+
+
+def import_users(
+    pool: ConnectionPool,
+    settings: LdapSettings,
+    source,
+    format: str | None = None,
+    batch_size: int = 500,
+    pending: bool = True,
+    workers: int | None = None,
+) -> ImportReport:
+    """
+    Stream users from a CSV or LDIF source into the directory.
+
+    Rows are processed ``batch_size`` at a time, so memory stays constant:
+    one OR-filter search finds the uids that already exist (skipped), the
+    passwords of the remaining CSV rows are hashed (with the settings'
+    hasher, in ``settings.hash_workers`` processes), the entries are added
+    concurrently over the pool, and the new DNs are merged into one
+    multi-value ``member`` modify per group.
+
+    CSV columns: ``uid``, ``email``, ``given_name``, ``sn``, ``password``
+    (or an already hashed ``userPassword``), optional ``roles`` (``;``
+    separated role CNs) and ``org``; rows missing the uid, email or
+    password are counted as failed and skipped. LDIF entries are added as-is; their
+    ``memberOf`` values are turned into group memberships. Every user also
+    gets the default role, and the default org when none is given.
+
+    Args:
+        pool (ConnectionPool): Pool used for every operation.
+        settings (LdapSettings): Directory layout and password hashing.
+        source: Path or text stream of the file to import.
+        format (str | None): ``"csv"`` or ``"ldif"``; guessed from the file name if omitted.
+        batch_size (int): Rows per uniqueness search and max values per membership modify.
+        pending (bool): Create CSV users under pending users (default) or directly under users.
+        workers (int | None): Concurrent adds; defaults to the pool size.
+    """
+    format = (format or _detect_format(source)).lower()
+    if format not in ("csv", "ldif"):
+        raise ValueError(f"Unsupported import format: {format}")
+
+    report = ImportReport()
+    memberships = _MembershipWriter(pool, batch_size, report)
+    hasher = get_hasher(settings)
+    hash_workers = settings.hash_workers if settings.hash_workers > 0 else os.cpu_count()
+
+    rows = iter_rows(source, settings, format, pending)
+    try:
+        hashing = ProcessPoolExecutor(hash_workers) if format == "csv" and hash_workers > 1 else nullcontext()
+        with ThreadPoolExecutor(max_workers=workers or pool.size) as executor, hashing as hash_executor:
+            for chunk in _chunks(rows, batch_size):
+                _import_chunk(pool, settings, chunk, executor, hasher, hash_executor, memberships, report)
+                logger.info(
+                    "Import progress: %d created, %d skipped, %d failed",
+                    report.created, report.skipped, report.failed,
+                )
+        memberships.flush()
+    finally:
+        # Closes the source file when it was opened from a path.
+        rows.close()
+    return report
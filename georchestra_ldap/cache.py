@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LruTtlCache:
+    """
+    Thread-safe mapping bounded in size (least recently used entries are
+    evicted first) whose entries expire ``ttl`` seconds after being stored.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key):
+        """
+        Return the cached value for ``key``, or None when absent or expired.
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, expires_at = item
+                if expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value) -> None:
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def peek(self, key):
+        """
+        Return the stored value (even if expired) without touching counters or order.
+        """
+        with self._lock:
+            item = self._data.get(key)
+        return item[0] if item is not None else None
+
+    def pop(self, key):
+        with self._lock:
+            item = self._data.pop(key, None)
+        return item[0] if item is not None else None
+
+    def drop_values(self, value) -> None:
+        """
+        Drop every entry whose value equals ``value`` (case-insensitively for strings).
+        """
+        if isinstance(value, str):
+            value = value.lower()
+        with self._lock:
+            stale = [
+                key for key, (cached, _) in self._data.items()
+                if (cached.lower() if isinstance(cached, str) else cached) == value
+            ]
+            for key in stale:
+                del self._data[key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+class DirectoryCache:
+    """
+    Read-through cache of user lookups: email -> DN and DN -> ``memberOf``.
+
+    Used by the ldap_actions lookup helpers (see
+    ``ldap_connection.find_user_dn``) when a client enables it; negative
+    results are never cached. Writes made through the client invalidate the
+    affected entries, other changes become visible after ``ttl`` seconds.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0):
+        self.dns = LruTtlCache(maxsize, ttl)
+        self.memberships = LruTtlCache(maxsize, ttl)
+
+    def get_dn(self, email: str) -> str | None:
+        return self.dns.get(email.lower())
+
+    def put_dn(self, email: str, dn: str) -> None:
+        self.dns.set(email.lower(), dn)
+
+    def get_memberships(self, dn: str) -> tuple | None:
+        return self.memberships.get(dn.lower())
+
+    def put_memberships(self, dn: str, groups) -> None:
+        self.memberships.set(dn.lower(), tuple(groups))
+
+    def invalidate_user(self, email: str | None = None, dn: str | None = None, keep_dn: bool = False) -> None:
+        """
+        Drop what is cached about a user, by email and/or DN. With ``keep_dn``
+        only the memberships are dropped (the entry did not move).
+        """
+        if email is not None:
+            cached_dn = self.dns.peek(email.lower()) if keep_dn else self.dns.pop(email.lower())
+            dn = dn or cached_dn
+        if dn is not None:
+            self.memberships.pop(dn.lower())
+
+    def apply_changes(self, events) -> None:
+        """
+        Invalidate what a batch of change feed events (see
+        :mod:`georchestra_ldap.watch`) makes stale: the lookups of the
+        changed users, and every ``memberOf`` when a role or org changed.
+        """
+        for event in events:
+            if event.target in ("roles", "orgs") or event.old_target in ("roles", "orgs"):
+                self.invalidate_memberships()
+                continue
+            # The email may have changed, or the entry moved: drop both lookups.
+            for dn in (event.dn, event.old_dn):
+                if dn:
+                    self.invalidate_user(dn=dn)
+                    self.dns.drop_values(dn)
+
+    def invalidate_memberships(self) -> None:
+        """
+        Drop every cached ``memberOf`` (e.g. after a role is deleted).
+        """
+        self.memberships.clear()
+
+    def clear(self) -> None:
+        self.dns.clear()
+        self.memberships.clear()
+
+    def stats(self) -> dict:
+        """
+        Return hit/miss counters and sizes: ``{"dn": {...}, "memberships": {...}}``.
+        """
+        return {"dn": self.dns.stats(), "memberships": self.memberships.stats()}
@@ -0,0 +1,372 @@
+"""
+``georchestra-ldap`` command line entry point.
+
+One sub-command per :class:`GeorchestraLdapClient` action (same names and
+arguments as the client methods), plus ``batch`` which runs many commands
+read from a JSON lines or CSV file (or stdin) over the client's pooled
+connection and reports one JSON line per command.
+
+Examples::
+
+    georchestra-ldap add_user_role alice@example.org FOO
+    georchestra-ldap --json get_user_infos alice@example.org
+    georchestra-ldap batch changes.jsonl
+    cat changes.csv | georchestra-ldap batch --format csv -
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import dataclasses
+import json
+import logging
+import sys
+import time
+from dataclasses import dataclass
+from typing import IO, Iterator
+
+from georchestra_ldap.config import LdapSettings
+
+
+@dataclass(frozen=True)
+class _Param:
+    name: str
+    required: bool = True
+    # "str", "list" (CSV: ";" separated), "int" or "bool".
+    kind: str = "str"
+    default: object = None
+
+
+def _p(name: str, **kwargs) -> _Param:
+    return _Param(name, **kwargs)
+
+
+_EMAIL = (_p("email"),)
+_ROLE = (_p("role_cn"),)
+_ORG = (_p("org_cn"),)
+
+# action -> (help, parameters), in the client's argument order.
+COMMANDS = {
+    "create_user": ("Create a pending user with the default role and org.",
+                    (_p("uid"), _p("email"), _p("given_name"), _p("sn"), _p("password"))),
+    "moderate_user": ("Move a user from pending users to users.", _EMAIL),
+    "moderate_users": ("Move many pending users (emails or --search-filter) to users and fix their group members.", (
+        _p("emails", required=False, kind="list"),
+        _p("search_filter", required=False),
+        _p("batch_size", required=False, kind="int", default=500),
+    )),
+    "delete_user": ("Delete a user and remove it from its roles and org.", _EMAIL),
+    "read_user_infos": ("Show a user's DN, uid, cn, mail and groups.", _EMAIL),
+    "read_user_roles": ("Show a user's roles.", _EMAIL),
+    "get_user_infos": ("Show a user's DN, uid, cn, mail and groups.", _EMAIL),
+    "get_user_roles": ("Show a user's roles.", _EMAIL),
+    "get_user_org": ("Show a user's organization.", _EMAIL),
+    "get_users_infos": ("Show many users (emails, uids or DNs) in a few searches.", (
+        _p("keys", kind="list"),
+        _p("by", required=False),
+    )),
+    "user_is_pending": ("Tell whether a user is pending.", _EMAIL),
+    "update_lastname": ("Replace a user's sn.", (_p("user_dn"), _p("new_lastname"))),
+    "add_user_role": ("Add a user to a role.", _EMAIL + _ROLE),
+    "remove_user_role": ("Remove a user from a role.", _EMAIL + _ROLE),
+    "add_user_org": ("Move a user to an organization.", _EMAIL + _ORG),
+    "update_user_org": ("Add a user DN to an organization.", (_p("user_dn"),) + _ORG),
+    "create_role": ("Create a role.", _ROLE + (
+        _p("description", required=False, default="Role created via script"),
+        _p("members", required=False, kind="list"),
+    )),
+    "delete_role": ("Delete a role.", _ROLE),
+    "role_exists": ("Tell whether a role exists.", _ROLE),
+    "get_role_infos": ("Show a role's DN, description and members.", _ROLE),
+    "get_role_users": ("Show a role's members.", _ROLE),
+    "set_role_members": ("Make a role's members exactly the given DNs.",
+                         _ROLE + (_p("member_dns", kind="list"),)),
+    "add_users_to_role": ("Add many users (emails) to a role.", _ROLE + (_p("emails", kind="list"),)),
+    "remove_users_from_role": ("Remove many users (emails) from a role.", _ROLE + (_p("emails", kind="list"),)),
+    "create_org": ("Create an organization.", _ORG + (_p("org_name", required=False),)),
+    "org_exists": ("Tell whether an organization exists.", _ORG),
+    "get_org_users": ("Show an organization's members.", _ORG),
+    "set_org_members": ("Make an organization's members exactly the given DNs.",
+                        _ORG + (_p("member_dns", kind="list"),)),
+    "add_users_to_org": ("Move many users (emails) to an organization.", _ORG + (_p("emails", kind="list"),)),
+    "remove_users_from_org": ("Remove many users (emails) from an organization.", _ORG + (_p("emails", kind="list"),)),
+    "import_users": ("Import users from a CSV or LDIF file.", (
+        _p("source"),
+        _p("format", required=False),
+        _p("batch_size", required=False, kind="int", default=500),
+        _p("pending", required=False, kind="bool", default=True),
+    )),
+    "run_job": ("Run a huge bulk job over worker processes, resumable from a journal.", (
+        _p("job"),
+        _p("source"),
+        _p("group_cn", required=False),
+        _p("processes", required=False, kind="int"),
+        _p("batch_size", required=False, kind="int", default=500),
+        _p("journal", required=False),
+        _p("format", required=False),
+        _p("pending", required=False, kind="bool", default=True),
+    )),
+    "membership_report": ("Count the members of every role and org, pending and active users, users without org or roles.", (
+        _p("page_size", required=False, kind="int", default=500),
+    )),
+    "export": ("Export users, pending users, roles and orgs as LDIF or JSON lines.", (
+        _p("destination"),
+        _p("format", required=False, default="ldif"),
+        _p("targets", required=False, kind="list"),
+        _p("attributes", required=False, kind="list"),
+        _p("compress", required=False, kind="bool", default=False),
+        _p("page_size", required=False, kind="int", default=500),
+    )),
+    "reconcile": ("Apply a desired state JSON file (roles/orgs and their members).", (
+        _p("desired_state"),
+        _p("dry_run", required=False, kind="bool", default=False),
+    )),
+}
+
+
+def _as_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in {"1", "true", "yes", "on"}
+    return bool(value)
+
+
+def _coerce(param: _Param, value):
+    if param.kind == "list":
+        if isinstance(value, str):
+            return [item.strip() for item in value.split(";") if item.strip()]
+        return list(value)
+    if param.kind == "int":
+        return int(value)
+    if param.kind == "bool":
+        return _as_bool(value)
+    return value
+
+
+def build_call(action: str, values: dict) -> dict:
+    """
+    Validate and convert the arguments of one command into client keyword
+    arguments. Missing optional parameters and empty CSV cells are left out.
+
+    Raises:
+        ValueError: Unknown action, unknown parameter or missing required one.
+    """
+    if action not in COMMANDS:
+        raise ValueError(f"Unknown action: {action}")
+    params = COMMANDS[action][1]
+    names = {param.name for param in params}
+    unknown = set(values) - names
+    if unknown:
+        raise ValueError(f"Unknown parameter(s) for {action}: {', '.join(sorted(unknown))}")
+    kwargs = {}
+    for param in params:
+        value = values.get(param.name)
+        if value is None or value == "":
+            if param.required:
+                raise ValueError(f"Missing parameter for {action}: {param.name}")
+            continue
+        kwargs[param.name] = _coerce(param, value)
+    return kwargs
+
+
+def run_command(client, action: str, kwargs: dict):
+    """
+    Call the client method ``action``; file arguments (``desired_state``)
+    are loaded first.
+    """
+    if action == "reconcile" and isinstance(kwargs.get("desired_state"), str):
+        from georchestra_ldap.reconcile import load_desired_state
+
+        kwargs = dict(kwargs, desired_state=load_desired_state(kwargs["desired_state"]))
+    return getattr(client, action)(**kwargs)
+
+
+def result_ok(result) -> bool:
+    """
+    Whether a command succeeded: result objects carry their own status,
+    reports (import, reconcile, membership sync) fail when they list errors
+    and the checks answering a boolean (``role_exists``, ``org_exists``,
+    ``user_is_pending``) fail when the answer is no, like ``test``.
+    """
+    errors = getattr(result, "errors", None)
+    if errors is not None:
+        return not errors
+    return bool(result)
+
+
+def result_data(result):
+    """
+    Return a JSON serializable view of a command result.
+    """
+    if isinstance(result, bool):
+        return {"result": result}
+    if hasattr(result, "as_dict"):
+        return result.as_dict()
+    if dataclasses.is_dataclass(result):
+        return dataclasses.asdict(result)
+    if isinstance(result, dict):
+        return {key: result_data(value) for key, value in result.items()}
+    return result
+
+
+def result_text(result) -> str:
+    """
+    Human readable rendering: result objects print like the legacy scripts,
+    reports as indented JSON.
+    """
+    if dataclasses.is_dataclass(result) or isinstance(result, dict):
+        return json.dumps(result_data(result), indent=2, default=str)
+    return str(result)
+
+
+def iter_batch(stream: IO[str], format: str = "jsonl") -> Iterator[tuple[int, str | None, dict | ValueError]]:
+    """
+    Yield ``(line_number, action, arguments)`` from a batch file; for a line
+    that cannot be parsed, ``arguments`` is the ``ValueError`` so the
+    caller can report it and go on.
+
+    ``jsonl``: one object per line, ``{"action": "add_user_role", "email":
+    ..., "role_cn": ...}``; blank lines and lines starting with ``#`` are
+    skipped. ``csv``: a header row with an ``action`` column plus one column
+    per parameter name; empty cells are ignored and list parameters are
+    ``;`` separated.
+    """
+    if format == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            values = {key: value for key, value in row.items() if key and value not in (None, "")}
+            if values:
+                yield reader.line_num, values.pop("action", None), values
+        return
+    if format != "jsonl":
+        raise ValueError(f"Unsupported batch format: {format}")
+    for number, line in enumerate(stream, start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            values = json.loads(line)
+        except ValueError as exc:
+            yield number, None, ValueError(f"Invalid JSON: {exc}")
+            continue
+        if not isinstance(values, dict):
+            yield number, None, ValueError("Expected a JSON object")
+            continue
+        yield number, values.pop("action", None), values
+
+
+def run_batch(client, stream: IO[str], output: IO[str], format: str = "jsonl", stop_on_error: bool = False) -> tuple[int, int]:
+    """
+    Run every command of a batch sequentially with ``client`` (so over one
+    pooled connection) and write one JSON line per command to ``output``:
+    ``{"line", "action", "ok", "result"}`` or ``{"line", "action", "ok",
+    "error"}``. Invalid lines are reported the same way and do not stop
+    the batch unless ``stop_on_error`` is set.
+
+    Returns:
+        tuple[int, int]: Commands run and commands failed.
+    """
+    total = failed = 0
+    for number, action, values in iter_batch(stream, format):
+        total += 1
+        record = {"line": number, "action": action}
+        try:
+            if isinstance(values, ValueError):
+                raise values
+            result = run_command(client, action, build_call(action, values))
+            record["ok"] = result_ok(result)
+            record["result"] = result_data(result)
+        except Exception as exc:
+            record["ok"] = False
+            record["error"] = str(exc) or type(exc).__name__
+        failed += not record["ok"]
+        output.write(json.dumps(record, default=str) + "\n")
+        if stop_on_error and not record["ok"]:
+            break
+    return total, failed
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="georchestra-ldap",
+        description="geOrchestra LDAP actions. Settings come from the LDAP_* environment variables.",
+    )
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("-v", "--verbose", action="store_true", help="log actions to stderr")
+    subparsers = parser.add_subparsers(dest="action", metavar="ACTION")
+    subparsers.required = True
+
+    for action, (help_text, params) in COMMANDS.items():
+        sub = subparsers.add_parser(action, help=help_text, description=help_text)
+        for param in params:
+            if param.required:
+                sub.add_argument(param.name, nargs="*" if param.kind == "list" else None)
+            elif param.kind == "bool":
+                flag = param.name.replace("_", "-")
+                if param.default:
+                    sub.add_argument(f"--no-{flag}", dest=param.name, action="store_false", default=True)
+                else:
+                    sub.add_argument(f"--{flag}", dest=param.name, action="store_true", default=False)
+            else:
+                sub.add_argument(f"--{param.name.replace('_', '-')}", dest=param.name,
+                                 nargs="+" if param.kind == "list" else None,
+                                 type=int if param.kind == "int" else None, default=param.default)
+
+    batch = subparsers.add_parser(
+        "batch", help="Run commands from a JSON lines or CSV file over one connection.",
+        description="Run commands from a JSON lines or CSV file (default: stdin) over one pooled "
+                    "connection; one JSON result line is printed per command.",
+    )
+    batch.add_argument("file", nargs="?", default="-", help="batch file, '-' for stdin")
+    batch.add_argument("--format", choices=("jsonl", "csv"), help="defaults to the file extension, else jsonl")
+    batch.add_argument("--stop-on-error", action="store_true", help="stop at the first failed command")
+    return parser
+
+
+def main(argv=None, client=None) -> int:
+    """
+    Console script entry point. Returns the process exit status: 0 when
+    every command succeeded, 1 otherwise, 2 on usage errors.
+    """
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, stream=sys.stderr)
+
+    if client is None:
+        from georchestra_ldap.client import GeorchestraLdapClient
+
+        client = GeorchestraLdapClient(LdapSettings.from_env())
+
+    with client:
+        if args.action == "batch":
+            return _main_batch(client, args)
+        params = COMMANDS[args.action][1]
+        values = {param.name: getattr(args, param.name) for param in params}
+        try:
+            result = run_command(client, args.action, build_call(args.action, values))
+        except Exception as exc:
+            print(f"Error: {exc}", file=sys.stderr)
+            return 1
+        # An export written to stdout keeps it for the data.
+        output = sys.stderr if args.action == "export" and values["destination"] == "-" else sys.stdout
+        if args.json:
+            print(json.dumps(result_data(result), indent=2, default=str), file=output)
+        else:
+            print(result_text(result), file=output)
+        return 0 if result_ok(result) else 1
+
+
+def _main_batch(client, args) -> int:
+    format = args.format or ("csv" if args.file.lower().endswith(".csv") else "jsonl")
+    start = time.perf_counter()
+    if args.file == "-":
+        total, failed = run_batch(client, sys.stdin, sys.stdout, format, args.stop_on_error)
+    else:
+        with open(args.file, encoding="utf-8", newline="") as stream:
+            total, failed = run_batch(client, stream, sys.stdout, format, args.stop_on_error)
+    elapsed = time.perf_counter() - start
+    print(f"{total} command(s), {failed} failed, {elapsed:.2f}s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
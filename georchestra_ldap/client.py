@@ -1,46 +1,83 @@
 from __future__ import annotations
 
 import logging
-from typing import Iterable
+import math
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import TYPE_CHECKING, Iterable, Iterator
 
+from georchestra_ldap.cache import DirectoryCache
 from georchestra_ldap.config import LdapSettings
-from georchestra_ldap.utils import apply_settings_to_legacy_config, ensure_legacy_import_aliases
-
-# Direct imports of the legacy scripts: simple and explicit.
-from ldap_actions import (
-    add_user_role,
-    add_user_org,
-    create_org,
-    create_role,
-    create_user,
-    delete_role,
-    delete_user,
-    get_org_users,
-    get_role_infos,
-    get_role_users,
-    get_user_infos,
-    get_user_roles,
-    get_user_org,
-    ldap_connection,
-    moderate_user,
-    org_exists,
-    read_user_infos,
-    read_user_roles,
-    remove_user_role,
-    role_exist,
-    update_org_user,
-    update_user_name,
-    user_is_pending,
-)
+from georchestra_ldap.metrics import MetricsRegistry
+from georchestra_ldap.utils import LegacyConfigView, import_legacy
+
+if TYPE_CHECKING:
+    from georchestra_ldap.bulk import ImportReport
+    from georchestra_ldap.connection import ConnectionPool
+    from georchestra_ldap.export import ExportReport
+    from georchestra_ldap.jobs import JobReport
+    from georchestra_ldap.lookup import ChunkSizer
+    from georchestra_ldap.membership import BatchMembershipResult, MembershipChange
+    from georchestra_ldap.moderation import ModerationReport
+    from georchestra_ldap.reconcile import ReconcilePlan
+    from georchestra_ldap.replicas import ReplicaSet
+    from georchestra_ldap.report import MembershipReport
+    from georchestra_ldap.snapshot import DirectorySnapshot
+    from georchestra_ldap.watch import ChangeEvent
+    from ldap_actions.results import GroupResult, UserResult
 
 logger = logging.getLogger(__name__)
 
+# Actions that only read: sent to the read replicas when configured.
+_READ_ACTIONS = frozenset({
+    "read_user_infos", "read_user_roles", "get_user_infos", "get_role_infos", "get_user_roles",
+    "get_user_org", "role_exists", "get_role_users", "org_exists", "get_org_users", "user_is_pending",
+    "iter_role_members", "iter_org_members", "snapshot", "export", "get_users_infos", "membership_report",
+})
+
+
+@lru_cache(maxsize=None)
+def _legacy(target: str):
+    """
+    Resolve ``"module:function"`` from ``ldap_actions``; the legacy modules
+    (and ldap3) are only imported the first time an action needs them.
+    """
+    module_name, func_name = target.split(":")
+    return getattr(import_legacy(module_name), func_name)
+
 
 class GeorchestraLdapClient:
     """
     Thin wrapper around the historical scripts in ``ldap_actions`` with a simple,
-    importable API. Each method delegates to the matching legacy script while
-    reapplying :class:`LdapSettings` to the legacy ``config.py``.
+    importable API. Each method delegates to the matching legacy script, which
+    reads this client's :class:`LdapSettings` instead of the shared legacy
+    ``config.py``: several clients with different settings can run in
+    parallel threads.
+
+    Actions print nothing: they return a ``UserResult`` / ``GroupResult``
+    (status, message, DN, roles, org, members...); ``print(result)`` renders
+    it like the historical scripts did.
+
+    The client owns a bounded :class:`ConnectionPool`; every action borrows a
+    bound connection from it instead of opening (and binding) a new one. Call
+    :meth:`close` (or use the client as a context manager) to unbind them.
+    A ready-made pool (for instance of ldap3 ``MOCK_SYNC`` connections) can
+    be passed as ``pool``.
+
+    With ``settings.metrics`` (or an explicit ``metrics`` registry) every
+    method is timed and the LDAP operations of the pooled connections are
+    counted per action; see :class:`MetricsRegistry` for the sinks.
+
+    With ``settings.read_servers`` the read-only actions go to a second pool
+    on the read replicas (see :class:`georchestra_ldap.replicas.ReplicaSet`)
+    and writes stay on ``settings.server``; for ``settings.read_your_writes``
+    seconds after a write, this client reads from the master too.
+
+    With ``settings.cache_size > 0`` the email -> DN and DN -> ``memberOf``
+    lookups done by the actions go through a :class:`DirectoryCache`
+    (LRU + TTL); the client's write methods invalidate what they change and
+    :meth:`cache_stats` exposes hit/miss counters.
 
     Common usage example :
     ----------------------
@@ -61,17 +98,102 @@ class GeorchestraLdapClient:
     >>> client.delete_user("alice@example.org")
     """
 
-    def __init__(self, settings: LdapSettings | None = None):
+    def __init__(
+        self,
+        settings: LdapSettings | None = None,
+        pool: ConnectionPool | None = None,
+        metrics: MetricsRegistry | None = None,
+    ):
         self.settings = settings or LdapSettings.from_env()
-        self._apply_settings()
+        self.metrics = metrics if metrics is not None else (MetricsRegistry() if self.settings.metrics else None)
+        # An injected pool (e.g. of mock connections) is used until close().
+        self._pool: ConnectionPool | None = pool
+        self._read_pool: ConnectionPool | None = None
+        self.replicas: ReplicaSet | None = None
+        self._last_write = -math.inf
+        # Values per OR filter of get_users_infos, tuned across calls.
+        self._lookup_sizer: ChunkSizer | None = None
+        self._legacy_config = LegacyConfigView(self.settings)
+        self.cache = self._build_cache(self.settings)
+
+    @staticmethod
+    def _build_cache(settings: LdapSettings) -> DirectoryCache | None:
+        if settings.cache_size <= 0:
+            return None
+        return DirectoryCache(settings.cache_size, settings.cache_ttl)
+
+    def __enter__(self) -> "GeorchestraLdapClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def pool(self) -> ConnectionPool:
+        """
+        Connection pool used by the actions, created on first use.
+        """
+        if self._pool is None:
+            from georchestra_ldap.connection import ConnectionPool
 
-    def _apply_settings(self) -> None:
-        apply_settings_to_legacy_config(self.settings)
-        ensure_legacy_import_aliases()
+            self._pool = ConnectionPool.from_settings(self.settings, metrics=self.metrics)
+        return self._pool
+
+    @property
+    def read_pool(self) -> ConnectionPool:
+        """
+        Connection pool on the read replicas, created on first use; the
+        master pool when no replica is configured.
+        """
+        if not self.settings.read_servers:
+            return self.pool
+        if self._read_pool is None:
+            from georchestra_ldap.replicas import ReplicaSet, read_pool
+
+            self.replicas = ReplicaSet(self.settings)
+            self._read_pool = read_pool(self.replicas, metrics=self.metrics)
+        return self._read_pool
+
+    def _pool_for(self, action_name: str) -> ConnectionPool:
+        """
+        Return the pool an action runs on: the read pool for reads, unless
+        this client wrote less than ``settings.read_your_writes`` seconds
+        ago; the master pool for everything else.
+        """
+        if action_name in _READ_ACTIONS and time.monotonic() - self._last_write >= self.settings.read_your_writes:
+            return self.read_pool
+        return self.pool
+
+    def close(self) -> None:
+        """
+        Unbind every pooled connection. The pools are recreated on next use.
+        """
+        pool, self._pool = self._pool, None
+        read_pool, self._read_pool = self._read_pool, None
+        for pool in (pool, read_pool):
+            if pool is not None:
+                pool.close()
+
+    @contextmanager
+    def _action(self, action_name: str) -> Iterator:
+        """
+        Log the action and, when metrics are enabled, time it.
+        """
+        logger.info("Running action: %s", action_name)
+        try:
+            if self.metrics is None:
+                yield
+            else:
+                with self.metrics.action(action_name):
+                    yield
+        finally:
+            if action_name not in _READ_ACTIONS:
+                self._last_write = time.monotonic()
 
     def _run(self, action_name: str, func, *args, **kwargs):
         """
-        Apply settings, log the action, call the legacy function.
+        Log the action and call the legacy function with a pooled connection
+        and this client's settings.
 
         Args:
             action_name (str): Friendly action name used for logging.
@@ -79,34 +201,84 @@ class GeorchestraLdapClient:
             *args: Positional arguments forwarded to the underlying function.
             **kwargs: Keyword arguments forwarded to the underlying function.
         """
-        self._apply_settings()
-        logger.info("Running action: %s", action_name)
+        pool = self._pool_for(action_name)
+        # A read replica lost mid-request: retry on another connection.
+        attempts = len(self.settings.read_servers) + 1 if pool is not self.pool else 1
         try:
-            return func(*args, **kwargs)
+            with self._action(action_name):
+                for attempt in range(attempts):
+                    try:
+                        with pool.connection() as conn:
+                            with _legacy("ldap_connection:use_connection")(conn, self._legacy_config, self.cache):
+                                return func(*args, **kwargs)
+                    except Exception as exc:
+                        from ldap3.core.exceptions import LDAPCommunicationError
+
+                        if attempt + 1 == attempts or not isinstance(exc, LDAPCommunicationError):
+                            raise
+                        logger.warning("Read replica failed during %s, retrying: %s", action_name, exc)
         except Exception:
             logger.exception("Action failed: %s", action_name)
             raise
 
+    @contextmanager
+    def _invalidating(
+        self, email: str | None = None, dn: str | None = None, keep_dn: bool = False, memberships: bool = False
+    ):
+        """
+        Drop cached lookups touched by a write once it has run (even if it failed).
+        """
+        try:
+            yield
+        finally:
+            if self.cache is not None:
+                if memberships:
+                    self.cache.invalidate_memberships()
+                if email is not None or dn is not None:
+                    self.cache.invalidate_user(email=email, dn=dn, keep_dn=keep_dn)
+
+    def cache_stats(self) -> dict | None:
+        """
+        Return the lookup cache hit/miss counters and sizes, or None when disabled.
+        """
+        return self.cache.stats() if self.cache is not None else None
+
     def reload_settings(self, settings: LdapSettings | None = None) -> "GeorchestraLdapClient":
         """
-        Update the underlying ``config.py`` values, optionally replacing the
-        current :class:`LdapSettings` instance.
+        Replace the current :class:`LdapSettings` instance and drop the pooled
+        connections opened with the previous one.
 
         Args:
-            settings (LdapSettings | None): New settings to apply; if None, reapply the existing instance.
+            settings (LdapSettings | None): New settings to use; if None, only reset the pool.
         """
         if settings is not None:
             self.settings = settings
-        self._apply_settings()
+            self._legacy_config = LegacyConfigView(settings)
+            self.cache = self._build_cache(settings)
+        self.close()
         return self
 
+    @contextmanager
+    def connection(self) -> Iterator:
+        """
+        Borrow a pooled, bound ldap3 Connection for the duration of a ``with`` block.
+        """
+        with self.pool.connection() as conn:
+            yield conn
+
     def get_connection(self):
         """
-        Return an auto-bound ldap3 Connection configured from current settings.
+        Return a new auto-bound ldap3 Connection configured from current settings.
+
+        The connection is not pooled and must be unbound by the caller; prefer
+        :meth:`connection` for short lookups.
         """
-        return self._run("get_connection", ldap_connection.get_connection)
+        from georchestra_ldap.connection import open_connection
 
-    def create_org(self, org_cn: str, org_name: str | None = None):
+        logger.info("Running action: %s", "get_connection")
+        return open_connection(self.settings)
+
+    def create_org(self, org_cn: str, org_name: str | None = None) -> GroupResult:
         """
         Create an organization if it does not exist.
 
@@ -114,9 +286,9 @@ class GeorchestraLdapClient:
             org_cn (str): Common name of the organization.
             org_name (str | None): Optional display name (defaults to ``org_cn``).
         """
-        return self._run("create_org", create_org.create_org, org_cn, org_name)
+        return self._run("create_org", _legacy("create_org:create_org"), org_cn, org_name)
 
-    def create_user(self, uid: str, email: str, given_name: str, sn: str, password: str):
+    def create_user(self, uid: str, email: str, given_name: str, sn: str, password: str) -> UserResult:
         # Do not log password, so only log action name above.
         """
         Create a pending user with geOrchestra objectClasses, USER role, C2C org.
@@ -128,21 +300,261 @@ class GeorchestraLdapClient:
             sn (str): Surname.
             password (str): Plain password, hashed before being stored.
         """
-        return self._run("create_user", create_user.create_user, uid, email, given_name, sn, password)
+        return self._run("create_user", _legacy("create_user:create_user"), uid, email, given_name, sn, password)
+
+    def import_users(self, source, format: str | None = None, batch_size: int = 500, pending: bool = True) -> ImportReport:
+        """
+        Stream users from a CSV or LDIF file and create them in bulk.
+
+        Uniqueness checks are batched, entries are added concurrently over the
+        connection pool and role/org memberships are written as one
+        multi-value modify per group (see :func:`georchestra_ldap.bulk.import_users`).
+
+        Args:
+            source: Path or text stream of the CSV/LDIF data.
+            format (str | None): ``"csv"`` or ``"ldif"``; guessed from the file name if omitted.
+            batch_size (int): Rows handled per batch and max values per membership modify.
+            pending (bool): Create CSV users in pending users (default) or directly in users.
+        """
+        from georchestra_ldap.bulk import import_users
+
+        with self._action("import_users"):
+            report = import_users(self.pool, self.settings, source, format=format, batch_size=batch_size, pending=pending)
+        logger.info(
+            "Import finished: %d created, %d skipped, %d failed",
+            report.created, report.skipped, report.failed,
+        )
+        return report
+
+    def run_job(
+        self,
+        job: str,
+        source,
+        group_cn: str | None = None,
+        processes: int | None = None,
+        batch_size: int = 500,
+        journal: str | None = None,
+        format: str | None = None,
+        pending: bool = True,
+        progress=None,
+    ) -> JobReport:
+        """
+        Run a huge bulk job sharded over worker processes, each with its own
+        connection pool (see :mod:`georchestra_ldap.jobs`).
+
+        Jobs: ``import_users`` (CSV/LDIF ``source``), ``add_users_to_role``,
+        ``remove_users_from_role``, ``add_users_to_org``,
+        ``remove_users_from_org`` (``group_cn`` and emails),
+        ``moderate_users`` and ``delete_users`` (emails). Emails are given as an iterable or as a
+        file with one email per line. Finished batches are recorded in the
+        ``journal`` file; running the same job again with it resumes where
+        it stopped. Throughput is logged after every batch and passed to
+        ``progress``.
+
+        Args:
+            job (str): Job name.
+            source: Import file, emails, or file of emails.
+            group_cn (str | None): Role or organization of the membership jobs.
+            processes (int | None): Worker processes; one per CPU by default,
+                1 runs the batches in this process on this client.
+            batch_size (int): Items per batch.
+            journal (str | None): Checkpoint journal path.
+            format (str | None): ``csv`` or ``ldif`` (imports; guessed from the file name).
+            pending (bool): Import CSV users under pending users.
+            progress (callable | None): Called with the :class:`JobReport` after every batch.
+        """
+        from georchestra_ldap.jobs import run_job
+
+        with self._action("run_job"):
+            try:
+                return run_job(
+                    self, job, source, group_cn=group_cn, processes=processes, batch_size=batch_size,
+                    journal=journal, format=format, pending=pending, progress=progress,
+                )
+            finally:
+                # The workers wrote behind this client's back.
+                if self.cache is not None:
+                    self.cache.clear()
+
+    def snapshot(self, page_size: int = 500, deletion_interval: float | None = 300.0) -> DirectorySnapshot:
+        """
+        Load and return an in-memory :class:`DirectorySnapshot` of users,
+        pending users, roles and orgs. Call its ``refresh()`` to catch up
+        with later changes incrementally.
+
+        Args:
+            page_size (int): Entries per page for the paged searches.
+            deletion_interval (float | None): Minimum seconds between two
+                listings of the whole directory to notice deleted entries
+                (None: never, when a change feed reports them).
+        """
+        from georchestra_ldap.snapshot import DirectorySnapshot
+
+        with self._action("snapshot"):
+            return DirectorySnapshot(
+                self._pool_for("snapshot"), self.settings, page_size=page_size, deletion_interval=deletion_interval
+            ).load()
+
+    def membership_report(self, page_size: int = 500) -> MembershipReport:
+        """
+        Count the members of every role and organization, active and pending
+        users, and list the users without an organization or without roles,
+        in one paged scan that reads ``memberOf`` only (member lists are
+        neither transferred nor kept in memory).
+
+        Args:
+            page_size (int): Entries per page of the paged search.
+        """
+        from georchestra_ldap.report import membership_report
+
+        with self._action("membership_report"):
+            return membership_report(self._pool_for("membership_report"), self.settings, page_size)
+
+    def watch(
+        self,
+        bases: Iterable[str] | None = None,
+        mode: str = "persist",
+        cookie_store=None,
+        attributes: Iterable[str] | None = None,
+        interval: float = 30.0,
+        initial: bool = False,
+        mirrors: Iterable = (),
+        stop=None,
+    ) -> Iterator[ChangeEvent]:
+        """
+        Yield the changes (add, modify, delete, moddn) of users, pending
+        users, roles and orgs as they happen, over syncrepl (the provider
+        needs the ``syncprov`` overlay); see :class:`georchestra_ldap.watch.ChangeFeed`.
+
+        This client's lookup cache and the given ``mirrors`` (e.g. a
+        :class:`DirectorySnapshot`) are updated from the feed before each
+        event is yielded, instead of querying the directory again. The sync
+        cookie is saved in ``cookie_store`` (default:
+        ``settings.sync_cookie_path``) so a restarted watcher only receives
+        what changed meanwhile.
+
+        Args:
+            bases (Iterable[str] | None): Watched targets (``users``, ``pending_users``, ``roles``, ``orgs``).
+            mode (str): ``persist`` (changes pushed by the server on a dedicated
+                connection) or ``poll`` (a refreshOnly sync every ``interval`` seconds).
+            cookie_store: JSON file path or object with ``load(key)``/``save(key, cookie)``.
+            attributes (Iterable[str] | None): Attributes sent with each change (whole entries by default).
+            interval (float): Seconds between polls in ``poll`` mode.
+            initial (bool): Also yield the existing entries when starting without cookie.
+            mirrors (Iterable): Objects with an ``apply_changes(events)`` method.
+            stop (threading.Event | None): Set it to end the iteration from another thread.
+
+        Raises:
+            ChangeFeedUnavailable: The server does not support syncrepl.
+        """
+        from georchestra_ldap.watch import ChangeFeed
+
+        mirrors = list(mirrors)
+        if self.cache is not None:
+            mirrors.append(self.cache)
+        logger.info("Running action: %s", "watch")
+        feed = ChangeFeed(
+            self.pool, self.settings, bases=bases, mode=mode, cookie_store=cookie_store,
+            attributes=attributes, interval=interval, initial=initial, mirrors=mirrors, stop=stop,
+        )
+        return feed.events()
+
+    def export(
+        self,
+        destination=None,
+        format: str = "ldif",
+        targets: Iterable[str] | None = None,
+        attributes: Iterable[str] | None = None,
+        compress: bool | None = None,
+        page_size: int = 500,
+    ) -> ExportReport:
+        """
+        Stream users, pending users, roles and orgs to an LDIF or JSON lines
+        file (or stdout) with bounded memory; see
+        :func:`georchestra_ldap.export.export_entries`.
+
+        Args:
+            destination: Path (gzip-compressed when it ends in ``.gz``), ``"-"``/None for stdout, or a stream.
+            format (str): ``"ldif"`` or ``"jsonl"``.
+            targets (Iterable[str] | None): Subset of ``users``, ``pending_users``, ``roles``, ``orgs``.
+            attributes (Iterable[str] | None): Attributes to export (all user attributes by default).
+            compress (bool | None): Force gzip on or off.
+            page_size (int): Entries per page for the paged searches.
+        """
+        from georchestra_ldap.export import export_entries
+
+        with self._action("export"):
+            return export_entries(
+                self._pool_for("export"), self.settings, destination, format=format, targets=targets,
+                attributes=attributes, compress=compress, page_size=page_size,
+            )
+
+    def reconcile(self, desired_state: dict, dry_run: bool = False, workers: int | None = None) -> ReconcilePlan:
+        """
+        Bring roles and organizations (and their members) to ``desired_state``
+        with a minimal set of writes. With ``dry_run`` nothing is written and
+        the returned plan lists the operations that would be issued.
+
+        Args:
+            desired_state (dict): ``{"roles": {cn: members}, "orgs": {cn: members}}``;
+                see :func:`georchestra_ldap.reconcile.reconcile` for the full layout.
+            dry_run (bool): Only compute the plan.
+            workers (int | None): Concurrent operations; defaults to the pool size.
+        """
+        from georchestra_ldap.reconcile import reconcile
 
-    def moderate_user(self, email: str):
+        with self._action("reconcile"), self._invalidating(memberships=not dry_run):
+            return reconcile(self.pool, self.settings, desired_state, dry_run=dry_run, workers=workers)
+
+    def moderate_user(self, email: str) -> UserResult:
         """
         Move a user from pending to users if present in pending.
         """
-        return self._run("moderate_user", moderate_user.moderate_user, email)
+        with self._invalidating(email=email):
+            return self._run("moderate_user", _legacy("moderate_user:moderate_user"), email)
+
+    def moderate_users(
+        self,
+        emails: Iterable[str] | None = None,
+        search_filter: str | None = None,
+        batch_size: int = 500,
+    ) -> ModerationReport:
+        """
+        Move many pending users to users at once, given by email or selected
+        by an LDAP filter over the pending users branch.
+
+        The entries are moved concurrently over the pool, then the ``member``
+        values of their roles and organizations that still point at the old
+        pending DNs are rewritten with one modify per group and batch (a
+        no-op on servers running the referential integrity overlay).
+
+        Args:
+            emails (Iterable[str] | None): Emails of the users to move.
+            search_filter (str | None): Filter selecting the pending users instead.
+            batch_size (int): Users moved before their group members are rewritten.
+
+        Returns:
+            ModerationReport: ``outcomes`` maps each email (or DN) to
+            ``updated``, ``unchanged``, ``not_found`` or ``error``.
+        """
+        from georchestra_ldap.moderation import moderate_users
+
+        with self._action("moderate_users"):
+            try:
+                return moderate_users(self.pool, self.settings, emails, search_filter, batch_size)
+            finally:
+                # DNs and memberships of many users changed.
+                if self.cache is not None:
+                    self.cache.clear()
 
-    def add_user_role(self, email: str, role_cn: str):
+    def add_user_role(self, email: str, role_cn: str) -> UserResult:
         """
         Add an existing role to the user identified by email.
         """
-        return self._run("add_user_role", add_user_role.add_role, email, role_cn)
+        with self._invalidating(email=email, keep_dn=True):
+            return self._run("add_user_role", _legacy("add_user_role:add_role"), email, role_cn)
 
-    def add_user_org(self, email: str, org_cn: str):
+    def add_user_org(self, email: str, org_cn: str) -> UserResult:
         """
         Add a user (by email) to an organization, removing them from other orgs first.
 
@@ -150,91 +562,127 @@ class GeorchestraLdapClient:
             email (str): User email.
             org_cn (str): Organization common name.
         """
-        return self._run("add_user_org", add_user_org.add_user_to_org, email, org_cn)
+        with self._invalidating(email=email, keep_dn=True):
+            return self._run("add_user_org", _legacy("add_user_org:add_user_to_org"), email, org_cn)
 
-    def remove_user_role(self, email: str, role_cn: str):
+    def remove_user_role(self, email: str, role_cn: str) -> UserResult:
         """
         Remove a role from the user identified by email.
         """
-        return self._run("remove_user_role", remove_user_role.remove_role, email, role_cn)
+        with self._invalidating(email=email, keep_dn=True):
+            return self._run("remove_user_role", _legacy("remove_user_role:remove_role"), email, role_cn)
 
-    def create_role(self, role_cn: str, description: str = "Role created via script", members: Iterable[str] | None = None):
+    def create_role(self, role_cn: str, description: str = "Role created via script", members: Iterable[str] | None = None) -> GroupResult:
         """
         Create a role if missing (idempotent); optionally seed members.
         """
-        return self._run("create_role", create_role.create_role, role_cn, description, members)
+        with self._invalidating(memberships=bool(members)):
+            return self._run("create_role", _legacy("create_role:create_role"), role_cn, description, members)
 
-    def delete_role(self, role_cn: str):
+    def delete_role(self, role_cn: str) -> GroupResult:
         """
         Delete a role after removing its members.
         """
-        return self._run("delete_role", delete_role.delete_role, role_cn)
+        with self._invalidating(memberships=True):
+            return self._run("delete_role", _legacy("delete_role:delete_role"), role_cn)
 
-    def update_user_org(self, user_dn: str, org_cn: str):
+    def update_user_org(self, user_dn: str, org_cn: str) -> UserResult:
         """
         Add a user DN to the given organization group.
         """
-        return self._run("update_user_org", update_org_user.update_user_org, user_dn, org_cn)
+        with self._invalidating(dn=user_dn):
+            return self._run("update_user_org", _legacy("update_org_user:update_user_org"), user_dn, org_cn)
 
-    def update_lastname(self, user_dn: str, new_lastname: str):
+    def update_lastname(self, user_dn: str, new_lastname: str) -> UserResult:
         """
         Replace the ``sn`` attribute of a user DN.
         """
-        return self._run("update_lastname", update_user_name.update_lastname, user_dn, new_lastname)
+        return self._run("update_lastname", _legacy("update_user_name:update_lastname"), user_dn, new_lastname)
 
-    def delete_user(self, email: str):
+    def delete_user(self, email: str) -> UserResult:
         """
         Remove a user from all roles/orgs then delete the entry.
         """
-        return self._run("delete_user", delete_user.delete_user, email)
+        with self._invalidating(email=email):
+            return self._run("delete_user", _legacy("delete_user:delete_user"), email)
 
-    def read_user_infos(self, email: str):
+    def read_user_infos(self, email: str) -> UserResult:
         """
-        Print full user info (DN, uid, cn, mail, memberOf).
+        Return user information (DN, uid, cn, mail, memberOf) as a :class:`UserResult`.
+
+        Args:
+            email (str): User email.
         """
-        return self._run("read_user_infos", read_user_infos.read_user_infos, email)
+        return self._run("read_user_infos", _legacy("read_user_infos:read_user_infos"), email)
 
-    def read_user_roles(self, email: str):
+    def read_user_roles(self, email: str) -> UserResult:
         """
-        Print roles (groups under roles DN) for a user email.
+        Return the role CNs of a given user email (``result.roles``).
+
+        Args:
+            email (str): User email.
         """
-        return self._run("read_user_roles", read_user_roles.read_user_roles, email)
+        return self._run("read_user_roles", _legacy("read_user_roles:read_user_roles"), email)
 
-    def get_user_infos(self, email: str):
+    def get_user_infos(self, email: str) -> UserResult:
         """
-        Return and print user information (DN, uid, cn, mail, memberOf).
+        Return user information (DN, uid, cn, mail, memberOf) as a :class:`UserResult`.
 
         Args:
             email (str): User email.
         """
-        return self._run("get_user_infos", get_user_infos.get_user_infos, email)
+        return self._run("get_user_infos", _legacy("get_user_infos:get_user_infos"), email)
+
+    def get_users_infos(self, keys: Iterable[str], by: str | None = None) -> dict:
+        """
+        Look many users up in a few searches; return ``{key: UserResult}``.
+
+        Emails and uids are matched with chunked ``(|(mail=a)(mail=b)...)``
+        searches whose size is tuned from the server's answer times and
+        limits; each record carries the DN, uid, cn, mail, ``memberOf``
+        groups, role CNs, organization CN and pending state. Keys matching no
+        user get a ``not_found`` result. The lookup cache, when enabled, is
+        filled for the single-user actions that follow.
+
+        Args:
+            keys (Iterable[str]): Emails, uids or user DNs.
+            by (str | None): ``mail``, ``uid`` or ``dn`` when the keys are all
+                of one kind; guessed per key otherwise.
+        """
+        from georchestra_ldap.lookup import ChunkSizer, get_users_infos
 
-    def get_role_infos(self, role_cn: str):
+        if self._lookup_sizer is None:
+            self._lookup_sizer = ChunkSizer()
+        with self._action("get_users_infos"):
+            with self._pool_for("get_users_infos").connection() as conn:
+                return get_users_infos(conn, self.settings, keys, by=by, sizer=self._lookup_sizer, cache=self.cache)
+
+    def get_role_infos(self, role_cn: str) -> GroupResult:
         """
-        Return and print role information (DN, cn, description, members).
+        Return role information (DN, cn, description, members) as a :class:`GroupResult`.
 
         Args:
             role_cn (str): Common name of the role.
         """
-        return self._run("get_role_infos", get_role_infos.get_role_infos, role_cn)
+        return self._run("get_role_infos", _legacy("get_role_infos:get_role_infos"), role_cn)
 
-    def get_user_roles(self, email: str):
+    def get_user_roles(self, email: str) -> UserResult:
         """
-        Return and print the list of role CNs for a given user email.
+        Return the role CNs of a given user email (``result.roles``).
 
         Args:
             email (str): User email.
         """
-        return self._run("get_user_roles", get_user_roles.get_user_roles, email)
+        return self._run("get_user_roles", _legacy("get_user_roles:get_user_roles"), email)
 
-    def get_user_org(self, email: str):
+    def get_user_org(self, email: str) -> UserResult:
         """
-        Return and print the organization CN for a given user email.
+        Return the organization CN of a given user email (``result.org``).
 
         Args:
             email (str): User email.
         """
-        return self._run("get_user_org", get_user_org.get_user_org, email)
+        return self._run("get_user_org", _legacy("get_user_org:get_user_org"), email)
 
     def role_exists(self, role_cn: str) -> bool:
         """
@@ -243,16 +691,94 @@ class GeorchestraLdapClient:
         Args:
             role_cn (str): Common name of the role to check.
         """
-        return self._run("role_exists", role_exist.role_exists, role_cn)
+        return bool(self._run("role_exists", _legacy("role_exist:role_exists"), role_cn))
+
+    def get_role_users(self, role_cn: str) -> GroupResult:
+        """
+        Return the members (DNs) of a role (``result.members``).
+
+        Args:
+            role_cn (str): Common name of the role.
+        """
+        return self._run("get_role_users", _legacy("get_role_users:get_role_users"), role_cn)
+
+    def iter_role_members(self, role_cn: str) -> Iterator[str]:
+        """
+        Yield the member DNs of a role without loading the whole list, using
+        ranged retrieval (``member;range=...``) when the server caps values.
+        A pooled connection is held until the generator is exhausted or closed.
+
+        Args:
+            role_cn (str): Common name of the role.
+        """
+        from georchestra_ldap.membership import iter_members
+
+        logger.info("Running action: %s", "iter_role_members")
+        with self._pool_for("iter_role_members").connection() as conn:
+            yield from iter_members(conn, f"cn={role_cn},{self.settings.roles_base_dn}")
+
+    def set_role_members(self, role_cn: str, member_dns: Iterable[str], chunk_size: int = 1000) -> MembershipChange:
+        """
+        Make the members of a role exactly ``member_dns``.
+
+        The current members are read once and only the difference is written,
+        in one modify (or a few chunked ones for large diffs).
+
+        Args:
+            role_cn (str): Common name of the role.
+            member_dns (Iterable[str]): User DNs the role must contain.
+            chunk_size (int): Maximum number of values per modify operation.
+        """
+        from georchestra_ldap.membership import set_members
+
+        with self._action("set_role_members"), self._invalidating(memberships=True):
+            with self.pool.connection() as conn:
+                return set_members(conn, f"cn={role_cn},{self.settings.roles_base_dn}", member_dns, chunk_size)
+
+    def _change_members(self, action_name: str, group_dn: str, emails: Iterable[str], add: bool,
+                        chunk_size: int, exclusive_base: str | None = None) -> BatchMembershipResult:
+        from ldap3 import MODIFY_ADD, MODIFY_DELETE
+
+        from georchestra_ldap.membership import change_members
+
+        with self._action(action_name), self._invalidating(memberships=True):
+            with self.pool.connection() as conn:
+                return change_members(
+                    conn, self.settings, group_dn, emails, MODIFY_ADD if add else MODIFY_DELETE,
+                    chunk_size=chunk_size, exclusive_base=exclusive_base,
+                )
+
+    def add_users_to_role(self, role_cn: str, emails: Iterable[str], chunk_size: int = 1000) -> BatchMembershipResult:
+        """
+        Add many users, given by email, to a role.
+
+        The emails are resolved with a few OR-filter searches, users already
+        in the role are skipped and the others are added in multi-value
+        modifies of at most ``chunk_size`` values.
+
+        Args:
+            role_cn (str): Common name of the role.
+            emails (Iterable[str]): Emails of the users.
+            chunk_size (int): Maximum number of values per modify operation.
+
+        Returns:
+            BatchMembershipResult: ``outcomes`` maps each email to ``added``,
+            ``unchanged``, ``not_found`` or ``error``.
+        """
+        group_dn = f"cn={role_cn},{self.settings.roles_base_dn}"
+        return self._change_members("add_users_to_role", group_dn, emails, True, chunk_size)
 
-    def get_role_users(self, role_cn: str):
+    def remove_users_from_role(self, role_cn: str, emails: Iterable[str], chunk_size: int = 1000) -> BatchMembershipResult:
         """
-        Return and print the members (DNs) of a role.
+        Remove many users, given by email, from a role (see :meth:`add_users_to_role`).
 
         Args:
             role_cn (str): Common name of the role.
+            emails (Iterable[str]): Emails of the users.
+            chunk_size (int): Maximum number of values per modify operation.
         """
-        return self._run("get_role_users", get_role_users.get_role_users, role_cn)
+        group_dn = f"cn={role_cn},{self.settings.roles_base_dn}"
+        return self._change_members("remove_users_from_role", group_dn, emails, False, chunk_size)
 
     def org_exists(self, org_cn: str) -> bool:
         """
@@ -261,16 +787,77 @@ class GeorchestraLdapClient:
         Args:
             org_cn (str): Common name of the organization to check.
         """
-        return self._run("org_exists", org_exists.org_exists, org_cn)
+        return bool(self._run("org_exists", _legacy("org_exists:org_exists"), org_cn))
+
+    def get_org_users(self, org_cn: str) -> GroupResult:
+        """
+        Return the members (DNs) of an organization (``result.members``).
+
+        Args:
+            org_cn (str): Common name of the organization.
+        """
+        return self._run("get_org_users", _legacy("get_org_users:get_org_users"), org_cn)
+
+    def iter_org_members(self, org_cn: str) -> Iterator[str]:
+        """
+        Yield the member DNs of an organization without loading the whole list
+        (see :meth:`iter_role_members`).
+
+        Args:
+            org_cn (str): Common name of the organization.
+        """
+        from georchestra_ldap.membership import iter_members
+
+        logger.info("Running action: %s", "iter_org_members")
+        with self._pool_for("iter_org_members").connection() as conn:
+            yield from iter_members(conn, f"cn={org_cn},{self.settings.orgs_base_dn}")
+
+    def set_org_members(self, org_cn: str, member_dns: Iterable[str], chunk_size: int = 1000) -> MembershipChange:
+        """
+        Make the members of an organization exactly ``member_dns`` (see
+        :meth:`set_role_members`).
+
+        Args:
+            org_cn (str): Common name of the organization.
+            member_dns (Iterable[str]): User DNs the organization must contain.
+            chunk_size (int): Maximum number of values per modify operation.
+        """
+        from georchestra_ldap.membership import set_members
+
+        with self._action("set_org_members"), self._invalidating(memberships=True):
+            with self.pool.connection() as conn:
+                return set_members(conn, f"cn={org_cn},{self.settings.orgs_base_dn}", member_dns, chunk_size)
+
+    def add_users_to_org(self, org_cn: str, emails: Iterable[str], chunk_size: int = 1000) -> BatchMembershipResult:
+        """
+        Move many users, given by email, to an organization (see
+        :meth:`add_users_to_role`).
+
+        Like :meth:`add_user_org`, the users are first removed from their
+        other organizations; a user that cannot be removed from one is
+        reported as ``error`` and not added.
+
+        Args:
+            org_cn (str): Common name of the organization.
+            emails (Iterable[str]): Emails of the users.
+            chunk_size (int): Maximum number of values per modify operation.
+        """
+        group_dn = f"cn={org_cn},{self.settings.orgs_base_dn}"
+        return self._change_members(
+            "add_users_to_org", group_dn, emails, True, chunk_size, exclusive_base=self.settings.orgs_base_dn
+        )
 
-    def get_org_users(self, org_cn: str):
+    def remove_users_from_org(self, org_cn: str, emails: Iterable[str], chunk_size: int = 1000) -> BatchMembershipResult:
         """
-        Return and print the members (DNs) of an organization.
+        Remove many users, given by email, from an organization (see :meth:`add_users_to_role`).
 
         Args:
             org_cn (str): Common name of the organization.
+            emails (Iterable[str]): Emails of the users.
+            chunk_size (int): Maximum number of values per modify operation.
         """
-        return self._run("get_org_users", get_org_users.get_org_users, org_cn)
+        group_dn = f"cn={org_cn},{self.settings.orgs_base_dn}"
+        return self._change_members("remove_users_from_org", group_dn, emails, False, chunk_size)
 
     def user_is_pending(self, email: str) -> bool:
         """
@@ -279,4 +866,4 @@ class GeorchestraLdapClient:
         Args:
             email (str): User email.
         """
-        return self._run("user_is_pending", user_is_pending.user_is_pending, email)
+        return bool(self._run("user_is_pending", _legacy("user_is_pending:user_pending_status"), email).pending)
@@ -1,7 +1,13 @@
 from __future__ import annotations
 
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Callable
+
+
+def _list_env(name: str) -> list:
+    value = os.getenv(name) or ""
+    return [item.strip() for item in value.split(",") if item.strip()]
 
 
 def _bool_env(name: str, default: bool) -> bool:
@@ -33,6 +39,21 @@ class LdapSettings:
     mail_attribute: str = "mail"
     default_role_cn: str = "USER"
     default_org_cn: str = "C2C"
+    pool_size: int = 5
+    pool_timeout: float = 30.0
+    pool_max_idle: float = 60.0
+    schema_cache_path: str | None = None
+    schema_cache_ttl: float = 3600.0
+    cache_size: int = 0
+    cache_ttl: float = 300.0
+    metrics: bool = False
+    password_scheme: str = "ssha"
+    password_hasher: Callable[[str], str] | None = field(default=None, repr=False)
+    hash_workers: int = 1
+    sync_cookie_path: str | None = None
+    read_servers: list = field(default_factory=list)
+    read_strategy: str = "round_robin"
+    read_your_writes: float = 0.0
 
     @classmethod
     def from_env(cls) -> "LdapSettings":
@@ -44,6 +65,20 @@ class LdapSettings:
         ``LDAP_PASSWORD``, ``LDAP_USERS_DN``, ``LDAP_PENDING_USERS_DN``,
         ``LDAP_ORG_DN``, ``LDAP_ROLE_DN``, ``LDAP_SEARCH_BASE``,
         ``LDAP_MAIL_ATTRIBUTE``, ``LDAP_DEFAULT_ROLE_CN``, ``LDAP_DEFAULT_ORG_CN``.
+
+        Connection pool tuning: ``LDAP_POOL_SIZE``, ``LDAP_POOL_TIMEOUT``,
+        ``LDAP_POOL_MAX_IDLE``. Server info/schema cache: ``LDAP_SCHEMA_CACHE``
+        (JSON file path), ``LDAP_SCHEMA_CACHE_TTL`` (seconds). User lookup
+        cache: ``LDAP_CACHE_SIZE`` (0 disables it), ``LDAP_CACHE_TTL`` (seconds).
+        Per-action/operation metrics: ``LDAP_METRICS``. Password hashing:
+        ``LDAP_PASSWORD_SCHEME`` (see ``georchestra_ldap.hashing.SCHEMES``),
+        ``LDAP_HASH_WORKERS`` (processes hashing bulk imports, 0 = one per CPU).
+        Change feed: ``LDAP_SYNC_COOKIES`` (JSON file keeping the sync cookies).
+        Read replicas: ``LDAP_READ_SERVERS`` (comma separated URLs; ``LDAP_SERVER``
+        stays the master every write goes to), ``LDAP_READ_STRATEGY``
+        (``round_robin`` or ``latency``), ``LDAP_READ_YOUR_WRITES`` (seconds
+        reads stay on the master after a write of the same client).
+        A custom ``password_hasher`` callable can only be set in code.
         """
 
         return cls(
@@ -60,6 +95,20 @@ class LdapSettings:
             mail_attribute=os.getenv("LDAP_MAIL_ATTRIBUTE", cls.mail_attribute),
             default_role_cn=os.getenv("LDAP_DEFAULT_ROLE_CN", cls.default_role_cn),
             default_org_cn=os.getenv("LDAP_DEFAULT_ORG_CN", cls.default_org_cn),
+            pool_size=int(os.getenv("LDAP_POOL_SIZE", cls.pool_size)),
+            pool_timeout=float(os.getenv("LDAP_POOL_TIMEOUT", cls.pool_timeout)),
+            pool_max_idle=float(os.getenv("LDAP_POOL_MAX_IDLE", cls.pool_max_idle)),
+            schema_cache_path=os.getenv("LDAP_SCHEMA_CACHE") or cls.schema_cache_path,
+            schema_cache_ttl=float(os.getenv("LDAP_SCHEMA_CACHE_TTL", cls.schema_cache_ttl)),
+            cache_size=int(os.getenv("LDAP_CACHE_SIZE", cls.cache_size)),
+            cache_ttl=float(os.getenv("LDAP_CACHE_TTL", cls.cache_ttl)),
+            metrics=_bool_env("LDAP_METRICS", cls.metrics),
+            password_scheme=os.getenv("LDAP_PASSWORD_SCHEME", cls.password_scheme),
+            hash_workers=int(os.getenv("LDAP_HASH_WORKERS", cls.hash_workers)),
+            sync_cookie_path=os.getenv("LDAP_SYNC_COOKIES") or cls.sync_cookie_path,
+            read_servers=_list_env("LDAP_READ_SERVERS"),
+            read_strategy=os.getenv("LDAP_READ_STRATEGY", cls.read_strategy),
+            read_your_writes=float(os.getenv("LDAP_READ_YOUR_WRITES", cls.read_your_writes)),
         )
 
     @property
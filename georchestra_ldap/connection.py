@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+from ldap3 import BASE, SYNC, Connection
+from ldap3.core.exceptions import LDAPCommunicationError, LDAPException
+
+from georchestra_ldap.config import LdapSettings
+from georchestra_ldap.errors import PoolTimeout
+from georchestra_ldap.metrics import MetricsRegistry
+from georchestra_ldap.schema_cache import get_server
+
+logger = logging.getLogger(__name__)
+
+
+def open_connection(settings: LdapSettings, collect_usage: bool = False, client_strategy: str = SYNC) -> Connection:
+    """
+    Open and bind a new ldap3 Connection from :class:`LdapSettings`, reusing
+    the cached server info and schema (see :func:`get_server`).
+
+    Args:
+        settings (LdapSettings): Connection parameters.
+        collect_usage (bool): Keep ldap3 usage statistics (bytes, operations) on the connection.
+        client_strategy (str): ldap3 strategy, e.g. ``ASYNC_STREAM`` for the change feed.
+    """
+    return Connection(
+        get_server(settings), user=settings.user_dn, password=settings.password,
+        auto_bind=True, collect_usage=collect_usage, client_strategy=client_strategy,
+    )
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of bound ldap3 connections.
+
+    Connections are opened lazily up to ``size``. A connection idle for more
+    than ``max_idle`` seconds is probed with a cheap root DSE read before being
+    handed out, and is transparently replaced if the probe fails or if it was
+    closed by the server.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Connection],
+        size: int = 5,
+        timeout: float | None = 30.0,
+        max_idle: float = 60.0,
+    ):
+        if size < 1:
+            raise ValueError("Pool size must be at least 1.")
+        self._factory = factory
+        self.size = size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self._idle: list[tuple[Connection, float]] = []
+        self._opened = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    @classmethod
+    def from_settings(cls, settings: LdapSettings, metrics: MetricsRegistry | None = None) -> "ConnectionPool":
+        """
+        Build a pool whose connections are opened with :func:`open_connection`.
+
+        Args:
+            settings (LdapSettings): Connection and pool parameters.
+            metrics (MetricsRegistry | None): Registry recording every operation of the pooled connections.
+        """
+        if metrics is None:
+            factory = lambda: open_connection(settings)  # noqa: E731
+        else:
+            factory = lambda: metrics.instrument(open_connection(settings, collect_usage=True))  # noqa: E731
+        return cls(
+            factory,
+            size=settings.pool_size,
+            timeout=settings.pool_timeout,
+            max_idle=settings.pool_max_idle,
+        )
+
+    def _checkout(self) -> tuple[Connection | None, float]:
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed.")
+                if self._idle:
+                    return self._idle.pop()
+                if self._opened < self.size:
+                    # Reserve the slot now, open the socket outside the lock.
+                    self._opened += 1
+                    return None, 0.0
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise PoolTimeout(f"No LDAP connection available after {self.timeout}s.")
+                self._cond.wait(remaining)
+
+    def _is_healthy(self, conn: Connection, idle_since: float) -> bool:
+        if conn.closed or not conn.bound:
+            return False
+        if time.monotonic() - idle_since < self.max_idle:
+            return True
+        try:
+            return conn.search("", "(objectClass=*)", search_scope=BASE, attributes=["1.1"])
+        except LDAPException:
+            return False
+
+    def acquire(self) -> Connection:
+        """
+        Return a healthy bound connection, opening or reconnecting as needed.
+        Blocks up to ``timeout`` seconds when every connection is in use.
+        """
+        conn, idle_since = self._checkout()
+        try:
+            if conn is not None and self._is_healthy(conn, idle_since):
+                return conn
+            if conn is not None:
+                logger.info("Replacing stale LDAP connection")
+                _safe_unbind(conn)
+            return self._factory()
+        except BaseException:
+            self._forget()
+            raise
+
+    def release(self, conn: Connection, discard: bool = False) -> None:
+        """
+        Give a connection back to the pool.
+
+        Args:
+            conn (Connection): Connection obtained from :meth:`acquire`.
+            discard (bool): Close it instead of keeping it (e.g. after a socket error).
+        """
+        with self._cond:
+            if not discard and not self._closed and not conn.closed:
+                self._idle.append((conn, time.monotonic()))
+                self._cond.notify()
+                return
+        _safe_unbind(conn)
+        self._forget()
+
+    def _forget(self) -> None:
+        with self._cond:
+            self._opened -= 1
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self) -> Iterator[Connection]:
+        """
+        Borrow a connection for the duration of a ``with`` block.
+        """
+        conn = self.acquire()
+        discard = False
+        try:
+            yield conn
+        except LDAPCommunicationError:
+            discard = True
+            raise
+        finally:
+            self.release(conn, discard=discard)
+
+    def close(self) -> None:
+        """
+        Unbind idle connections; connections still borrowed are closed on release.
+        """
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._opened -= len(idle)
+            self._cond.notify_all()
+        for conn, _ in idle:
+            _safe_unbind(conn)
+
+
+def _safe_unbind(conn: Connection) -> None:
+    try:
+        conn.unbind()
+    except LDAPException:
+        pass
@@ -4,3 +4,15 @@ class LegacyConfigMissing(RuntimeError):
 
 class LegacyScriptsMissing(RuntimeError):
     """Raised when the ``ldap_actions`` package cannot be imported."""
+
+
+class PoolTimeout(RuntimeError):
+    """Raised when no pooled LDAP connection becomes available in time."""
+
+
+class PasswordSchemeUnavailable(RuntimeError):
+    """Raised when a password scheme needs an optional package that is not installed."""
+
+
+class ChangeFeedUnavailable(RuntimeError):
+    """Raised when the server does not support LDAP Content Synchronization (syncprov)."""
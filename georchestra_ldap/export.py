@@ -0,0 +1,210 @@
+from __future__ import annotations
+
+import base64
+import gzip
+import io
+import json
+import logging
+import os
+import sys
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import IO, Iterable, Iterator
+
+from ldap3 import SUBTREE
+
+from georchestra_ldap.config import LdapSettings
+from georchestra_ldap.connection import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("ldif", "jsonl")
+TARGETS = ("users", "pending_users", "roles", "orgs")
+
+# LDIF lines longer than this are folded (RFC 2849).
+_LDIF_WIDTH = 76
+
+
+@dataclass
+class ExportReport:
+    """
+    Outcome of :func:`export_entries`.
+
+    Attributes:
+        counts (dict): Target name -> entries written.
+    """
+
+    counts: dict = field(default_factory=dict)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+
+def target_bases(settings: LdapSettings, targets: Iterable[str] | None = None) -> list:
+    """
+    Return ``(target, base DN)`` pairs for the requested targets (all by default).
+
+    Raises:
+        ValueError: Unknown target name.
+    """
+    bases = {
+        "users": settings.users_base_dn,
+        "pending_users": settings.pending_users_base_dn,
+        "roles": settings.roles_base_dn,
+        "orgs": settings.orgs_base_dn,
+    }
+    targets = list(targets or TARGETS)
+    unknown = [target for target in targets if target not in bases]
+    if unknown:
+        raise ValueError(f"Unknown export target(s): {', '.join(unknown)}")
+    return [(target, bases[target]) for target in targets]
+
+
+def _ldif_safe(value: str) -> bool:
+    # SAFE-STRING of RFC 2849, plus no trailing space (it would be lost).
+    if not value:
+        return True
+    if value[0] in " :<" or value[-1] == " ":
+        return False
+    return all(0 < ord(char) < 128 and char not in "\r\n" for char in value)
+
+
+def _ldif_line(name: str, value: bytes) -> str:
+    try:
+        text = value.decode("utf-8")
+    except UnicodeDecodeError:
+        text = None
+    if text is not None and _ldif_safe(text):
+        line = f"{name}: {text}"
+    else:
+        line = f"{name}:: {base64.b64encode(value).decode('ascii')}"
+    if len(line) <= _LDIF_WIDTH:
+        return line + "\n"
+    parts = [line[:_LDIF_WIDTH]]
+    parts += [" " + line[i:i + _LDIF_WIDTH - 1] for i in range(_LDIF_WIDTH, len(line), _LDIF_WIDTH - 1)]
+    return "\n".join(parts) + "\n"
+
+
+def format_ldif(dn: str, attributes: dict) -> str:
+    """
+    Render one entry (``attributes``: name -> list of raw bytes values) as an
+    LDIF record, base64-encoding unsafe values and folding long lines.
+    """
+    lines = [_ldif_line("dn", dn.encode("utf-8"))]
+    for name, values in attributes.items():
+        lines.extend(_ldif_line(name, value) for value in values)
+    return "".join(lines) + "\n"
+
+
+def format_jsonl(dn: str, attributes: dict, target: str) -> str:
+    """
+    Render one entry as a JSON line: ``{"dn", "target", "attributes"}``;
+    values that are not valid UTF-8 go, base64-encoded, under ``"binary"``.
+    """
+    text, binary = {}, {}
+    for name, values in attributes.items():
+        for value in values:
+            try:
+                decoded = value.decode("utf-8")
+            except UnicodeDecodeError:
+                binary.setdefault(name, []).append(base64.b64encode(value).decode("ascii"))
+            else:
+                text.setdefault(name, []).append(decoded)
+    record = {"dn": dn, "target": target, "attributes": text}
+    if binary:
+        record["binary"] = binary
+    return json.dumps(record, ensure_ascii=False) + "\n"
+
+
+@contextmanager
+def _open_destination(destination, compress: bool) -> Iterator[IO[str]]:
+    if isinstance(destination, (str, os.PathLike)) and os.fspath(destination) != "-":
+        path = os.fspath(destination)
+        if compress:
+            with gzip.open(path, "wt", encoding="utf-8", newline="\n") as stream:
+                yield stream
+        else:
+            with open(path, "w", encoding="utf-8", newline="\n") as stream:
+                yield stream
+        return
+    stream = sys.stdout if destination in (None, "-") else destination
+    if not compress:
+        yield stream
+        return
+    # gzip needs a binary stream: stdout's buffer, or the stream itself.
+    raw = getattr(stream, "buffer", stream)
+    with gzip.GzipFile(fileobj=raw, mode="wb") as compressed:
+        text = io.TextIOWrapper(compressed, encoding="utf-8", newline="\n")
+        try:
+            yield text
+        finally:
+            text.flush()
+            text.detach()
+
+
+def export_entries(
+    pool: ConnectionPool,
+    settings: LdapSettings,
+    destination=None,
+    format: str = "ldif",
+    targets: Iterable[str] | None = None,
+    attributes: Iterable[str] | None = None,
+    compress: bool | None = None,
+    page_size: int = 500,
+) -> ExportReport:
+    """
+    Stream the users, pending users, roles and orgs branches to an LDIF or
+    JSON lines file.
+
+    Each branch is read with a paged search consumed as a generator and
+    every entry is written as soon as it is received, so memory stays
+    bounded by one page whatever the directory size. Values are exported
+    raw (as stored on the server); the branch entries themselves
+    (``ou=users``...) are not exported.
+
+    Args:
+        pool (ConnectionPool): Pool lending the connection used for the export.
+        settings (LdapSettings): Directory layout.
+        destination: Path, ``"-"``/None for stdout, or an open stream (text,
+            or binary when compressing).
+        format (str): ``"ldif"`` or ``"jsonl"``.
+        targets (Iterable[str] | None): Subset of ``users``, ``pending_users``,
+            ``roles``, ``orgs``; all by default.
+        attributes (Iterable[str] | None): Attributes to export; all user
+            attributes (``*``) by default, ``+`` adds the operational ones.
+        compress (bool | None): Gzip the output; defaults to True for paths ending in ``.gz``.
+        page_size (int): Entries per page of the paged searches.
+
+    Raises:
+        ValueError: Unknown format or target.
+    """
+    format = format.lower()
+    if format not in FORMATS:
+        raise ValueError(f"Unsupported export format: {format}")
+    bases = target_bases(settings, targets)
+    attributes = list(attributes) if attributes else ["*"]
+    if compress is None:
+        compress = isinstance(destination, (str, os.PathLike)) and os.fspath(destination).endswith(".gz")
+
+    report = ExportReport()
+    with _open_destination(destination, compress) as stream, pool.connection() as conn:
+        if format == "ldif":
+            stream.write("version: 1\n\n")
+        for target, base in bases:
+            count = 0
+            for entry in conn.extend.standard.paged_search(
+                base, "(objectClass=*)", search_scope=SUBTREE, attributes=attributes,
+                paged_size=page_size, generator=True,
+            ):
+                if entry.get("type") != "searchResEntry" or entry["dn"].lower() == base.lower():
+                    continue
+                raw = entry.get("raw_attributes", {})
+                if format == "ldif":
+                    stream.write(format_ldif(entry["dn"], raw))
+                else:
+                    stream.write(format_jsonl(entry["dn"], raw, target))
+                count += 1
+            report.counts[target] = count
+            logger.info("Exported %d entries from %s", count, base)
+    return report
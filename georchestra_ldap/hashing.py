@@ -0,0 +1,123 @@
+"""
+Password hashing schemes for ``userPassword`` values.
+
+A hasher is any ``callable(password) -> str`` returning the stored value
+with its ``{SCHEME}`` prefix. Built-in schemes are selected by name with
+``LdapSettings.password_scheme``; a custom hasher can be set with
+``LdapSettings.password_hasher``. Batches are hashed in a process pool by
+:func:`hash_passwords`, which is worth it for the costly schemes (PBKDF2,
+Argon2); the hasher must then be picklable (a module level function or a
+``functools.partial`` of one, e.g. ``partial(pbkdf2_sha512, rounds=50000)``).
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import os
+from concurrent.futures import Executor
+from typing import Callable, Sequence
+
+from georchestra_ldap.config import LdapSettings
+from georchestra_ldap.errors import PasswordSchemeUnavailable
+
+Hasher = Callable[[str], str]
+
+# Default PBKDF2 iteration counts (OWASP recommendations).
+PBKDF2_ROUNDS = {"sha256": 600_000, "sha512": 210_000}
+
+
+def _salted_digest(name: str, label: str, password: str, salt_size: int) -> str:
+    salt = os.urandom(salt_size)
+    digest = hashlib.new(name, password.encode("utf-8") + salt).digest()
+    return "{" + label + "}" + base64.b64encode(digest + salt).decode()
+
+
+def ssha(password: str) -> str:
+    """Salted SHA-1 (``{SSHA}``), the historical scheme."""
+    return _salted_digest("sha1", "SSHA", password, 4)
+
+
+def ssha256(password: str) -> str:
+    """Salted SHA-256 (``{SSHA256}``)."""
+    return _salted_digest("sha256", "SSHA256", password, 8)
+
+
+def ssha512(password: str) -> str:
+    """Salted SHA-512 (``{SSHA512}``)."""
+    return _salted_digest("sha512", "SSHA512", password, 8)
+
+
+def _ab64(raw: bytes) -> str:
+    # "Adapted" base64 of the OpenLDAP pw-pbkdf2 module: "." for "+", no padding.
+    return base64.b64encode(raw).decode().rstrip("=").replace("+", ".")
+
+
+def _pbkdf2(name: str, password: str, rounds: int | None) -> str:
+    rounds = rounds or PBKDF2_ROUNDS[name]
+    salt = os.urandom(16)
+    digest = hashlib.pbkdf2_hmac(name, password.encode("utf-8"), salt, rounds)
+    return f"{{PBKDF2-{name.upper()}}}{rounds}${_ab64(salt)}${_ab64(digest)}"
+
+
+def pbkdf2_sha256(password: str, rounds: int | None = None) -> str:
+    """PBKDF2-HMAC-SHA256 (``{PBKDF2-SHA256}``, OpenLDAP pw-pbkdf2 format)."""
+    return _pbkdf2("sha256", password, rounds)
+
+
+def pbkdf2_sha512(password: str, rounds: int | None = None) -> str:
+    """PBKDF2-HMAC-SHA512 (``{PBKDF2-SHA512}``, OpenLDAP pw-pbkdf2 format)."""
+    return _pbkdf2("sha512", password, rounds)
+
+
+def argon2(password: str) -> str:
+    """
+    Argon2id (``{ARGON2}``, OpenLDAP argon2 module format). Needs the
+    optional ``argon2-cffi`` package (``pip install georchestra-ldap-py[argon2]``).
+    """
+    try:
+        from argon2 import PasswordHasher
+    except ImportError as exc:
+        raise PasswordSchemeUnavailable("The argon2 scheme needs the argon2-cffi package.") from exc
+    return "{ARGON2}" + PasswordHasher().hash(password)
+
+
+SCHEMES = {
+    "ssha": ssha,
+    "ssha256": ssha256,
+    "ssha512": ssha512,
+    "pbkdf2-sha256": pbkdf2_sha256,
+    "pbkdf2-sha512": pbkdf2_sha512,
+    "argon2": argon2,
+}
+
+
+def get_hasher(settings: LdapSettings | str | None = None) -> Hasher:
+    """
+    Return the hasher configured by ``settings`` (its ``password_hasher``,
+    else its ``password_scheme``), or the one of a scheme name.
+
+    Raises:
+        ValueError: Unknown scheme name.
+    """
+    if isinstance(settings, LdapSettings):
+        if settings.password_hasher is not None:
+            return settings.password_hasher
+        settings = settings.password_scheme
+    name = (settings or "ssha").lower()
+    try:
+        return SCHEMES[name]
+    except KeyError:
+        raise ValueError(f"Unsupported password scheme: {name}") from None
+
+
+def hash_passwords(passwords: Sequence[str], hasher: Hasher, executor: Executor | None = None,
+                   chunksize: int = 8) -> list:
+    """
+    Hash ``passwords`` in order, in ``executor`` (typically a
+    ``ProcessPoolExecutor``; ``chunksize`` passwords are sent per task)
+    when given, else inline.
+    """
+    if executor is None or len(passwords) < 2:
+        return [hasher(password) for password in passwords]
+    return list(executor.map(hasher, passwords, chunksize=chunksize))
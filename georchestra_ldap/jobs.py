@@ -0,0 +1,331 @@
+"""
+Sharded bulk jobs: huge imports, mass role/org changes, moderations and
+mass deletes run over a pool of worker processes.
+
+The input is cut into batches of ``batch_size`` items, numbered in input
+order, and the batches are spread over the processes; each process has its
+own :class:`GeorchestraLdapClient` (so its own connection pool) and spends
+its own CPU on entry encoding and password hashing. The parent reads the
+input, keeps a bounded number of batches in flight and records every
+finished batch in a checkpoint journal (see :class:`CheckpointJournal`):
+run again with the same journal, a crashed or interrupted job skips the
+batches already done. A batch that was running during the crash is run
+again; every job tolerates it (existing users are skipped, members already
+in place and moved users are unchanged, deleted users are not found).
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Callable, Iterable, Iterator
+
+from georchestra_ldap.bulk import import_batch, iter_rows
+from georchestra_ldap.client import GeorchestraLdapClient
+from georchestra_ldap.config import LdapSettings
+from ldap_actions.results import NOT_FOUND
+
+logger = logging.getLogger(__name__)
+
+JOBS = (
+    "import_users",
+    "add_users_to_role",
+    "remove_users_from_role",
+    "add_users_to_org",
+    "remove_users_from_org",
+    "delete_users",
+    "moderate_users",
+)
+# Jobs acting on one role or organization (``group_cn``).
+_GROUP_JOBS = {"add_users_to_role", "remove_users_from_role", "add_users_to_org", "remove_users_from_org"}
+
+
+@dataclass
+class JobReport:
+    """
+    Outcome of :func:`run_job`, updated after every batch.
+
+    Attributes:
+        job (str): Job name (see ``JOBS``).
+        counts (dict): Outcome -> number of items (``created``, ``skipped``,
+            ``added``, ``deleted``, ``not_found``, ``failed``...), batches
+            resumed from the journal included.
+        errors (list): ``(item, message)`` for the failed items and batches.
+        items (int): Items processed by this run.
+        batches (int): Batches processed by this run.
+        resumed (int): Batches skipped because the journal had them.
+        elapsed (float): Seconds since this run started.
+    """
+
+    job: str
+    counts: dict = field(default_factory=dict)
+    errors: list = field(default_factory=list)
+    items: int = 0
+    batches: int = 0
+    resumed: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """
+        Items per second processed by this run.
+        """
+        return self.items / self.elapsed if self.elapsed > 0 else 0.0
+
+    def merge(self, counts: dict, errors: list) -> None:
+        for name, value in counts.items():
+            self.counts[name] = self.counts.get(name, 0) + value
+        self.errors.extend(tuple(error) for error in errors)
+
+
+class CheckpointJournal:
+    """
+    Append-only JSON lines file recording the finished batches of a job.
+
+    The first line describes the job (name, parameters, batch size); each
+    following line holds one finished batch: its index, outcome counts and
+    errors. Lines are flushed and synced as they are written, and a line
+    cut by a crash is ignored when the journal is read back.
+
+    Args:
+        path (str): Journal file; created when missing.
+        header (dict): Job description; an existing journal must match it.
+
+    Raises:
+        ValueError: The journal belongs to another job.
+    """
+
+    def __init__(self, path: str, header: dict):
+        self.path = path
+        self.done: dict = {}  # batch index -> (counts, errors)
+        existing = None
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as stream:
+                for line in stream:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if existing is None:
+                        existing = record
+                    elif "batch" in record:
+                        self.done[record["batch"]] = (record.get("counts", {}), record.get("errors", []))
+        # Compared as read back from JSON (tuples become lists, paths strings...).
+        header = json.loads(json.dumps(header, default=str))
+        if existing is not None and existing != header:
+            raise ValueError(f"Journal {path} belongs to another job: {existing}")
+        self._stream = open(path, "a", encoding="utf-8")
+        if existing is None:
+            self._write(header)
+
+    def _write(self, record: dict) -> None:
+        self._stream.write(json.dumps(record, default=str) + "\n")
+        self._stream.flush()
+        os.fsync(self._stream.fileno())
+
+    def record(self, index: int, counts: dict, errors: list) -> None:
+        """
+        Mark batch ``index`` as done.
+        """
+        self.done[index] = (counts, errors)
+        self._write({"batch": index, "counts": counts, "errors": errors})
+
+    def close(self) -> None:
+        self._stream.close()
+
+
+def iter_items(job: str, source, settings: LdapSettings, format: str | None = None, pending: bool = True) -> Iterator:
+    """
+    Yield the items of a job: user rows of a CSV/LDIF file for
+    ``import_users``, emails otherwise (an iterable, or a file with one
+    email per line; blank lines and ``#`` comments are skipped).
+    """
+    if job == "import_users":
+        yield from iter_rows(source, settings, format, pending)
+    elif isinstance(source, (str, os.PathLike)):
+        with open(source, encoding="utf-8") as stream:
+            for line in stream:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    yield line
+    else:
+        yield from source
+
+
+def _count(counts: dict, name: str, value: int = 1) -> None:
+    counts[name] = counts.get(name, 0) + value
+
+
+def run_batch(client: GeorchestraLdapClient, job: str, batch: list, params: dict) -> tuple[dict, list]:
+    """
+    Run one batch of a job with ``client``; return ``(counts, errors)``.
+    """
+    counts: dict = {}
+    errors: list = []
+    if job == "import_users":
+        report = import_batch(client.pool, client.settings, batch)
+        for name in ("created", "skipped", "failed", "memberships"):
+            _count(counts, name, getattr(report, name))
+        errors = [list(error) for error in report.errors]
+    elif job in _GROUP_JOBS:
+        result = getattr(client, job)(params["group_cn"], batch)
+        counts = result.counts
+        errors = [list(error) for error in result.errors]
+    elif job == "moderate_users":
+        report = client.moderate_users(batch, batch_size=len(batch))
+        counts = report.counts
+        _count(counts, "rewritten", report.rewritten)
+        errors = [[key or member_dn, description] for key, member_dn, description in report.errors]
+    elif job == "delete_users":
+        with ThreadPoolExecutor(max_workers=client.settings.pool_size) as executor:
+            for email, result in zip(batch, executor.map(client.delete_user, batch)):
+                _count(counts, result.status)
+                if not result.ok and result.status != NOT_FOUND:
+                    errors.append([email, result.message])
+    else:
+        raise ValueError(f"Unknown job: {job}")
+    return counts, errors
+
+
+# Client of a worker process, opened by _init_worker.
+_worker_client: GeorchestraLdapClient | None = None
+
+
+def _init_worker(settings: LdapSettings) -> None:
+    global _worker_client
+    _worker_client = GeorchestraLdapClient(settings)
+
+
+def _run_in_worker(job: str, batch: list, params: dict) -> tuple[dict, list]:
+    return run_batch(_worker_client, job, batch, params)
+
+
+def run_job(
+    client: GeorchestraLdapClient,
+    job: str,
+    source,
+    group_cn: str | None = None,
+    processes: int | None = None,
+    batch_size: int = 500,
+    journal: str | None = None,
+    format: str | None = None,
+    pending: bool = True,
+    progress: Callable[[JobReport], None] | None = None,
+) -> JobReport:
+    """
+    Run a bulk job over ``processes`` worker processes.
+
+    Args:
+        client (GeorchestraLdapClient): Client whose settings the workers
+            use; with one process the batches run on it directly.
+        job (str): One of ``JOBS``.
+        source: CSV/LDIF path or stream for ``import_users``; emails (or a
+            file of emails, one per line) for the other jobs.
+        group_cn (str | None): Role or organization of the group jobs.
+        processes (int | None): Worker processes; defaults to one per CPU.
+        batch_size (int): Items per batch (the unit of work and of the journal).
+        journal (str | None): Checkpoint journal path; the job resumes from
+            it when it exists.
+        format (str | None): ``csv`` or ``ldif`` for ``import_users``.
+        pending (bool): Import CSV users under pending users.
+        progress (callable | None): Called with the :class:`JobReport` after every batch.
+    """
+    if job not in JOBS:
+        raise ValueError(f"Unknown job: {job}")
+    if job in _GROUP_JOBS and not group_cn:
+        raise ValueError(f"Job {job} needs a group_cn")
+    processes = processes or os.cpu_count() or 1
+    params = {"group_cn": group_cn}
+    header = {
+        "job": job,
+        "source": os.path.abspath(os.fspath(source)) if isinstance(source, (str, os.PathLike)) else None,
+        "group_cn": group_cn,
+        "batch_size": batch_size,
+        "format": format,
+        "pending": pending,
+    }
+    checkpoints = CheckpointJournal(str(journal), header) if journal else None
+    report = JobReport(job)
+    start = time.perf_counter()
+
+    def _finish(index: int, size: int, counts: dict, errors: list) -> None:
+        if checkpoints is not None:
+            checkpoints.record(index, counts, errors)
+        report.merge(counts, errors)
+        report.items += size
+        report.batches += 1
+        report.elapsed = time.perf_counter() - start
+        logger.info(
+            "Job %s: %d items in %d batches, %.1f items/s, %s",
+            job, report.items, report.batches, report.rate, report.counts,
+        )
+        if progress is not None:
+            progress(report)
+
+    def _batches() -> Iterator[tuple[int, list]]:
+        items = iter(iter_items(job, source, client.settings, format, pending))
+        index = -1
+        while True:
+            batch = list(islice(items, batch_size))
+            if not batch:
+                return
+            index += 1
+            if checkpoints is not None and index in checkpoints.done:
+                report.merge(*checkpoints.done[index])
+                report.resumed += 1
+                continue
+            yield index, batch
+
+    try:
+        if processes <= 1:
+            for index, batch in _batches():
+                _finish(index, len(batch), *run_batch(client, job, batch, params))
+        else:
+            _run_sharded(client.settings, job, _batches(), params, processes, _finish, report)
+    finally:
+        if checkpoints is not None:
+            checkpoints.close()
+    report.elapsed = time.perf_counter() - start
+    if report.resumed:
+        logger.info("Job %s: %d batches resumed from %s", job, report.resumed, journal)
+    return report
+
+
+def _run_sharded(settings: LdapSettings, job: str, batches: Iterable, params: dict, processes: int,
+                 finish: Callable, report: JobReport) -> None:
+    # At most two batches per process in flight: the input is read as the
+    # workers go, so memory stays bounded whatever its size.
+    executor = ProcessPoolExecutor(processes, initializer=_init_worker, initargs=(settings,))
+    in_flight: dict = {}
+
+    def _collect(futures) -> None:
+        for future in futures:
+            index, batch = in_flight.pop(future)
+            try:
+                counts, errors = future.result()
+            except Exception as exc:
+                # Not journaled: the batch runs again when the job is resumed.
+                logger.error("Job %s: batch %d failed: %s", job, index, exc)
+                report.merge({"failed": len(batch)}, [(f"batch {index}", str(exc))])
+                continue
+            finish(index, len(batch), counts, errors)
+
+    try:
+        for index, batch in batches:
+            in_flight[executor.submit(_run_in_worker, job, batch, params)] = (index, batch)
+            if len(in_flight) >= processes * 2:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                _collect(done)
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            _collect(done)
+    finally:
+        # On an interrupt the queued batches are dropped; they are not journaled.
+        for future in in_flight:
+            future.cancel()
+        executor.shutdown(wait=True)
@@ -0,0 +1,265 @@
+"""
+Batched user lookups: many users (by email, uid or DN) read in a few searches.
+
+Users are matched with ``(|(mail=a)(mail=b)...)`` filters over the users
+branch, then the pending users branch for the ones still missing. The number
+of values per filter is tuned as the searches run (see :class:`ChunkSizer`).
+Each user comes back as the :class:`UserResult` ``get_user_infos`` would
+build, with its roles and organization split out of ``memberOf``.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Iterable
+
+from ldap3 import BASE, SUBTREE
+from ldap3.utils.conv import escape_filter_chars
+
+from georchestra_ldap.config import LdapSettings
+from georchestra_ldap.membership import normalize_dn
+from ldap_actions.results import ERROR, NOT_FOUND, UserResult
+
+logger = logging.getLogger(__name__)
+
+# Answers of a server refusing a filter or a result set that is too large.
+_TOO_LARGE = {
+    3,  # timeLimitExceeded
+    4,  # sizeLimitExceeded
+    11,  # adminLimitExceeded
+    53,  # unwillingToPerform
+}
+
+LOOKUP_KINDS = ("mail", "uid", "dn")
+
+
+class ChunkSizer:
+    """
+    Number of values put in one OR filter, tuned from the searches it sizes.
+
+    The size doubles while searches answer in less than half of ``target``
+    seconds and halves when one takes longer than ``target`` or is refused
+    by a server limit (size, time or admin limit). It is shared by every
+    lookup of a client, so later pages start from the tuned value.
+
+    Args:
+        initial (int): First chunk size.
+        minimum (int): Smallest chunk size.
+        maximum (int): Largest chunk size.
+        target (float): Wanted duration of one search, in seconds.
+    """
+
+    def __init__(self, initial: int = 50, minimum: int = 1, maximum: int = 500, target: float = 0.25):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target = target
+        self.size = max(minimum, min(initial, maximum))
+        self._lock = threading.Lock()
+
+    def record(self, size: int, seconds: float) -> None:
+        """
+        Adjust the size after a search of ``size`` values took ``seconds``.
+        """
+        with self._lock:
+            if seconds > self.target:
+                self.size = max(self.minimum, min(self.size, size) // 2)
+            elif seconds < self.target / 2 and size >= self.size:
+                self.size = min(self.maximum, self.size * 2)
+
+    def refused(self, size: int) -> int:
+        """
+        Halve the size after a search of ``size`` values was refused; return the new size.
+        """
+        with self._lock:
+            self.size = max(self.minimum, min(self.size, size) // 2)
+            return self.size
+
+
+def _values(attributes: dict, name: str) -> list:
+    value = attributes.get(name)
+    if value is None:
+        return []
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+def _first(attributes: dict, name: str):
+    values = _values(attributes, name)
+    return values[0] if values else None
+
+
+def _rdn_value(dn: str) -> str:
+    return dn.split(",", 1)[0].split("=", 1)[1].strip()
+
+
+def classify(key: str) -> str:
+    """
+    Guess what a lookup key is: ``dn`` (contains ``=``), ``mail`` (contains ``@``) or ``uid``.
+    """
+    if "=" in key:
+        return "dn"
+    return "mail" if "@" in key else "uid"
+
+
+def user_record(settings: LdapSettings, dn: str, attributes: dict) -> UserResult:
+    """
+    Build the :class:`UserResult` of a user entry: main attributes,
+    ``memberOf`` groups, and the role CNs and organization CN among them.
+    """
+    roles_suffix = "," + normalize_dn(settings.roles_base_dn)
+    orgs_suffix = "," + normalize_dn(settings.orgs_base_dn)
+    groups = [str(group) for group in _values(attributes, "memberOf")]
+    roles, org = [], None
+    for group in groups:
+        key = normalize_dn(group)
+        if key.endswith(roles_suffix):
+            roles.append(_rdn_value(group))
+        elif org is None and key.endswith(orgs_suffix):
+            org = _rdn_value(group)
+    return UserResult(
+        "get_users_infos",
+        dn=dn,
+        uid=_first(attributes, "uid"),
+        cn=_first(attributes, "cn"),
+        mail=_first(attributes, settings.mail_attribute),
+        roles=roles,
+        org=org,
+        groups=groups,
+        pending=normalize_dn(dn).endswith("," + normalize_dn(settings.pending_users_base_dn)),
+    )
+
+
+class _Batch:
+    """
+    State of one :func:`get_users_infos` call: the keys still to find per
+    attribute, and the records found so far.
+    """
+
+    def __init__(self, settings: LdapSettings):
+        self.settings = settings
+        self.wanted = {"mail": {}, "uid": {}}  # attribute kind -> lowered value -> requested keys
+        self.dn_checks: dict = {}  # requested key -> normalized DN it must match
+        self.records: dict = {}
+        self.failed: dict = {}  # requested key -> description of the search that failed on it
+
+    def want(self, kind: str, value: str, key: str) -> None:
+        self.wanted[kind].setdefault(value.lower(), []).append(key)
+
+    def fail(self, kind: str, values: list, description: str) -> None:
+        for value in values:
+            for key in self.wanted[kind].get(value, ()):
+                self.failed[key] = description
+
+    def accept(self, kind: str, entry: dict) -> None:
+        attributes = entry["attributes"]
+        name = self.settings.mail_attribute if kind == "mail" else "uid"
+        for value in _values(attributes, name):
+            for key in self.wanted[kind].pop(str(value).lower(), ()):
+                expected = self.dn_checks.get(key)
+                if expected is not None and expected != normalize_dn(entry["dn"]):
+                    # Same uid elsewhere: not the requested DN.
+                    self.wanted[kind].setdefault(str(value).lower(), []).append(key)
+                    continue
+                self.records[key] = user_record(self.settings, entry["dn"], attributes)
+
+
+def _search_chunk(conn, base: str, kind: str, values: list, batch: _Batch, sizer: ChunkSizer, attributes: list) -> None:
+    name = batch.settings.mail_attribute if kind == "mail" else "uid"
+    clauses = "".join(f"({name}={escape_filter_chars(value)})" for value in values)
+    start = time.perf_counter()
+    conn.search(base, f"(|{clauses})", search_scope=SUBTREE, attributes=attributes)
+    code = conn.result.get("result")
+    if code in _TOO_LARGE and len(values) > 1:
+        size = sizer.refused(len(values))
+        logger.info("Lookup of %s values refused (%s), retrying by %s", len(values), conn.result.get("description"), size)
+        for start_index in range(0, len(values), size):
+            _search_chunk(conn, base, kind, values[start_index:start_index + size], batch, sizer, attributes)
+        return
+    sizer.record(len(values), time.perf_counter() - start)
+    if code not in (0, 32) and code is not None:
+        # Reported as errors by the caller unless found in another branch.
+        logger.warning("User lookup failed on %s: %s", base, conn.result.get("description"))
+        batch.fail(kind, values, conn.result.get("description"))
+    for entry in conn.response or ():
+        if entry.get("type") == "searchResEntry":
+            batch.accept(kind, entry)
+
+
+def get_users_infos(
+    conn,
+    settings: LdapSettings,
+    keys: Iterable[str],
+    by: str | None = None,
+    sizer: ChunkSizer | None = None,
+    cache=None,
+) -> dict:
+    """
+    Look many users up at once; return ``{key: UserResult}`` in the order of ``keys``.
+
+    Emails and uids are matched with chunked OR-filter searches, in the users
+    branch first and then in the pending users branch. DNs of the user
+    branches (``uid=...,ou=users,...``) go through the uid searches; other
+    DNs are read directly. Keys that match no user get a ``not_found`` result.
+
+    Args:
+        conn: Bound ldap3 connection (synchronous strategy).
+        settings (LdapSettings): Directory layout.
+        keys (Iterable[str]): Emails, uids or DNs (see :func:`classify`).
+        by (str | None): ``mail``, ``uid`` or ``dn`` to skip the guess.
+        sizer (ChunkSizer | None): Chunk size state; a fresh one by default.
+        cache: Optional :class:`DirectoryCache` filled with the DNs and
+            ``memberOf`` found, for the single-user actions that follow.
+    """
+    if by is not None and by not in LOOKUP_KINDS:
+        raise ValueError(f"Unsupported lookup kind: {by}")
+    sizer = sizer or ChunkSizer()
+    keys = list(dict.fromkeys(keys))
+    batch = _Batch(settings)
+    user_bases = [normalize_dn(settings.users_base_dn), normalize_dn(settings.pending_users_base_dn)]
+    direct = []
+    for key in keys:
+        kind = by or classify(key)
+        if kind != "dn":
+            batch.want(kind, key, key)
+            continue
+        parent = normalize_dn(key).split(",", 1)[-1]
+        if key.split("=", 1)[0].strip().lower() == "uid" and parent in user_bases:
+            batch.dn_checks[key] = normalize_dn(key)
+            batch.want("uid", _rdn_value(key), key)
+        else:
+            direct.append(key)
+
+    attributes = ["cn", "uid", settings.mail_attribute, "memberOf"]
+    for base in (settings.users_base_dn, settings.pending_users_base_dn):
+        for kind in ("mail", "uid"):
+            pending = list(batch.wanted[kind])
+            start = 0
+            while start < len(pending):
+                size = sizer.size
+                _search_chunk(conn, base, kind, pending[start:start + size], batch, sizer, attributes)
+                start += size
+
+    for key in direct:
+        conn.search(key, "(objectClass=*)", search_scope=BASE, attributes=attributes)
+        if conn.result.get("result") not in (0, 32, None):
+            logger.warning("User lookup failed on %s: %s", key, conn.result.get("description"))
+            batch.failed[key] = conn.result.get("description")
+        elif conn.response and conn.response[0].get("type") == "searchResEntry":
+            entry = conn.response[0]
+            batch.records[key] = user_record(settings, entry["dn"], entry["attributes"])
+
+    results = {}
+    for key in keys:
+        record = batch.records.get(key)
+        if record is None:
+            if key in batch.failed:
+                record = UserResult("get_users_infos", ERROR, batch.failed[key], mail=key if "@" in key else None)
+            else:
+                record = UserResult("get_users_infos", NOT_FOUND, f"User not found: {key}", mail=key if "@" in key else None)
+        elif cache is not None:
+            if record.mail:
+                cache.put_dn(record.mail, record.dn)
+            cache.put_memberships(record.dn, record.groups)
+        results[key] = record
+    return results
@@ -0,0 +1,444 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+
+from ldap3 import BASE, MODIFY_ADD, MODIFY_DELETE, SUBTREE
+from ldap3.utils.conv import escape_filter_chars
+
+from georchestra_ldap.config import LdapSettings
+
+logger = logging.getLogger(__name__)
+
+# LDAP result codes handled explicitly.
+_NO_SUCH_ATTRIBUTE = 16
+_ATTRIBUTE_OR_VALUE_EXISTS = 20
+_NO_SUCH_OBJECT = 32
+
+# Outcomes of :func:`change_members`, per email.
+ADDED = "added"
+REMOVED = "removed"
+UNCHANGED = "unchanged"
+NOT_FOUND = "not_found"
+ERROR = "error"
+
+
+@dataclass
+class MembershipChange:
+    """
+    Outcome of :func:`set_members`.
+
+    Attributes:
+        added (list): Member DNs added to the group.
+        removed (list): Member DNs removed from the group.
+        errors (list): ``(member_dn, description)`` for values that could not be written.
+    """
+
+    added: list = field(default_factory=list)
+    removed: list = field(default_factory=list)
+    errors: list = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed)
+
+
+@dataclass
+class BatchMembershipResult:
+    """
+    Outcome of :func:`change_members`.
+
+    Attributes:
+        group_dn (str): DN of the role or organization.
+        outcomes (dict): Requested email -> ``added``, ``removed``,
+            ``unchanged`` (already in the wanted state), ``not_found`` (no
+            such user) or ``error``.
+        errors (list): ``(email, description)`` for the failed ones.
+    """
+
+    group_dn: str
+    outcomes: dict = field(default_factory=dict)
+    errors: list = field(default_factory=list)
+
+    @property
+    def counts(self) -> dict:
+        counts: dict = {}
+        for outcome in self.outcomes.values():
+            counts[outcome] = counts.get(outcome, 0) + 1
+        return counts
+
+
+def _decode(value) -> str:
+    return value.decode("utf-8") if isinstance(value, bytes) else value
+
+
+def _range_end(attribute_name: str) -> str:
+    # "member;range=1500-2999" -> "2999", "member;range=3000-*" -> "*"
+    return attribute_name.rsplit("=", 1)[1].split("-", 1)[1]
+
+
+def iter_members(conn, group_dn: str, attribute: str = "member") -> Iterator[str]:
+    """
+    Yield the values of a group's ``member`` attribute one chunk at a time.
+
+    Servers that cap multi-valued attributes (Active Directory, some 389-ds
+    setups) answer with ``member;range=0-1499``; the next ranges are then
+    requested one by one, so only one chunk is held in memory. Servers
+    without range support return every value in the first answer.
+
+    Args:
+        conn: Bound ldap3 connection (synchronous strategy).
+        group_dn (str): DN of the role or organization.
+        attribute (str): Multi-valued attribute to read.
+    """
+    requested = attribute
+    previous_auto_range = conn.auto_range
+    # ldap3 would otherwise fetch every range itself and merge them in memory.
+    conn.auto_range = False
+    try:
+        while True:
+            conn.search(group_dn, "(objectClass=*)", search_scope=BASE, attributes=[requested])
+            if not conn.response or conn.response[0].get("type") != "searchResEntry":
+                if requested == attribute:
+                    logger.info("Group not found: %s", group_dn)
+                return
+            raw = conn.response[0]["raw_attributes"]
+            prefix = f"{attribute.lower()};range="
+            ranged = [name for name in raw if name.lower().startswith(prefix)]
+            if not ranged:
+                for value in raw.get(attribute, []):
+                    yield _decode(value)
+                return
+            name = ranged[0]
+            values = raw[name]
+            end = _range_end(name)
+            for value in values:
+                yield _decode(value)
+            if end == "*" or not values:
+                return
+            requested = f"{attribute};range={int(end) + 1}-*"
+    finally:
+        conn.auto_range = previous_auto_range
+
+
+def normalize_dn(dn: str) -> str:
+    """
+    Return a comparison key for a DN: case-insensitive, spaces around RDNs ignored.
+    """
+    return ",".join(part.strip() for part in dn.split(",")).lower()
+
+
+def _chunks(values: list, size: int) -> Iterator[list]:
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+def set_members(
+    conn, group_dn: str, desired: Iterable[str], chunk_size: int = 1000, attribute: str = "member"
+) -> MembershipChange:
+    """
+    Make a group's members exactly ``desired``.
+
+    The current members are read once (see :func:`iter_members`) and only the
+    difference is written, as multi-value modifies of at most ``chunk_size``
+    values; small diffs go out in a single modify. If a value was changed
+    concurrently and the server rejects a chunk, that chunk is retried value
+    by value.
+
+    Args:
+        conn: Bound ldap3 connection (synchronous strategy).
+        group_dn (str): DN of the role or organization.
+        desired (Iterable[str]): Member DNs the group must end up with.
+        chunk_size (int): Maximum number of values per modify operation.
+        attribute (str): Multi-valued attribute to synchronize.
+
+    Returns:
+        MembershipChange: What was added and removed.
+    """
+    wanted = {}
+    for dn in desired:
+        wanted.setdefault(normalize_dn(dn), dn)
+    current = {}
+    for dn in iter_members(conn, group_dn, attribute):
+        current.setdefault(normalize_dn(dn), dn)
+
+    change = MembershipChange()
+    to_add = [dn for key, dn in wanted.items() if key not in current]
+    to_remove = [dn for key, dn in current.items() if key not in wanted]
+    if not to_add and not to_remove:
+        return change
+
+    if len(to_add) + len(to_remove) <= chunk_size:
+        operations = []
+        if to_remove:
+            operations.append((MODIFY_DELETE, to_remove))
+        if to_add:
+            operations.append((MODIFY_ADD, to_add))
+        if conn.modify(group_dn, {attribute: operations}):
+            change.added, change.removed = to_add, to_remove
+            return change
+        if conn.result.get("result") not in (_NO_SUCH_ATTRIBUTE, _ATTRIBUTE_OR_VALUE_EXISTS):
+            change.errors = _fail(group_dn, to_remove + to_add, conn.result.get("description"))
+            return change
+
+    for chunk in _chunks(to_remove, chunk_size):
+        done, errors = write_members(conn, group_dn, MODIFY_DELETE, chunk, attribute)
+        change.removed.extend(done)
+        change.errors.extend(errors)
+    for chunk in _chunks(to_add, chunk_size):
+        done, errors = write_members(conn, group_dn, MODIFY_ADD, chunk, attribute)
+        change.added.extend(done)
+        change.errors.extend(errors)
+    return change
+
+
+def write_members(conn, group_dn: str, operation, values: list, attribute: str = "member") -> tuple:
+    """
+    Add (``MODIFY_ADD``) or remove (``MODIFY_DELETE``) member values in one modify.
+
+    A value already added or removed by someone else makes the server reject
+    the whole modify; the values are then written one by one and those
+    already in the wanted state are skipped.
+
+    Returns:
+        tuple: ``(written_values, errors)`` where errors are ``(value, description)``.
+    """
+    harmless = _ATTRIBUTE_OR_VALUE_EXISTS if operation == MODIFY_ADD else _NO_SUCH_ATTRIBUTE
+    if conn.modify(group_dn, {attribute: [(operation, values)]}):
+        return list(values), []
+    if conn.result.get("result") != harmless:
+        return [], _fail(group_dn, values, conn.result.get("description"))
+    done, errors = [], []
+    for value in values:
+        if conn.modify(group_dn, {attribute: [(operation, [value])]}):
+            done.append(value)
+        elif conn.result.get("result") != harmless:
+            errors.extend(_fail(group_dn, [value], conn.result.get("description")))
+    return done, errors
+
+
+def _fail(group_dn: str, values: list, description) -> list:
+    logger.warning("Could not update %d member(s) of %s: %s", len(values), group_dn, description)
+    return [(value, description) for value in values]
+
+
+def resolve_user_dns(conn, settings: LdapSettings, emails: Iterable[str], chunk_size: int = 200) -> dict:
+    """
+    Return ``{email.lower(): user DN}`` for the emails that match a user.
+
+    Emails are looked up with ``(|(mail=a)(mail=b)...)`` searches of at most
+    ``chunk_size`` values, in the users branch first and then, for those not
+    found, in the pending users branch.
+    """
+    remaining = {email.lower() for email in emails}
+    found: dict = {}
+    mail = settings.mail_attribute
+    for base in (settings.users_base_dn, settings.pending_users_base_dn):
+        for chunk in _chunks(sorted(remaining), chunk_size):
+            clauses = "".join(f"({mail}={escape_filter_chars(email)})" for email in chunk)
+            conn.search(base, f"(|{clauses})", search_scope=SUBTREE, attributes=[mail])
+            for entry in conn.response or ():
+                if entry.get("type") != "searchResEntry":
+                    continue
+                for value in entry["attributes"].get(mail, []):
+                    key = value.lower()
+                    if key in remaining and key not in found:
+                        found[key] = entry["dn"]
+        remaining -= found.keys()
+        if not remaining:
+            break
+    return found
+
+
+def _matches(conn, group_dn: str, operator: str, dns: list) -> bool:
+    clauses = "".join(f"(member={escape_filter_chars(dn)})" for dn in dns)
+    conn.search(group_dn, f"({operator}{clauses})", search_scope=BASE, attributes=["1.1"])
+    return bool(conn.response) and conn.response[0].get("type") == "searchResEntry"
+
+
+def _member_keys(conn, group_dn: str, keys: set) -> set:
+    """
+    Return the keys among ``keys`` (see :func:`normalize_dn`) the group holds,
+    reading its member list once, by ranges (see :func:`iter_members`).
+    """
+    return {key for key in map(normalize_dn, iter_members(conn, group_dn)) if key in keys}
+
+
+def members_among(conn, group_dn: str, dns: Iterable[str], chunk_size: int = 200) -> set | None:
+    """
+    Return the :func:`normalize_dn` keys of ``dns`` that are members of the
+    group, or None when the group does not exist.
+
+    Each chunk of ``chunk_size`` DNs is first checked by the server with
+    base-scope filters: ``(&(member=a)(member=b)...)`` when the group holds
+    all of them, ``(|...)`` when it holds none. The DNs of the other chunks
+    are then matched against the member list, read once.
+    """
+    conn.search(group_dn, "(objectClass=*)", search_scope=BASE, attributes=["1.1"])
+    if conn.result.get("result") == _NO_SUCH_OBJECT or not conn.response:
+        return None
+    present, mixed = set(), set()
+    for chunk in _chunks(list({normalize_dn(dn): dn for dn in dns}.values()), chunk_size):
+        if _matches(conn, group_dn, "&", chunk):
+            present.update(map(normalize_dn, chunk))
+        elif len(chunk) > 1 and _matches(conn, group_dn, "|", chunk):
+            mixed.update(map(normalize_dn, chunk))
+    if mixed:
+        present |= _member_keys(conn, group_dn, mixed)
+    return present
+
+
+def change_members(
+    conn,
+    settings: LdapSettings,
+    group_dn: str,
+    emails: Iterable[str],
+    operation,
+    chunk_size: int = 1000,
+    search_chunk: int = 200,
+    exclusive_base: str | None = None,
+) -> BatchMembershipResult:
+    """
+    Add (``MODIFY_ADD``) or remove (``MODIFY_DELETE``) many users, given by
+    email, to or from one group.
+
+    The emails are resolved with chunked OR-filter searches (see
+    :func:`resolve_user_dns`), the users already in the wanted state are
+    skipped (see :func:`members_among`) and the others are written as
+    multi-value modifies of at most ``chunk_size`` values (see
+    :func:`write_members`).
+
+    Args:
+        conn: Bound ldap3 connection (synchronous strategy).
+        settings (LdapSettings): Directory layout.
+        group_dn (str): DN of the role or organization.
+        emails (Iterable[str]): Emails of the users.
+        operation: ``MODIFY_ADD`` or ``MODIFY_DELETE``.
+        chunk_size (int): Maximum number of values per modify operation.
+        search_chunk (int): Maximum number of emails per lookup search.
+        exclusive_base (str | None): For adds, remove the users from the
+            other groups under this base (a user belongs to one organization).
+    """
+    emails = list(dict.fromkeys(emails))
+    result = BatchMembershipResult(group_dn)
+    dns = resolve_user_dns(conn, settings, emails, search_chunk)
+    by_key: dict = {}  # normalized DN -> requested emails
+    for email in emails:
+        dn = dns.get(email.lower())
+        # Placeholder keeping the outcomes in the requested order.
+        result.outcomes[email] = NOT_FOUND
+        if dn is not None:
+            by_key.setdefault(normalize_dn(dn), (dn, []))[1].append(email)
+
+    def _set(keys, outcome, description=None):
+        for key in keys:
+            for email in by_key[key][1]:
+                result.outcomes[email] = outcome
+                if description is not None:
+                    result.errors.append((email, description))
+
+    present = members_among(conn, group_dn, [dn for dn, _ in by_key.values()], search_chunk)
+    if present is None:
+        _set(by_key, ERROR, "No such group")
+        logger.warning("Group not found: %s", group_dn)
+        return result
+    adding = operation == MODIFY_ADD
+    pending = [key for key in by_key if (key in present) != adding]
+    _set([key for key in by_key if key not in pending], UNCHANGED)
+
+    if adding and exclusive_base and pending:
+        pending = _leave_other_groups(conn, exclusive_base, group_dn, pending, by_key, chunk_size, search_chunk, _set)
+
+    for chunk in _chunks(pending, chunk_size):
+        done, errors = write_members(conn, group_dn, operation, [by_key[key][0] for key in chunk])
+        written = {normalize_dn(dn) for dn in done}
+        failed = {normalize_dn(dn): description for dn, description in errors}
+        for key in chunk:
+            if key in failed:
+                _set([key], ERROR, failed[key])
+            else:
+                # Neither written nor failed: changed concurrently, already as wanted.
+                _set([key], (ADDED if adding else REMOVED) if key in written else UNCHANGED)
+    return result
+
+
+def _leave_other_groups(conn, base: str, group_dn: str, keys: list, by_key: dict, chunk_size: int,
+                        search_chunk: int, _set) -> list:
+    """
+    Remove the users ``keys`` from the groups under ``base`` other than
+    ``group_dn``; return the keys that could be removed everywhere.
+    """
+    target = normalize_dn(group_dn)
+    others = set()
+    for chunk in _chunks(keys, search_chunk):
+        clauses = "".join(f"(member={escape_filter_chars(by_key[key][0])})" for key in chunk)
+        conn.search(base, f"(|{clauses})", search_scope=SUBTREE, attributes=["1.1"])
+        others.update(
+            entry["dn"] for entry in conn.response or ()
+            if entry.get("type") == "searchResEntry" and normalize_dn(entry["dn"]) != target
+        )
+    failed = set()
+    for other_dn in sorted(others):
+        members = members_among(conn, other_dn, [by_key[key][0] for key in keys], search_chunk) or set()
+        for chunk in _chunks(sorted(members), chunk_size):
+            _, errors = write_members(conn, other_dn, MODIFY_DELETE, [by_key[key][0] for key in chunk])
+            for dn, description in errors:
+                failed.add(normalize_dn(dn))
+                _set([normalize_dn(dn)], ERROR, f"Could not leave {other_dn}: {description}")
+    return [key for key in keys if key not in failed]
+
+
+def rename_members(conn, bases: Iterable[str], renames: dict, chunk_size: int = 200) -> tuple[int, list]:
+    """
+    Rewrite the ``member`` values left pointing at entries renamed or moved
+    with a modify DN, on servers that do not run the referential integrity
+    overlay (with it, nothing is left to rewrite).
+
+    The groups under ``bases`` holding old DNs are found with chunked
+    ``(|(member=a)(member=b)...)`` searches; each group holding only some
+    old DNs of the chunk (an ``(&...)`` base search tells) has its member
+    list read once to find them. Each group then gets one modify that
+    deletes the old values it holds and adds the new ones.
+
+    Args:
+        conn: Bound ldap3 connection (synchronous strategy).
+        bases (Iterable[str]): Branches holding the groups (roles, orgs).
+        renames (dict): Old DN -> new DN.
+        chunk_size (int): Maximum number of DNs per search and per modify.
+
+    Returns:
+        tuple: ``(rewritten_values, errors)`` where errors are ``(member_dn, description)``.
+    """
+    rewritten, errors = 0, []
+    olds = list(renames)
+    for base in bases:
+        for chunk in _chunks(olds, chunk_size):
+            clauses = "".join(f"(member={escape_filter_chars(dn)})" for dn in chunk)
+            conn.search(base, f"(|{clauses})", search_scope=SUBTREE, attributes=["1.1"])
+            groups = [entry["dn"] for entry in conn.response or () if entry.get("type") == "searchResEntry"]
+            for group_dn in groups:
+                done, failed = _rewrite_members(conn, group_dn, chunk, renames)
+                rewritten += done
+                errors.extend(failed)
+    return rewritten, errors
+
+
+def _rewrite_members(conn, group_dn: str, olds: list, renames: dict) -> tuple[int, list]:
+    # The group was found by an OR filter over ``olds``: it holds some of them.
+    stale = olds
+    if not _matches(conn, group_dn, "&", olds):
+        held = _member_keys(conn, group_dn, set(map(normalize_dn, olds)))
+        stale = [dn for dn in olds if normalize_dn(dn) in held]
+    if not stale:
+        return 0, []
+    changes = [(MODIFY_DELETE, stale), (MODIFY_ADD, [renames[dn] for dn in stale])]
+    if conn.modify(group_dn, {"member": changes}):
+        return len(stale), []
+    if conn.result.get("result") not in (_NO_SUCH_ATTRIBUTE, _ATTRIBUTE_OR_VALUE_EXISTS):
+        return 0, _fail(group_dn, stale, conn.result.get("description"))
+    # Some new values are already there or the group changed meanwhile:
+    # add and delete separately, skipping those.
+    _, add_errors = write_members(conn, group_dn, MODIFY_ADD, [renames[dn] for dn in stale])
+    done, delete_errors = write_members(conn, group_dn, MODIFY_DELETE, stale)
+    return len(done), add_errors + delete_errors
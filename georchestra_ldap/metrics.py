@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import IO, Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds (upper bounds), Prometheus style.
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+OPERATIONS = ("search", "add", "modify", "modify_dn", "delete")
+
+# Label used for operations run outside of a client action (e.g. worker threads).
+UNATTRIBUTED = "none"
+
+
+def _bound(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(value)
+
+
+class Histogram:
+    """
+    Cumulative latency histogram with fixed bucket bounds.
+    """
+
+    __slots__ = ("bounds", "counts", "count", "sum")
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * len(self.bounds)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.bounds):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def cumulative(self) -> list:
+        """Return ``(upper_bound, count)`` pairs, ``+Inf`` last."""
+        pairs, total = [], 0
+        for bound, count in zip(self.bounds, self.counts):
+            total += count
+            pairs.append((bound, total))
+        pairs.append((float("inf"), self.count))
+        return pairs
+
+    def as_dict(self) -> dict:
+        return {"count": self.count, "sum": self.sum, "buckets": [[_bound(b), c] for b, c in self.cumulative()]}
+
+
+@dataclass
+class ActionRecord:
+    """
+    What one client action did, passed to the callback sinks.
+
+    Attributes:
+        action (str): Client method name.
+        duration (float): Wall time in seconds.
+        ok (bool): False when the action raised.
+        operations (dict): LDAP operation type -> count.
+        entries (int): Entries returned by searches.
+        bytes_sent (int): Bytes sent to the server (needs connection usage collection).
+        bytes_received (int): Bytes received from the server.
+    """
+
+    action: str
+    duration: float = 0.0
+    ok: bool = True
+    operations: dict = field(default_factory=dict)
+    entries: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+
+
+class _OperationStats:
+    __slots__ = ("count", "errors", "entries", "bytes_sent", "bytes_received", "latency")
+
+    def __init__(self, bounds):
+        self.count = 0
+        self.errors = 0
+        self.entries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = Histogram(bounds)
+
+
+class _ActionStats:
+    __slots__ = ("calls", "errors", "latency")
+
+    def __init__(self, bounds):
+        self.calls = 0
+        self.errors = 0
+        self.latency = Histogram(bounds)
+
+
+_current_action: contextvars.ContextVar[ActionRecord | None] = contextvars.ContextVar(
+    "georchestra_ldap_current_action", default=None
+)
+
+
+def bind_context(func: Callable) -> Callable:
+    """
+    Return ``func`` wrapped to run in the caller's context (current action
+    included) when submitted to a thread pool, whose threads do not inherit
+    it. Each call runs in its own copy, so calls may overlap.
+    """
+    context = contextvars.copy_context()
+
+    def bound(*args, **kwargs):
+        return context.copy().run(func, *args, **kwargs)
+
+    return bound
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and latency histograms per client action and per
+    LDAP operation type (``search``, ``add``, ``modify``, ``modify_dn``,
+    ``delete``): calls, errors, entries returned, bytes sent and received.
+
+    Actions are timed by :meth:`action` (the client does it for every
+    method); operations are recorded by connections passed through
+    :meth:`instrument`. Results go to the sinks: ``callbacks`` get an
+    :class:`ActionRecord` after each action, :meth:`render_prometheus`
+    returns the Prometheus text exposition and :meth:`dump_json` writes a
+    JSON document.
+
+    Args:
+        callbacks (list | None): Callables receiving an :class:`ActionRecord`.
+        buckets (tuple): Latency histogram upper bounds, in seconds.
+    """
+
+    def __init__(self, callbacks: list | None = None, buckets=DEFAULT_BUCKETS):
+        self.callbacks: list = list(callbacks or [])
+        self.buckets = tuple(buckets)
+        self._actions: dict[str, _ActionStats] = {}
+        self._operations: dict[tuple, _OperationStats] = {}
+        self._lock = threading.Lock()
+
+    def add_callback(self, callback: Callable[[ActionRecord], None]) -> None:
+        self.callbacks.append(callback)
+
+    @contextmanager
+    def action(self, name: str) -> Iterator[ActionRecord]:
+        """
+        Time the enclosed block as action ``name``; LDAP operations run in it
+        (same thread or context) are attributed to the action.
+        """
+        record = ActionRecord(name)
+        token = _current_action.set(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        except BaseException:
+            record.ok = False
+            raise
+        finally:
+            record.duration = time.perf_counter() - start
+            _current_action.reset(token)
+            self._record_action(record)
+
+    def _record_action(self, record: ActionRecord) -> None:
+        with self._lock:
+            stats = self._actions.get(record.action)
+            if stats is None:
+                stats = self._actions[record.action] = _ActionStats(self.buckets)
+            stats.calls += 1
+            stats.errors += not record.ok
+            stats.latency.observe(record.duration)
+        for callback in self.callbacks:
+            try:
+                callback(record)
+            except Exception:
+                logger.exception("Metrics callback failed")
+
+    def record_operation(self, operation: str, duration: float, ok: bool = True, entries: int = 0,
+                         bytes_sent: int = 0, bytes_received: int = 0) -> None:
+        """
+        Record one LDAP operation for the current action.
+        """
+        record = _current_action.get()
+        action = record.action if record is not None else UNATTRIBUTED
+        with self._lock:
+            # Worker threads of one action share its record (see bind_context).
+            if record is not None:
+                record.operations[operation] = record.operations.get(operation, 0) + 1
+                record.entries += entries
+                record.bytes_sent += bytes_sent
+                record.bytes_received += bytes_received
+            stats = self._operations.get((action, operation))
+            if stats is None:
+                stats = self._operations[(action, operation)] = _OperationStats(self.buckets)
+            stats.count += 1
+            stats.errors += not ok
+            stats.entries += entries
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+            stats.latency.observe(duration)
+
+    def instrument(self, conn):
+        """
+        Wrap the operation methods of a synchronous ldap3 connection so each
+        call is recorded. Bytes are only counted when the connection was
+        opened with ``collect_usage=True``. Returns the same connection.
+        """
+        for operation in OPERATIONS:
+            method = getattr(conn, operation)
+            if not hasattr(method, "__wrapped__"):
+                setattr(conn, operation, self._wrap(conn, operation, method))
+        return conn
+
+    def _wrap(self, conn, operation: str, method):
+        def instrumented(*args, **kwargs):
+            usage = conn.usage
+            sent = usage.bytes_transmitted if usage else 0
+            received = usage.bytes_received if usage else 0
+            start = time.perf_counter()
+            ok = False
+            try:
+                result = method(*args, **kwargs)
+                # A search that finds nothing returns False but is not an error.
+                ok = bool(result) or (operation == "search" and (conn.result or {}).get("result") == 0)
+                return result
+            finally:
+                duration = time.perf_counter() - start
+                entries = 0
+                if operation == "search" and conn.response:
+                    entries = sum(1 for entry in conn.response if entry.get("type") == "searchResEntry")
+                self.record_operation(
+                    operation, duration, ok, entries,
+                    (usage.bytes_transmitted - sent) if usage else 0,
+                    (usage.bytes_received - received) if usage else 0,
+                )
+
+        instrumented.__wrapped__ = method
+        return instrumented
+
+    def reset(self) -> None:
+        with self._lock:
+            self._actions.clear()
+            self._operations.clear()
+
+    def as_dict(self) -> dict:
+        """
+        Return every counter and histogram as plain data (the JSON sink format).
+        """
+        with self._lock:
+            actions = {
+                name: {"calls": s.calls, "errors": s.errors, "latency": s.latency.as_dict()}
+                for name, s in self._actions.items()
+            }
+            operations = [
+                {
+                    "action": action, "operation": operation, "count": s.count, "errors": s.errors,
+                    "entries": s.entries, "bytes_sent": s.bytes_sent, "bytes_received": s.bytes_received,
+                    "latency": s.latency.as_dict(),
+                }
+                for (action, operation), s in self._operations.items()
+            ]
+        return {"actions": actions, "operations": operations}
+
+    def dump_json(self, target: str | IO | None = None) -> str:
+        """
+        Return the metrics as a JSON document, also written to ``target``
+        (path or text stream) when given.
+        """
+        text = json.dumps(self.as_dict(), indent=2)
+        if isinstance(target, str):
+            with open(target, "w", encoding="utf-8") as stream:
+                stream.write(text)
+        elif target is not None:
+            target.write(text)
+        return text
+
+    def render_prometheus(self, prefix: str = "georchestra_ldap") -> str:
+        """
+        Return the metrics in the Prometheus text exposition format (0.0.4).
+        """
+        data = self.as_dict()
+        lines = []
+
+        def histogram(name: str, help_text: str, series: list) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for labels, latency in series:
+                for bound, count in latency["buckets"]:
+                    lines.append(f"{name}_bucket{_labels(**labels, le=bound)} {count}")
+                lines.append(f"{name}_sum{_labels(**labels)} {latency['sum']}")
+                lines.append(f"{name}_count{_labels(**labels)} {latency['count']}")
+
+        def counter(name: str, help_text: str, series: list) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in series:
+                lines.append(f"{name}{_labels(**labels)} {value}")
+
+        actions = sorted(data["actions"].items())
+        operations = sorted(data["operations"], key=lambda o: (o["action"], o["operation"]))
+        counter(f"{prefix}_action_calls_total", "Client actions run.",
+                [({"action": name}, a["calls"]) for name, a in actions])
+        counter(f"{prefix}_action_errors_total", "Client actions that raised.",
+                [({"action": name}, a["errors"]) for name, a in actions])
+        histogram(f"{prefix}_action_duration_seconds", "Client action latency.",
+                  [({"action": name}, a["latency"]) for name, a in actions])
+
+        def op_labels(o: dict) -> dict:
+            return {"action": o["action"], "operation": o["operation"]}
+
+        counter(f"{prefix}_operations_total", "LDAP operations sent.",
+                [(op_labels(o), o["count"]) for o in operations])
+        counter(f"{prefix}_operation_errors_total", "LDAP operations that did not succeed.",
+                [(op_labels(o), o["errors"]) for o in operations])
+        counter(f"{prefix}_entries_returned_total", "Entries returned by searches.",
+                [(op_labels(o), o["entries"]) for o in operations if o["operation"] == "search"])
+        counter(f"{prefix}_bytes_sent_total", "Bytes sent to the LDAP server.",
+                [(op_labels(o), o["bytes_sent"]) for o in operations])
+        counter(f"{prefix}_bytes_received_total", "Bytes received from the LDAP server.",
+                [(op_labels(o), o["bytes_received"]) for o in operations])
+        histogram(f"{prefix}_operation_duration_seconds", "LDAP operation latency.",
+                  [(op_labels(o), o["latency"]) for o in operations])
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,162 @@
+"""
+Bulk moderation: move many pending users to the users branch at once.
+
+``moderate_user`` moves one entry per call and leaves the ``member`` values
+of its roles and organization pointing at the old ``ou=pendingusers`` DN
+unless the server runs the referential integrity overlay.
+:func:`moderate_users` moves a whole backlog concurrently over the pool,
+then rewrites those stale values with batched modifies per group (see
+:func:`georchestra_ldap.membership.rename_members`).
+"""
+
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from ldap3 import SUBTREE
+
+from georchestra_ldap.config import LdapSettings
+from georchestra_ldap.connection import ConnectionPool
+from georchestra_ldap.membership import normalize_dn, rename_members, resolve_user_dns
+from georchestra_ldap.metrics import bind_context
+from ldap_actions.results import ERROR, NOT_FOUND, UNCHANGED, UPDATED
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModerationReport:
+    """
+    Outcome of :func:`moderate_users`.
+
+    Attributes:
+        outcomes (dict): Email (or DN when selected by filter) -> ``updated``
+            (moved), ``unchanged`` (already a user), ``not_found`` or ``error``.
+        moved (int): Entries moved to the users branch.
+        rewritten (int): Stale ``member`` values rewritten.
+        errors (list): ``(email, DN or member DN, description)`` of the failures.
+    """
+
+    outcomes: dict = field(default_factory=dict)
+    moved: int = 0
+    rewritten: int = 0
+    errors: list = field(default_factory=list)
+
+    @property
+    def counts(self) -> dict:
+        counts: dict = {}
+        for outcome in self.outcomes.values():
+            counts[outcome] = counts.get(outcome, 0) + 1
+        return counts
+
+
+def _move(pool: ConnectionPool, dn: str, new_superior: str) -> tuple[bool, str | None]:
+    with pool.connection() as conn:
+        if conn.modify_dn(dn, dn.split(",", 1)[0], new_superior=new_superior):
+            return True, None
+        return False, conn.result.get("description")
+
+
+def _select(pool: ConnectionPool, settings: LdapSettings, emails, search_filter, report: ModerationReport) -> list:
+    """
+    Return the ``(key, pending DN)`` pairs to move, recording the outcome of
+    the keys that need no move.
+    """
+    pending_suffix = "," + normalize_dn(settings.pending_users_base_dn)
+    with pool.connection() as conn:
+        if search_filter is not None:
+            # DNs are collected before moving: a paged search must not see
+            # its own result set shrink under it.
+            entries = conn.extend.standard.paged_search(
+                settings.pending_users_base_dn, search_filter, search_scope=SUBTREE, attributes=["1.1"],
+                paged_size=500, generator=True,
+            )
+            selected = [
+                (entry["dn"], entry["dn"]) for entry in entries
+                if entry.get("type") == "searchResEntry" and normalize_dn(entry["dn"]).endswith(pending_suffix)
+            ]
+            report.outcomes.update((dn, UPDATED) for dn, _ in selected)
+            return selected
+        emails = list(dict.fromkeys(emails))
+        dns = resolve_user_dns(conn, settings, emails)
+    selected = []
+    for email in emails:
+        dn = dns.get(email.lower())
+        if dn is None:
+            report.outcomes[email] = NOT_FOUND
+        elif not normalize_dn(dn).endswith(pending_suffix):
+            report.outcomes[email] = UNCHANGED
+        else:
+            report.outcomes[email] = UPDATED  # placeholder keeping the order, set by the move
+            selected.append((email, dn))
+    return selected
+
+
+def moderate_users(
+    pool: ConnectionPool,
+    settings: LdapSettings,
+    emails: Iterable[str] | None = None,
+    search_filter: str | None = None,
+    batch_size: int = 500,
+    workers: int | None = None,
+) -> ModerationReport:
+    """
+    Move pending users to the users branch, then rewrite the ``member``
+    values of their roles and organizations to the new DNs.
+
+    The users are given by email or selected with an LDAP filter over the
+    pending users branch. They are processed ``batch_size`` at a time: the
+    entries of a batch are moved concurrently (one modify DN each, on
+    ``workers`` pooled connections), then the groups still holding their
+    old DNs get one delete + add modify per group. If the process stops
+    half-way, only the current batch can be left with stale members.
+
+    Args:
+        pool (ConnectionPool): Pool used for every operation.
+        settings (LdapSettings): Directory layout.
+        emails (Iterable[str] | None): Emails of the users to move.
+        search_filter (str | None): Filter selecting the pending users to move instead.
+        batch_size (int): Users moved before their group members are rewritten.
+        workers (int | None): Concurrent moves; defaults to the pool size.
+
+    Raises:
+        ValueError: Neither or both of ``emails`` and ``search_filter`` given.
+    """
+    if (emails is None) == (search_filter is None):
+        raise ValueError("Give either emails or search_filter")
+    report = ModerationReport()
+    selected = _select(pool, settings, emails, search_filter, report)
+    new_superior = settings.users_base_dn
+    group_bases = [settings.roles_base_dn, settings.orgs_base_dn]
+
+    with ThreadPoolExecutor(max_workers=workers or pool.size) as executor:
+        for start in range(0, len(selected), batch_size):
+            batch = selected[start:start + batch_size]
+            outcomes = executor.map(bind_context(lambda item: _move(pool, item[1], new_superior)), batch)
+            renames = {}
+            keys = {}
+            for (key, dn), (moved, description) in zip(batch, outcomes):
+                if moved:
+                    new_dn = f"{dn.split(',', 1)[0]},{new_superior}"
+                    renames[dn] = new_dn
+                    keys[normalize_dn(dn)] = keys[normalize_dn(new_dn)] = key
+                    report.outcomes[key] = UPDATED
+                    report.moved += 1
+                else:
+                    report.outcomes[key] = ERROR
+                    report.errors.append((key, dn, description))
+            if not renames:
+                continue
+            with pool.connection() as conn:
+                rewritten, errors = rename_members(conn, group_bases, renames)
+            report.rewritten += rewritten
+            for member_dn, description in errors:
+                report.errors.append((keys.get(normalize_dn(member_dn)), member_dn, description))
+            logger.info(
+                "Moderation progress: %d moved, %d member values rewritten, %d errors",
+                report.moved, report.rewritten, len(report.errors),
+            )
+    return report
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from ldap3 import MODIFY_ADD, MODIFY_DELETE
+
+from georchestra_ldap.config import LdapSettings
+from georchestra_ldap.connection import ConnectionPool
+from georchestra_ldap.membership import normalize_dn, write_members
+from georchestra_ldap.metrics import bind_context
+from georchestra_ldap.snapshot import DirectorySnapshot
+
+logger = logging.getLogger(__name__)
+
+CREATE_ROLE = "create_role"
+CREATE_ORG = "create_org"
+REMOVE_MEMBERS = "remove_members"
+ADD_MEMBERS = "add_members"
+
+# Operations of one phase are independent; phases run in this order.
+_PHASES = (CREATE_ROLE, CREATE_ORG, REMOVE_MEMBERS, ADD_MEMBERS)
+
+
+@dataclass(frozen=True)
+class Operation:
+    """
+    One LDAP write of a reconcile plan.
+
+    Attributes:
+        action (str): ``create_role``, ``create_org``, ``remove_members`` or ``add_members``.
+        dn (str): DN of the role or organization.
+        values (tuple): Member DNs added/removed (or seeded on creation).
+        label (str | None): Description of a role or name of an organization to create.
+    """
+
+    action: str
+    dn: str
+    values: tuple = ()
+    label: str | None = None
+
+
+@dataclass
+class ReconcilePlan:
+    """
+    Ordered change plan computed by :func:`reconcile`, and its outcome.
+
+    Attributes:
+        operations (list): :class:`Operation` items, in the order they are applied.
+        unresolved (list): Members of the desired state that match no user.
+        applied (int): Operations that succeeded (0 on a dry run).
+        errors (list): ``(dn, description)`` for operations or values that failed.
+        dry_run (bool): True when nothing was written.
+    """
+
+    operations: list = field(default_factory=list)
+    unresolved: list = field(default_factory=list)
+    applied: int = 0
+    errors: list = field(default_factory=list)
+    dry_run: bool = False
+
+    @property
+    def operation_count(self) -> int:
+        """Number of LDAP write operations the plan issues."""
+        return len(self.operations)
+
+
+def load_desired_state(path) -> dict:
+    """
+    Read a desired state from a JSON file (see :func:`reconcile` for the layout).
+    """
+    with open(os.fspath(path), encoding="utf-8") as stream:
+        return json.load(stream)
+
+
+def _group_spec(spec) -> tuple:
+    # "ROLE": [members] or "ROLE": {"members": [...], "description"/"name": ...}
+    if isinstance(spec, dict):
+        return list(spec.get("members", [])), spec.get("description") or spec.get("name")
+    return list(spec), None
+
+
+def _chunks(values: list, size: int):
+    for start in range(0, len(values), size):
+        yield tuple(values[start:start + size])
+
+
+def plan(snapshot: DirectorySnapshot, settings: LdapSettings, desired_state: dict, chunk_size: int = 1000) -> ReconcilePlan:
+    """
+    Compute the minimal change plan turning ``snapshot`` into ``desired_state``.
+
+    Only the roles and organizations listed in ``desired_state`` are touched.
+    Since a user belongs to a single organization, a user added to an
+    organization is also removed from the one they currently belong to.
+    """
+    result = ReconcilePlan()
+
+    def resolve(members) -> dict:
+        resolved = {}
+        for member in members:
+            dn = member if "=" in member else snapshot.user_dn(member)
+            if dn is None:
+                result.unresolved.append(member)
+                continue
+            resolved.setdefault(normalize_dn(dn), dn)
+        return resolved
+
+    removals: dict[str, dict] = {}
+    additions: dict[str, list] = {}
+    # CNs compare case-insensitively, like DNs (see normalize_dn): lowered CN -> CN in the directory.
+    existing_roles = {cn.lower(): cn for cn in snapshot.roles()}
+    existing_orgs = {cn.lower(): cn for cn in snapshot.orgs()}
+
+    groups = [
+        (CREATE_ROLE, cn, spec, settings.roles_base_dn, existing_roles, snapshot.role_members)
+        for cn, spec in (desired_state.get("roles") or {}).items()
+    ] + [
+        (CREATE_ORG, cn, spec, settings.orgs_base_dn, existing_orgs, snapshot.org_members)
+        for cn, spec in (desired_state.get("orgs") or {}).items()
+    ]
+    for create_action, cn, spec, base_dn, existing, current_members in groups:
+        members, label = _group_spec(spec)
+        cn = existing.get(cn.lower(), cn)
+        group_dn = f"cn={cn},{base_dn}"
+        wanted = resolve(members)
+        if cn.lower() not in existing:
+            result.operations.append(Operation(create_action, group_dn, tuple(wanted.values()), label))
+            added = list(wanted.values())
+        else:
+            current = {normalize_dn(dn): dn for dn in current_members(cn)}
+            gone = [dn for key, dn in current.items() if key not in wanted]
+            if gone:
+                removals.setdefault(group_dn, {}).update((normalize_dn(dn), dn) for dn in gone)
+            added = [dn for key, dn in wanted.items() if key not in current]
+            if added:
+                additions[group_dn] = added
+        if create_action == CREATE_ORG:
+            for dn in added:
+                previous = snapshot.org_of(dn)
+                if previous is not None and previous.lower() != cn.lower():
+                    previous_dn = f"cn={previous},{settings.orgs_base_dn}"
+                    removals.setdefault(previous_dn, {}).setdefault(normalize_dn(dn), dn)
+
+    for group_dn, values in removals.items():
+        for chunk in _chunks(list(values.values()), chunk_size):
+            result.operations.append(Operation(REMOVE_MEMBERS, group_dn, chunk))
+    for group_dn, values in additions.items():
+        for chunk in _chunks(values, chunk_size):
+            result.operations.append(Operation(ADD_MEMBERS, group_dn, chunk))
+    return result
+
+
+def _apply_operation(pool: ConnectionPool, operation: Operation) -> list:
+    """
+    Run one operation and return its errors (empty on success).
+    """
+    with pool.connection() as conn:
+        if operation.action in (CREATE_ROLE, CREATE_ORG):
+            cn = operation.dn.split(",", 1)[0].split("=", 1)[1]
+            if operation.action == CREATE_ROLE:
+                attributes = {
+                    "objectClass": ["top", "groupOfMembers", "georchestraRole"],
+                    "cn": cn,
+                    "description": operation.label or "Role created via script",
+                    "georchestraObjectIdentifier": str(uuid.uuid4()),
+                }
+            else:
+                attributes = {
+                    "objectClass": ["groupOfMembers", "top", "georchestraOrg"],
+                    "cn": cn,
+                    "o": operation.label or cn,
+                }
+            if operation.values:
+                attributes["member"] = list(operation.values)
+            if conn.add(operation.dn, attributes=attributes):
+                return []
+            return [(operation.dn, conn.result.get("description"))]
+        kind = MODIFY_ADD if operation.action == ADD_MEMBERS else MODIFY_DELETE
+        _, errors = write_members(conn, operation.dn, kind, list(operation.values))
+        return errors
+
+
+def reconcile(
+    pool: ConnectionPool,
+    settings: LdapSettings,
+    desired_state: dict,
+    dry_run: bool = False,
+    workers: int | None = None,
+    chunk_size: int = 1000,
+    snapshot: DirectorySnapshot | None = None,
+) -> ReconcilePlan:
+    """
+    Bring roles and organizations to a desired state.
+
+    The current state is read in bulk (one paged pass per base, see
+    :class:`DirectorySnapshot`), then a plan is computed and applied phase
+    by phase: role and organization creations, member removals, member
+    additions. Operations within a phase run concurrently over the pool.
+
+    ``desired_state`` layout (members are emails or DNs)::
+
+        {
+            "roles": {"EDITOR": ["alice@example.org"], "ADMIN": {"description": "...", "members": [...]}},
+            "orgs": {"C2C": {"name": "Camptocamp", "members": ["bob@example.org"]}},
+        }
+
+    Args:
+        pool (ConnectionPool): Pool used for every operation.
+        settings (LdapSettings): Directory layout.
+        desired_state (dict): Wanted roles and organizations with their members.
+        dry_run (bool): Only compute and return the plan.
+        workers (int | None): Concurrent operations per phase; defaults to the pool size.
+        chunk_size (int): Maximum number of member values per modify.
+        snapshot (DirectorySnapshot | None): Already loaded state to plan against.
+    """
+    snapshot = snapshot or DirectorySnapshot(pool, settings).load()
+    result = plan(snapshot, settings, desired_state, chunk_size)
+    result.dry_run = dry_run
+    if result.unresolved:
+        logger.warning("Reconcile: %d member(s) match no user", len(result.unresolved))
+    logger.info("Reconcile plan: %d operation(s)%s", result.operation_count, " (dry run)" if dry_run else "")
+    if dry_run or not result.operations:
+        return result
+
+    with ThreadPoolExecutor(max_workers=workers or pool.size) as executor:
+        for phase in _PHASES:
+            operations = [operation for operation in result.operations if operation.action == phase]
+            for operation, errors in zip(operations, executor.map(bind_context(lambda op: _apply_operation(pool, op)), operations)):
+                if errors:
+                    result.errors.extend(errors)
+                else:
+                    result.applied += 1
+    return result
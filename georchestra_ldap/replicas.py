@@ -0,0 +1,251 @@
+"""
+Read replicas: the directory servers read-only lookups are sent to.
+
+``LdapSettings.server`` is the master (provider): every write goes there.
+``LdapSettings.read_servers`` lists read-only consumers; the client keeps a
+second connection pool on them (see :func:`read_pool`) for its lookups.
+Replicas lag behind the master: a client can keep reading from the master
+for ``LdapSettings.read_your_writes`` seconds after each of its writes.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import random
+import threading
+import time
+import weakref
+from dataclasses import replace
+
+from ldap3 import BASE, Connection
+from ldap3.core.exceptions import LDAPException
+
+from georchestra_ldap.config import LdapSettings
+from georchestra_ldap.connection import ConnectionPool, open_connection
+from georchestra_ldap.errors import PoolTimeout
+from georchestra_ldap.metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+READ_STRATEGIES = ("round_robin", "latency")
+
+
+class ReplicaSet:
+    """
+    Choose the replica each read goes to (see :class:`ReplicaPool`).
+
+    ``round_robin`` rotates over the replicas, from a random one so that
+    processes do not all start on the first; ``latency`` prefers the one
+    with the lowest measured bind + root DSE read time, measured again
+    every ``probe_interval`` seconds. A replica that cannot be reached is
+    skipped for ``retry_after`` seconds and the next one is tried; when none
+    is reachable the connection is opened on the master.
+
+    Unlike an ldap3 ``ServerPool``, whose rotation and failure marks are kept
+    per connection, the order and the failures are shared by every
+    connection of the read pool.
+
+    Args:
+        settings (LdapSettings): Master settings with ``read_servers``.
+        strategy (str | None): ``round_robin`` or ``latency``; defaults to ``settings.read_strategy``.
+        probe_interval (float): Seconds between two latency measures.
+        retry_after (float): Seconds an unreachable replica is skipped.
+    """
+
+    def __init__(
+        self,
+        settings: LdapSettings,
+        strategy: str | None = None,
+        probe_interval: float = 60.0,
+        retry_after: float = 30.0,
+    ):
+        self.strategy = strategy or settings.read_strategy
+        if self.strategy not in READ_STRATEGIES:
+            raise ValueError(f"Unsupported read strategy: {self.strategy}")
+        self.settings = settings
+        self.replicas = [replace(settings, server=url, read_servers=[]) for url in settings.read_servers]
+        self.probe_interval = probe_interval
+        self.retry_after = retry_after
+        self.latencies: dict = {}  # replica index -> seconds (inf when unreachable)
+        self._down: dict = {}  # replica index -> monotonic time it failed
+        self._next = random.randrange(len(self.replicas)) if self.replicas else 0
+        self._probed_at = -math.inf
+        self._lock = threading.Lock()
+
+    def _measure(self, replica: LdapSettings) -> float:
+        start = time.perf_counter()
+        try:
+            conn = open_connection(replica)
+        except LDAPException:
+            return math.inf
+        try:
+            conn.search("", "(objectClass=*)", search_scope=BASE, attributes=["1.1"])
+            return time.perf_counter() - start
+        except LDAPException:
+            return math.inf
+        finally:
+            conn.unbind()
+
+    def probe(self) -> dict:
+        """
+        Measure every replica now and return ``{url: seconds}`` (inf when unreachable).
+        """
+        latencies = {index: self._measure(replica) for index, replica in enumerate(self.replicas)}
+        with self._lock:
+            self.latencies = latencies
+            self._probed_at = time.monotonic()
+        return {self.replicas[index].server: value for index, value in latencies.items()}
+
+    def _order(self) -> list:
+        """
+        Return the indexes of the reachable replicas, preferred first; each
+        call moves the ``round_robin`` rotation one step.
+        """
+        count = len(self.replicas)
+        if self.strategy == "latency":
+            if time.monotonic() - self._probed_at >= self.probe_interval:
+                self.probe()
+            with self._lock:
+                order = sorted(range(count), key=lambda index: self.latencies.get(index, math.inf))
+        else:
+            with self._lock:
+                start, self._next = self._next, (self._next + 1) % count
+            order = [(start + offset) % count for offset in range(count)]
+        now = time.monotonic()
+        with self._lock:
+            return [index for index in order if now - self._down.get(index, -math.inf) >= self.retry_after]
+
+    def open(self, collect_usage: bool = False) -> Connection:
+        """
+        Open and bind a read connection on the first reachable replica, or
+        on the master when none is.
+        """
+        return self._open(self._order(), collect_usage)[0]
+
+    def _open(self, order: list, collect_usage: bool = False) -> tuple[Connection, int | None]:
+        # (connection, replica index), the index being None for the master.
+        for index in order:
+            replica = self.replicas[index]
+            try:
+                conn = open_connection(replica, collect_usage=collect_usage)
+            except LDAPException as exc:
+                logger.warning("Read replica %s unreachable: %s", replica.server, exc)
+                with self._lock:
+                    self._down[index] = time.monotonic()
+                    self.latencies[index] = math.inf
+                continue
+            with self._lock:
+                self._down.pop(index, None)
+            return conn, index
+        logger.warning("No read replica reachable, reading from the master %s", self.settings.server)
+        return open_connection(self.settings, collect_usage=collect_usage), None
+
+
+class ReplicaPool(ConnectionPool):
+    """
+    Connection pool spread over the read replicas, with one idle stack per
+    replica.
+
+    Every checkout asks the :class:`ReplicaSet` for its order (so
+    ``round_robin`` rotates per read, not per connection opened) and takes
+    an idle connection of the preferred replica, or opens one on it while
+    the pool has room; when it has none, an idle connection of another
+    replica is used rather than waiting. A sequential client therefore
+    spreads its reads too.
+
+    Args:
+        replicas (ReplicaSet): Replica selection.
+        size (int): Maximum number of connections over all replicas.
+        timeout (float | None): Seconds to wait for a free connection.
+        max_idle (float): Idle seconds after which a connection is probed.
+        metrics (MetricsRegistry | None): Registry recording every operation of the pooled connections.
+    """
+
+    def __init__(self, replicas: ReplicaSet, size: int = 5, timeout: float | None = 30.0, max_idle: float = 60.0,
+                 metrics: MetricsRegistry | None = None):
+        super().__init__(replicas.open, size=size, timeout=timeout, max_idle=max_idle)
+        self.replicas = replicas
+        self._metrics = metrics
+        self._stacks: dict = {}  # replica index (None: master) -> [(connection, idle since)]
+        self._owners = weakref.WeakKeyDictionary()  # connection -> replica index
+
+    def _take(self, order: list) -> tuple[Connection | None, float]:
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        preferred = order[0] if order else None
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Connection pool is closed.")
+                if self._stacks.get(preferred):
+                    return self._stacks[preferred].pop()
+                if self._opened < self.size:
+                    # Reserve the slot now, open on the preferred replica outside the lock.
+                    self._opened += 1
+                    return None, 0.0
+                for index in [*order[1:], *self._stacks]:
+                    if self._stacks.get(index):
+                        return self._stacks[index].pop()
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise PoolTimeout(f"No LDAP connection available after {self.timeout}s.")
+                self._cond.wait(remaining)
+
+    def acquire(self) -> Connection:
+        order = self.replicas._order()
+        conn, idle_since = self._take(order)
+        try:
+            if conn is not None and self._is_healthy(conn, idle_since):
+                return conn
+            if conn is not None:
+                logger.info("Replacing stale LDAP connection")
+                self._unbind(conn)
+            conn, index = self.replicas._open(order, collect_usage=self._metrics is not None)
+            if self._metrics is not None:
+                self._metrics.instrument(conn)
+            self._owners[conn] = index
+            return conn
+        except BaseException:
+            self._forget()
+            raise
+
+    def release(self, conn: Connection, discard: bool = False) -> None:
+        with self._cond:
+            if not discard and not self._closed and not conn.closed:
+                self._stacks.setdefault(self._owners.get(conn), []).append((conn, time.monotonic()))
+                self._cond.notify()
+                return
+        self._unbind(conn)
+        self._forget()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle = [conn for stack in self._stacks.values() for conn, _ in stack]
+            self._stacks = {}
+            self._opened -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self._unbind(conn)
+
+    def _unbind(self, conn: Connection) -> None:
+        self._owners.pop(conn, None)
+        try:
+            conn.unbind()
+        except LDAPException:
+            pass
+
+
+def read_pool(replicas: ReplicaSet, metrics: MetricsRegistry | None = None) -> ReplicaPool:
+    """
+    Build a :class:`ReplicaPool` on ``replicas``, sized like the master pool.
+
+    Args:
+        replicas (ReplicaSet): Replica selection.
+        metrics (MetricsRegistry | None): Registry recording every operation of the pooled connections.
+    """
+    settings = replicas.settings
+    return ReplicaPool(
+        replicas, size=settings.pool_size, timeout=settings.pool_timeout, max_idle=settings.pool_max_idle,
+        metrics=metrics,
+    )
@@ -0,0 +1,152 @@
+"""
+Aggregate membership report: member counts of every role and organization,
+active and pending users, users without an organization or without roles.
+
+Everything comes from one paged scan of the search base that only asks for
+``memberOf``: the users are counted into their groups as they stream by and
+the groups' ``member`` lists are never transferred.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass, field
+
+from ldap3 import SUBTREE
+
+from georchestra_ldap.config import LdapSettings
+from georchestra_ldap.connection import ConnectionPool
+from georchestra_ldap.membership import normalize_dn
+
+logger = logging.getLogger(__name__)
+
+# Users and groups; other entries under the search base are not transferred.
+_FILTER = (
+    "(|(objectClass=person)(objectClass=inetOrgPerson)"
+    "(objectClass=groupOfMembers)(objectClass=groupOfNames))"
+)
+
+
+@dataclass
+class GroupCount:
+    """
+    Members of one role or organization, split by user state.
+    """
+
+    active: int = 0
+    pending: int = 0
+
+    @property
+    def total(self) -> int:
+        return self.active + self.pending
+
+
+@dataclass
+class MembershipReport:
+    """
+    Outcome of :func:`membership_report`.
+
+    Attributes:
+        roles (dict): Role CN -> :class:`GroupCount` (empty roles included).
+        orgs (dict): Organization CN -> :class:`GroupCount`.
+        active_users (int): Users under the users branch.
+        pending_users (int): Users under the pending users branch.
+        without_org (list): DNs of the users in no organization.
+        without_roles (list): DNs of the users in no role.
+        elapsed (float): Seconds the scan took.
+    """
+
+    roles: dict = field(default_factory=dict)
+    orgs: dict = field(default_factory=dict)
+    active_users: int = 0
+    pending_users: int = 0
+    without_org: list = field(default_factory=list)
+    without_roles: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def total_users(self) -> int:
+        return self.active_users + self.pending_users
+
+
+def _rdn(dn: str) -> tuple[str, str]:
+    name, _, value = dn.split(",", 1)[0].partition("=")
+    return name.strip().lower(), value.strip()
+
+
+def membership_report(pool: ConnectionPool, settings: LdapSettings, page_size: int = 500) -> MembershipReport:
+    """
+    Count the members of every role and organization in one paged scan.
+
+    Each user entry is read with its ``memberOf`` values only, counted as
+    active or pending, and added to the counts of its roles and
+    organization; group entries only register the group, so empty ones
+    show up with zero members. Memory grows with the number of groups and
+    of users lacking an organization or a role, not with the member lists.
+
+    Args:
+        pool (ConnectionPool): Pool the scan connection is taken from.
+        settings (LdapSettings): Directory layout.
+        page_size (int): Entries per page of the paged search.
+    """
+    start = time.perf_counter()
+    report = MembershipReport()
+    users = "," + normalize_dn(settings.users_base_dn)
+    pending_users = "," + normalize_dn(settings.pending_users_base_dn)
+    kinds = {normalize_dn(settings.roles_base_dn): report.roles, normalize_dn(settings.orgs_base_dn): report.orgs}
+
+    def _group(dn: str) -> tuple[dict, GroupCount] | None:
+        # (roles or orgs, count) of a group DN, registering the group on first sight.
+        name, cn = _rdn(dn)
+        groups = kinds.get(normalize_dn(dn).split(",", 1)[-1])
+        if groups is None or name != "cn":
+            return None
+        if cn not in groups:
+            groups[cn] = GroupCount()
+        return groups, groups[cn]
+
+    with pool.connection() as conn:
+        for entry in conn.extend.standard.paged_search(
+            settings.search_base, _FILTER, search_scope=SUBTREE, attributes=["memberOf"],
+            paged_size=page_size, generator=True,
+        ):
+            if entry.get("type") != "searchResEntry":
+                continue
+            dn = entry["dn"]
+            key = normalize_dn(dn)
+            if key.endswith(pending_users):
+                pending = True
+                report.pending_users += 1
+            elif key.endswith(users):
+                pending = False
+                report.active_users += 1
+            else:
+                _group(dn)
+                continue
+            in_role = in_org = False
+            for group_dn in entry["attributes"].get("memberOf") or ():
+                group = _group(str(group_dn))
+                if group is None:
+                    continue
+                groups, count = group
+                if pending:
+                    count.pending += 1
+                else:
+                    count.active += 1
+                if groups is report.roles:
+                    in_role = True
+                else:
+                    in_org = True
+            if not in_org:
+                report.without_org.append(dn)
+            if not in_role:
+                report.without_roles.append(dn)
+    report.roles = dict(sorted(report.roles.items()))
+    report.orgs = dict(sorted(report.orgs.items()))
+    report.elapsed = time.perf_counter() - start
+    logger.info(
+        "Membership report: %d users, %d roles, %d orgs in %.2fs",
+        report.total_users, len(report.roles), len(report.orgs), report.elapsed,
+    )
+    return report
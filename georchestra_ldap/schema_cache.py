@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+from ldap3 import ALL, BASE, NONE, Connection, Server
+from ldap3.core.exceptions import LDAPException
+
+from georchestra_ldap.config import LdapSettings
+
+logger = logging.getLogger(__name__)
+
+# Per-process cache: server key -> (Server with preloaded info, schema timestamp, checked_at).
+_servers: dict[str, tuple[Server, str | None, float]] = {}
+_lock = threading.Lock()
+
+
+def server_key(settings: LdapSettings) -> str:
+    """
+    Return the cache key identifying a directory server (URL, port and TLS flag).
+    """
+    return f"{settings.server}:{settings.port}:{'ssl' if settings.use_ssl else 'plain'}"
+
+
+def get_server(settings: LdapSettings) -> Server:
+    """
+    Return an ldap3 ``Server`` whose root DSE and schema are already loaded.
+
+    The info is downloaded once per process, and optionally persisted to the
+    JSON file ``settings.schema_cache_path`` (keyed by :func:`server_key`) so
+    later processes skip the download. Once ``settings.schema_cache_ttl``
+    seconds have passed, the subschema ``modifyTimestamp`` is read (a single
+    small search) and the schema is fetched again only if it changed.
+
+    Args:
+        settings (LdapSettings): Connection settings of the target server.
+    """
+    key = server_key(settings)
+    now = time.time()
+    with _lock:
+        cached = _servers.get(key)
+    if cached is None:
+        cached = _load_file_entry(settings, key)
+
+    if cached is not None:
+        server, timestamp, checked_at = cached
+        if now - checked_at < settings.schema_cache_ttl:
+            _remember(key, cached)
+            return server
+        if _read_schema_timestamp(settings, server) == timestamp:
+            logger.debug("Schema unchanged for %s", key)
+            cached = (server, timestamp, now)
+            _remember(key, cached)
+            _save_file_entry(settings, key, cached)
+            return server
+        logger.info("Schema changed on %s, refreshing cached server info", key)
+
+    cached = _fetch(settings)
+    _remember(key, cached)
+    _save_file_entry(settings, key, cached)
+    return cached[0]
+
+
+def clear_cache(settings: LdapSettings | None = None) -> None:
+    """
+    Forget cached server info for ``settings`` (or for every server), both in
+    memory and in the cache file.
+    """
+    with _lock:
+        if settings is None:
+            _servers.clear()
+        else:
+            _servers.pop(server_key(settings), None)
+    if settings is not None and settings.schema_cache_path:
+        data = _read_file(settings.schema_cache_path)
+        if data.pop(server_key(settings), None) is not None:
+            _write_file(settings.schema_cache_path, data)
+
+
+def _remember(key: str, cached: tuple[Server, str | None, float]) -> None:
+    with _lock:
+        _servers[key] = cached
+
+
+def _offline_server(settings: LdapSettings, dsa_info, schema) -> Server:
+    server = Server.from_definition(
+        settings.server, dsa_info, schema, port=settings.port, use_ssl=settings.use_ssl
+    )
+    # from_definition leaves get_info=ALL, which would download everything again on bind.
+    server.get_info = NONE
+    return server
+
+
+def _schema_timestamp(server: Server) -> str | None:
+    stamp = server.schema.modify_time_stamp if server.schema else None
+    if isinstance(stamp, (list, tuple)):
+        stamp = stamp[0] if stamp else None
+    return str(stamp) if stamp is not None else None
+
+
+def _fetch(settings: LdapSettings) -> tuple[Server, str | None, float]:
+    logger.info("Downloading server info and schema from %s", settings.server)
+    live = Server(settings.server, port=settings.port, use_ssl=settings.use_ssl, get_info=ALL)
+    conn = Connection(live, user=settings.user_dn, password=settings.password, auto_bind=True)
+    conn.unbind()
+    if live.info is None or live.schema is None:
+        # Nothing worth caching (e.g. schema not readable by this account).
+        live.get_info = NONE
+        return live, None, time.time()
+    server = _offline_server(settings, live.info, live.schema)
+    return server, _schema_timestamp(live), time.time()
+
+
+def _read_schema_timestamp(settings: LdapSettings, server: Server) -> str | None:
+    schema_entry = server.schema.schema_entry if server.schema else None
+    if not schema_entry:
+        return None
+    probe = Server(settings.server, port=settings.port, use_ssl=settings.use_ssl, get_info=NONE)
+    try:
+        conn = Connection(probe, user=settings.user_dn, password=settings.password, auto_bind=True)
+        try:
+            conn.search(schema_entry, "(objectClass=*)", search_scope=BASE, attributes=["modifyTimestamp"])
+            if not conn.response:
+                return None
+            value = conn.response[0]["raw_attributes"].get("modifyTimestamp")
+            return value[0].decode() if value else None
+        finally:
+            conn.unbind()
+    except LDAPException:
+        logger.warning("Could not check schema timestamp on %s", settings.server, exc_info=True)
+        return None
+
+
+def _load_file_entry(settings: LdapSettings, key: str) -> tuple[Server, str | None, float] | None:
+    if not settings.schema_cache_path:
+        return None
+    record = _read_file(settings.schema_cache_path).get(key)
+    if not record:
+        return None
+    try:
+        server = _offline_server(settings, record["dsa_info"], record["schema"])
+    except (KeyError, LDAPException, OSError, ValueError):
+        logger.warning("Ignoring unreadable schema cache entry for %s", key)
+        return None
+    return server, record.get("schema_timestamp"), record.get("checked_at", 0.0)
+
+
+def _save_file_entry(settings: LdapSettings, key: str, cached: tuple[Server, str | None, float]) -> None:
+    if not settings.schema_cache_path:
+        return
+    server, timestamp, checked_at = cached
+    if server.info is None or server.schema is None:
+        return
+    data = _read_file(settings.schema_cache_path)
+    data[key] = {
+        "dsa_info": server.info.to_json(),
+        "schema": server.schema.to_json(),
+        "schema_timestamp": timestamp,
+        "checked_at": checked_at,
+    }
+    _write_file(settings.schema_cache_path, data)
+
+
+def _read_file(path: str) -> dict:
+    try:
+        with open(path, encoding="utf-8") as handle:
+            return json.load(handle)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError):
+        logger.warning("Ignoring unreadable schema cache file %s", path)
+        return {}
+
+
+def _write_file(path: str, data: dict) -> None:
+    # Write then rename so concurrent CLI runs never read a truncated file.
+    directory = os.path.dirname(os.path.abspath(path))
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".schema-cache-")
+        with os.fdopen(fd, "w", encoding="utf-8") as handle:
+            json.dump(data, handle)
+        os.replace(tmp_path, path)
+    except OSError:
+        logger.warning("Could not write schema cache file %s", path, exc_info=True)
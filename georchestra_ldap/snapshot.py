@@ -0,0 +1,362 @@
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+from ldap3 import SUBTREE
+
+from georchestra_ldap.config import LdapSettings
+from georchestra_ldap.connection import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+ROLE = "role"
+ORG = "org"
+
+
+def _rdn_value(dn: str) -> str:
+    return dn.split(",", 1)[0].split("=", 1)[1]
+
+
+def _first(values):
+    if isinstance(values, (list, tuple)):
+        return values[0] if values else None
+    return values
+
+
+class _State:
+    """
+    One immutable generation of the snapshot. Readers grab the current
+    instance once and never see a half-applied refresh.
+    """
+
+    __slots__ = ("users", "mails", "groups", "members", "user_roles", "user_org", "marks", "loaded_at")
+
+    def __init__(self):
+        self.users: dict = {}  # dn.lower() -> (dn, mail, pending)
+        self.mails: dict = {}  # mail.lower() -> dn
+        self.groups: dict = {}  # group dn.lower() -> (kind, cn)
+        self.members: dict = {ROLE: {}, ORG: {}}  # kind -> cn -> tuple of member DNs
+        self.user_roles: dict = {}  # dn.lower() -> frozenset of role CNs
+        self.user_org: dict = {}  # dn.lower() -> org CN
+        self.marks: dict = {}  # base DN -> highest modifyTimestamp / entryCSN seen
+        self.loaded_at = 0.0
+
+    def copy(self) -> "_State":
+        new = _State()
+        new.users = dict(self.users)
+        new.mails = dict(self.mails)
+        new.groups = dict(self.groups)
+        new.members = {ROLE: dict(self.members[ROLE]), ORG: dict(self.members[ORG])}
+        new.user_roles = dict(self.user_roles)
+        new.user_org = dict(self.user_org)
+        new.marks = dict(self.marks)
+        return new
+
+    def put_user(self, dn: str, mail: str | None, pending: bool) -> None:
+        self.drop_user(dn)
+        self.users[dn.lower()] = (dn, mail, pending)
+        if mail:
+            self.mails[mail.lower()] = dn
+
+    def drop_user(self, dn: str) -> None:
+        previous = self.users.pop(dn.lower(), None)
+        if previous is not None and previous[1]:
+            if self.mails.get(previous[1].lower()) == previous[0]:
+                del self.mails[previous[1].lower()]
+
+    def put_group(self, kind: str, dn: str, members) -> None:
+        self.drop_group(dn)
+        cn = _rdn_value(dn)
+        members = tuple(members)
+        self.groups[dn.lower()] = (kind, cn)
+        self.members[kind][cn] = members
+        for member in members:
+            key = member.lower()
+            if kind == ROLE:
+                self.user_roles[key] = self.user_roles.get(key, frozenset()) | {cn}
+            else:
+                self.user_org[key] = cn
+
+    def drop_group(self, dn: str) -> None:
+        previous = self.groups.pop(dn.lower(), None)
+        if previous is None:
+            return
+        kind, cn = previous
+        for member in self.members[kind].pop(cn, ()):
+            key = member.lower()
+            if kind == ROLE:
+                remaining = self.user_roles.get(key, frozenset()) - {cn}
+                if remaining:
+                    self.user_roles[key] = remaining
+                else:
+                    self.user_roles.pop(key, None)
+            elif self.user_org.get(key) == cn:
+                del self.user_org[key]
+
+
+class DirectorySnapshot:
+    """
+    In-memory copy of users, pending users, roles and orgs with indexes for
+    memory-speed authorization and reporting queries.
+
+    :meth:`load` reads every base with paged searches; :meth:`refresh` then
+    only fetches entries whose ``entryCSN`` (or ``modifyTimestamp``) moved
+    past the last one seen. Deleted entries leave no such trace: they are
+    noticed by a DN-only listing of every base, which costs a scan of the
+    whole directory and therefore runs at most every ``deletion_interval``
+    seconds (``None``: never, when deletions come from the change feed
+    through :meth:`apply_changes`). Each load/refresh that changes something
+    builds a new generation (a copy of the indexes) that is swapped in
+    atomically, so readers never block nor see partial updates.
+
+    Args:
+        pool (ConnectionPool): Pool the searches run on.
+        settings (LdapSettings): Directory layout.
+        page_size (int): Entries per page for the paged searches.
+        deletion_interval (float | None): Minimum seconds between two
+            deletion listings; 0 lists on every refresh.
+    """
+
+    def __init__(self, pool: ConnectionPool, settings: LdapSettings, page_size: int = 500,
+                 deletion_interval: float | None = 300.0):
+        self._pool = pool
+        self.settings = settings
+        self.page_size = page_size
+        self.deletion_interval = deletion_interval
+        self._state = _State()
+        self._refresh_lock = threading.Lock()
+        self._listed_at = 0.0  # time.monotonic() of the last full listing (load or deletion check)
+
+    def _bases(self) -> list:
+        s = self.settings
+        return [
+            (s.users_base_dn, "user", False),
+            (s.pending_users_base_dn, "user", True),
+            (s.roles_base_dn, ROLE, False),
+            (s.orgs_base_dn, ORG, False),
+        ]
+
+    def _attributes(self, kind: str) -> list:
+        if kind == "user":
+            return [self.settings.mail_attribute, "modifyTimestamp", "entryCSN"]
+        return ["member", "modifyTimestamp", "entryCSN"]
+
+    def _search(self, conn, base: str, search_filter: str, attributes: list):
+        return conn.extend.standard.paged_search(
+            base, search_filter, search_scope=SUBTREE, attributes=attributes,
+            paged_size=self.page_size, generator=True,
+        )
+
+    def _apply(self, state: _State, base: str, kind: str, pending: bool, entry: dict) -> None:
+        attributes = entry.get("attributes", {})
+        dn = entry["dn"]
+        if dn.lower() == base.lower():
+            return
+        if kind == "user":
+            state.put_user(dn, _first(attributes.get(self.settings.mail_attribute)), pending)
+        else:
+            state.put_group(kind, dn, attributes.get("member", []))
+        self._advance(state.marks, base, attributes)
+
+    @staticmethod
+    def _advance(marks: dict, base: str, attributes: dict) -> None:
+        mark = _first(attributes.get("entryCSN")) or _first(attributes.get("modifyTimestamp"))
+        if mark is not None:
+            mark = mark.strftime("%Y%m%d%H%M%SZ") if hasattr(mark, "strftime") else str(mark)
+            if mark > marks.get(base, ""):
+                marks[base] = mark
+
+    def _unchanged(self, state: _State, base: str, kind: str, pending: bool, entry: dict) -> bool:
+        """
+        Tell whether ``state`` already holds ``entry`` as it is now.
+        """
+        attributes = entry.get("attributes", {})
+        dn = entry["dn"]
+        if dn.lower() == base.lower():
+            return True
+        if kind == "user":
+            return state.users.get(dn.lower()) == (dn, _first(attributes.get(self.settings.mail_attribute)), pending)
+        group = state.groups.get(dn.lower())
+        return group == (kind, _rdn_value(dn)) and state.members[kind].get(group[1]) == tuple(attributes.get("member", []))
+
+    def load(self) -> "DirectorySnapshot":
+        """
+        Read the four bases in full and swap in the resulting generation.
+        """
+        with self._refresh_lock:
+            state = _State()
+            with self._pool.connection() as conn:
+                for base, kind, pending in self._bases():
+                    for entry in self._search(conn, base, "(objectClass=*)", self._attributes(kind)):
+                        if entry.get("type") == "searchResEntry":
+                            self._apply(state, base, kind, pending, entry)
+            state.loaded_at = time.time()
+            self._state = state
+            self._listed_at = time.monotonic()
+        logger.info("Directory snapshot loaded: %d users, %d roles, %d orgs",
+                    len(state.users), len(state.members[ROLE]), len(state.members[ORG]))
+        return self
+
+    def refresh(self, deletions: bool | None = None) -> int:
+        """
+        Apply the changes made since the last load/refresh and return how many
+        entries were added, changed or removed. Falls back to a full
+        :meth:`load` when the server exposes neither ``entryCSN`` nor
+        ``modifyTimestamp``.
+
+        Args:
+            deletions (bool | None): Force (True) or skip (False) the
+                deletion listing; by default it runs when
+                ``deletion_interval`` has elapsed.
+        """
+        current = self._state
+        if not current.marks:
+            self.load()
+            return len(self._state.users) + len(self._state.groups)
+
+        with self._refresh_lock:
+            if deletions is None:
+                deletions = self.deletion_interval is not None and (
+                    time.monotonic() - self._listed_at >= self.deletion_interval
+                )
+            updates = []
+            gone = []
+            with self._pool.connection() as conn:
+                for base, kind, pending in self._bases():
+                    mark = current.marks.get(base)
+                    if mark is not None:
+                        attribute = "modifyTimestamp" if mark.endswith("Z") else "entryCSN"
+                        search_filter = f"({attribute}>={mark})"
+                        for entry in self._search(conn, base, search_filter, self._attributes(kind)):
+                            if entry.get("type") != "searchResEntry":
+                                continue
+                            if self._unchanged(current, base, kind, pending, entry):
+                                # The entries at the mark match ``>=`` again, and changes to
+                                # attributes not indexed here need no new generation. Marks
+                                # are only read under the refresh lock: advanced in place.
+                                self._advance(current.marks, base, entry.get("attributes", {}))
+                            else:
+                                updates.append((base, kind, pending, entry))
+                    if deletions:
+                        gone.extend((kind, dn) for dn in self._deleted(conn, current, base, kind, pending))
+            if deletions:
+                self._listed_at = time.monotonic()
+            if not updates and not gone:
+                current.loaded_at = time.time()
+                return 0
+            state = current.copy()
+            for update in updates:
+                self._apply(state, *update)
+            for kind, dn in gone:
+                if kind == "user":
+                    state.drop_user(dn)
+                else:
+                    state.drop_group(dn)
+            state.loaded_at = time.time()
+            self._state = state
+        return len(updates) + len(gone)
+
+    def apply_changes(self, events) -> int:
+        """
+        Apply a batch of change feed events (see :mod:`georchestra_ldap.watch`)
+        as a new generation, without querying the directory, and return how
+        many were applied. The feed must send the mail and ``member``
+        attributes (it sends whole entries by default).
+        """
+        kinds = {"roles": ROLE, "orgs": ORG}
+        with self._refresh_lock:
+            state = self._state.copy()
+            for event in events:
+                if event.type in ("delete", "moddn"):
+                    dn, target = (event.old_dn, event.old_target) if event.type == "moddn" else (event.dn, event.target)
+                    if target in kinds:
+                        state.drop_group(dn)
+                    elif dn:
+                        state.drop_user(dn)
+                if event.type == "delete" or event.target is None:
+                    continue
+                attributes = event.attributes
+                if event.target in kinds:
+                    state.put_group(kinds[event.target], event.dn, attributes.get("member", []))
+                else:
+                    mail = _first(attributes.get(self.settings.mail_attribute))
+                    state.put_user(event.dn, mail, event.target == "pending_users")
+            state.loaded_at = time.time()
+            self._state = state
+        return len(events)
+
+    def _deleted(self, conn, state: _State, base: str, kind: str, pending: bool) -> list:
+        """
+        Return the DNs of ``state`` under ``base`` that the directory no longer lists.
+        """
+        present = {
+            entry["dn"].lower()
+            for entry in self._search(conn, base, "(objectClass=*)", ["1.1"])
+            if entry.get("type") == "searchResEntry"
+        }
+        suffix = "," + base.lower()
+        if kind == "user":
+            known = [value[0] for key, value in state.users.items() if key.endswith(suffix) and value[2] == pending]
+            return [dn for dn in known if dn.lower() not in present]
+        return [dn for dn, value in state.groups.items() if value[0] == kind and dn not in present]
+
+    def _key(self, state: _State, user: str) -> str:
+        if "=" in user:
+            return user.lower()
+        dn = state.mails.get(user.lower())
+        return dn.lower() if dn else user.lower()
+
+    @property
+    def loaded_at(self) -> float:
+        return self._state.loaded_at
+
+    def user_dn(self, email: str) -> str | None:
+        """
+        Return the DN of the user with this email, or None.
+        """
+        return self._state.mails.get(email.lower())
+
+    def roles_of(self, user: str) -> frozenset:
+        """
+        Return the role CNs of a user given by email or DN.
+        """
+        state = self._state
+        return state.user_roles.get(self._key(state, user), frozenset())
+
+    def org_of(self, user: str) -> str | None:
+        """
+        Return the organization CN of a user given by email or DN.
+        """
+        state = self._state
+        return state.user_org.get(self._key(state, user))
+
+    def is_pending(self, user: str) -> bool:
+        """
+        Return True if the user (email or DN) is in pending users.
+        """
+        state = self._state
+        record = state.users.get(self._key(state, user))
+        return bool(record and record[2])
+
+    def role_members(self, role_cn: str) -> tuple:
+        """
+        Return the member DNs of a role.
+        """
+        return self._state.members[ROLE].get(role_cn, ())
+
+    def org_members(self, org_cn: str) -> tuple:
+        """
+        Return the member DNs of an organization.
+        """
+        return self._state.members[ORG].get(org_cn, ())
+
+    def roles(self) -> list:
+        return list(self._state.members[ROLE])
+
+    def orgs(self) -> list:
+        return list(self._state.members[ORG])
+
+    def __len__(self) -> int:
+        return len(self._state.users)
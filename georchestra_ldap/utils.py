@@ -21,6 +21,10 @@ _SETTINGS_MAP = {
     "LDAP_MAIL_ATTRIBUTE": "mail_attribute",
     "LDAP_DEFAULT_ROLE_CN": "default_role_cn",
     "LDAP_DEFAULT_ORG_CN": "default_org_cn",
+    "LDAP_SCHEMA_CACHE": "schema_cache_path",
+    "LDAP_SCHEMA_CACHE_TTL": "schema_cache_ttl",
+    "LDAP_PASSWORD_SCHEME": "password_scheme",
+    "LDAP_PASSWORD_HASHER": "password_hasher",
 }
 
 
@@ -42,6 +46,27 @@ def apply_settings_to_legacy_config(settings: LdapSettings) -> None:
         setattr(legacy_config, target, getattr(settings, source))
 
 
+class LegacyConfigView:
+    """
+    Read-only view of a :class:`LdapSettings` instance exposing the legacy
+    ``config.py`` names (``LDAP_SERVER``, ``LDAP_SEARCH_BASE``...).
+
+    Handed to the ldap_actions through ``ldap_connection.use_connection`` so
+    each client uses its own settings without touching the shared module.
+    """
+
+    __slots__ = ("_settings",)
+
+    def __init__(self, settings: LdapSettings):
+        self._settings = settings
+
+    def __getattr__(self, name: str):
+        try:
+            return getattr(self._settings, _SETTINGS_MAP[name])
+        except KeyError:
+            raise AttributeError(name) from None
+
+
 def ensure_legacy_import_aliases() -> None:
     """
     Make sure legacy absolute imports used inside ldap_actions (``import ldap_connection``)
@@ -54,3 +79,12 @@ def ensure_legacy_import_aliases() -> None:
 
     _register("ldap_connection", "ldap_actions.ldap_connection")
     _register("config", "config")
+
+
+def import_legacy(module_name: str):
+    """
+    Import ``ldap_actions.<module_name>`` (on first use), after registering
+    the legacy import aliases.
+    """
+    ensure_legacy_import_aliases()
+    return importlib.import_module(f"ldap_actions.{module_name}")
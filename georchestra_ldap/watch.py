@@ -0,0 +1,502 @@
+"""
+Change feed of users, pending users, roles and orgs over LDAP Content
+Synchronization (syncrepl, RFC 4533).
+
+The provider must run the ``syncprov`` overlay. In ``persist`` mode (the
+default) one refreshAndPersist search on a dedicated ldap3 ``ASYNC_STREAM``
+connection receives the changes as they happen; in ``poll`` mode a
+refreshOnly search is sent every ``interval`` seconds from the pool. Either
+way the server only sends what changed since the last sync cookie, which is
+kept in a cookie store so a restarted watcher resumes where it stopped.
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import os
+import tempfile
+import threading
+import uuid
+from dataclasses import dataclass, field
+from typing import Callable, Iterable, Iterator
+
+from ldap3 import SUBTREE, Connection
+from ldap3.core.exceptions import LDAPCommunicationError, LDAPException
+
+from georchestra_ldap.config import LdapSettings
+from georchestra_ldap.connection import ConnectionPool
+from georchestra_ldap.errors import ChangeFeedUnavailable
+from georchestra_ldap.export import target_bases
+from georchestra_ldap.schema_cache import server_key
+
+logger = logging.getLogger(__name__)
+
+SYNC_REQUEST_OID = "1.3.6.1.4.1.4203.1.9.1.1"
+SYNC_STATE_OID = "1.3.6.1.4.1.4203.1.9.1.2"
+SYNC_DONE_OID = "1.3.6.1.4.1.4203.1.9.1.3"
+SYNC_INFO_OID = "1.3.6.1.4.1.4203.1.9.1.4"
+
+MODES = ("persist", "poll")
+_REFRESH_ONLY = 1
+_REFRESH_AND_PERSIST = 3
+_STATES = {0: "present", 1: "add", 2: "modify", 3: "delete"}
+# unavailableCriticalExtension: no syncprov on this server/database.
+_UNAVAILABLE_EXTENSION = 12
+# e-syncRefreshRequired: the cookie is too old, start over without it.
+_SYNC_REFRESH_REQUIRED = 4096
+_MAX_RECONNECT_DELAY = 60.0
+
+
+@dataclass
+class ChangeEvent:
+    """
+    One change of a watched entry.
+
+    Attributes:
+        type (str): ``add``, ``modify``, ``delete`` or ``moddn`` (renamed or
+            moved, e.g. a moderated user going from pending users to users).
+        dn (str | None): Current DN (for a delete, the DN it had).
+        target (str | None): ``users``, ``pending_users``, ``roles`` or
+            ``orgs`` for ``dn``; None when it left the watched branches.
+        entry_uuid (str): ``entryUUID`` of the entry.
+        attributes (dict): Requested attributes (whole entry) after the
+            change; empty for deletes.
+        old_dn (str | None): Previous DN of a ``moddn``.
+        old_target (str | None): Previous target of a ``moddn``.
+    """
+
+    type: str
+    dn: str | None
+    target: str | None
+    entry_uuid: str
+    attributes: dict = field(default_factory=dict)
+    old_dn: str | None = None
+    old_target: str | None = None
+
+
+class FileCookieStore:
+    """
+    Sync cookies kept in a JSON file (one per server and search root),
+    rewritten atomically after each applied batch of changes.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path, encoding="utf-8") as handle:
+                return json.load(handle)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError):
+            logger.warning("Ignoring unreadable sync cookie file %s", self.path)
+            return {}
+
+    def load(self, key: str) -> bytes | None:
+        value = self._read().get(key)
+        return base64.b64decode(value) if value else None
+
+    def save(self, key: str, cookie: bytes | None) -> None:
+        data = self._read()
+        if cookie is None:
+            data.pop(key, None)
+        else:
+            data[key] = base64.b64encode(cookie).decode("ascii")
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".sync-cookies-")
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(data, handle)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            logger.warning("Could not write sync cookie file %s", self.path, exc_info=True)
+
+
+# Minimal BER for the three syncrepl values; ldap3 only carries them as raw bytes.
+
+def _ber(tag: int, payload: bytes) -> bytes:
+    length = len(payload)
+    if length < 0x80:
+        header = bytes([length])
+    else:
+        raw = length.to_bytes((length.bit_length() + 7) // 8, "big")
+        header = bytes([0x80 | len(raw)]) + raw
+    return bytes([tag]) + header + payload
+
+
+def _ber_items(data: bytes) -> list:
+    items, i = [], 0
+    while i < len(data):
+        tag, length = data[i], data[i + 1]
+        i += 2
+        if length & 0x80:
+            count = length & 0x7F
+            length = int.from_bytes(data[i:i + count], "big")
+            i += count
+        items.append((tag, data[i:i + length]))
+        i += length
+    return items
+
+
+def sync_request_control(mode: int, cookie: bytes | None = None, reload_hint: bool = False) -> tuple:
+    """
+    Return the ldap3 ``(oid, criticality, value)`` Sync Request control.
+    """
+    payload = _ber(0x0A, bytes([mode]))
+    if cookie:
+        payload += _ber(0x04, cookie)
+    if reload_hint:
+        payload += _ber(0x01, b"\xff")
+    return SYNC_REQUEST_OID, True, _ber(0x30, payload)
+
+
+def decode_sync_state(value: bytes) -> tuple:
+    """
+    Decode a Sync State control value: ``(state, entry_uuid, cookie)``.
+    """
+    items = _ber_items(_ber_items(value)[0][1])
+    state = _STATES[int.from_bytes(items[0][1], "big")]
+    entry_uuid = str(uuid.UUID(bytes=bytes(items[1][1])))
+    cookie = bytes(items[2][1]) if len(items) > 2 else None
+    return state, entry_uuid, cookie
+
+
+def decode_sync_done(value: bytes) -> tuple:
+    """
+    Decode a Sync Done control value: ``(cookie, refresh_deletes)``.
+    """
+    cookie, refresh_deletes = None, False
+    for tag, item in _ber_items(_ber_items(value)[0][1]) if value else ():
+        if tag == 0x04:
+            cookie = bytes(item)
+        elif tag == 0x01:
+            refresh_deletes = item != b"\x00"
+    return cookie, refresh_deletes
+
+
+def decode_sync_info(value: bytes) -> dict:
+    """
+    Decode a Sync Info message value into ``{"kind", "cookie",
+    "refresh_done", "refresh_deletes", "uuids"}``; ``kind`` is one of
+    ``new_cookie``, ``refresh_delete``, ``refresh_present``, ``id_set``.
+    """
+    tag, body = _ber_items(value)[0]
+    info = {"kind": None, "cookie": None, "refresh_done": True, "refresh_deletes": False, "uuids": []}
+    if tag == 0x80:
+        info.update(kind="new_cookie", cookie=bytes(body))
+        return info
+    info["kind"] = {0xA1: "refresh_delete", 0xA2: "refresh_present", 0xA3: "id_set"}[tag]
+    for item_tag, item in _ber_items(body):
+        if item_tag == 0x04:
+            info["cookie"] = bytes(item)
+        elif item_tag == 0x01:
+            flag = item != b"\x00"
+            info["refresh_deletes" if info["kind"] == "id_set" else "refresh_done"] = flag
+        elif item_tag == 0x31:
+            info["uuids"] = [str(uuid.UUID(bytes=bytes(raw))) for _, raw in _ber_items(item)]
+    return info
+
+
+def _control_value(response: dict, oid: str) -> bytes | None:
+    control = (response.get("controls") or {}).get(oid)
+    return control.get("value") if control else None
+
+
+class ChangeFeed:
+    """
+    Turn syncrepl responses into :class:`ChangeEvent` objects.
+
+    A single sync search rooted at ``settings.search_base`` covers every
+    watched branch, so moves between branches (moderation) keep their
+    ``entryUUID`` and come out as ``moddn``. The feed remembers the DN of
+    each watched ``entryUUID``: it tells adds from modifies and moves, names
+    the entries of UUID-only deletes, and finds the entries deleted during a
+    present-phase refresh. That index is in memory only: deletions made while
+    no watcher ran are reported on restart only if the provider keeps a
+    ``syncprov-sessionlog`` (delete phase).
+
+    Iterating over :meth:`events` blocks and yields events until ``stop`` is
+    set or the consumer stops iterating. Each batch of events is applied to
+    the ``mirrors`` (objects with an ``apply_changes(events)`` method, such
+    as :class:`~georchestra_ldap.cache.DirectoryCache` and
+    :class:`~georchestra_ldap.snapshot.DirectorySnapshot`) before being
+    yielded, and the cookie is saved once the consumer asked for the next
+    event (at-least-once delivery).
+
+    Args:
+        pool (ConnectionPool): Pool used by ``poll`` mode.
+        settings (LdapSettings): Directory layout and connection parameters.
+        bases (Iterable[str] | None): Watched targets (``users``,
+            ``pending_users``, ``roles``, ``orgs``); all by default.
+        mode (str): ``persist`` or ``poll``.
+        cookie_store: Object with ``load(key)``/``save(key, cookie)``, or a
+            JSON file path; defaults to ``settings.sync_cookie_path``.
+        attributes (Iterable[str] | None): Attributes sent with each change; all user attributes by default.
+        interval (float): Seconds between two polls in ``poll`` mode.
+        initial (bool): Also yield the entries of the first full refresh,
+            when no cookie was saved yet (as ``add`` events).
+        mirrors (Iterable): Objects updated from the feed.
+        stop (threading.Event | None): Set it to end the iteration from another thread.
+        connect (Callable | None): Opens the ``ASYNC_STREAM`` connection of ``persist`` mode.
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        settings: LdapSettings,
+        bases: Iterable[str] | None = None,
+        mode: str = "persist",
+        cookie_store=None,
+        attributes: Iterable[str] | None = None,
+        interval: float = 30.0,
+        initial: bool = False,
+        mirrors: Iterable = (),
+        stop: threading.Event | None = None,
+        connect: Callable[[], Connection] | None = None,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unsupported watch mode: {mode}")
+        self._pool = pool
+        self.settings = settings
+        self.mode = mode
+        self.bases = target_bases(settings, bases)
+        self.root = settings.search_base
+        self.attributes = list(attributes) if attributes else ["*"]
+        self.interval = interval
+        self.initial = initial
+        self.mirrors = list(mirrors)
+        self.stop = stop or threading.Event()
+        self._connect = connect or self._default_connect
+        if isinstance(cookie_store, (str, os.PathLike)):
+            cookie_store = FileCookieStore(os.fspath(cookie_store))
+        elif cookie_store is None and settings.sync_cookie_path:
+            cookie_store = FileCookieStore(settings.sync_cookie_path)
+        self.cookie_store = cookie_store
+        self.key = f"{server_key(settings)}|{self.root}"
+        self.cookie = cookie_store.load(self.key) if cookie_store is not None else None
+        self._saved_cookie = self.cookie
+        self._index: dict = {}  # entryUUID -> DN, watched entries only
+        self._seen: set = set()  # entryUUIDs reported during the current refresh
+        self._quiet = False  # first full refresh, not yielded unless ``initial``
+
+    def _default_connect(self) -> Connection:
+        from ldap3 import ASYNC_STREAM
+
+        from georchestra_ldap.connection import open_connection
+
+        return open_connection(self.settings, client_strategy=ASYNC_STREAM)
+
+    def target_of(self, dn: str | None) -> str | None:
+        """
+        Return the watched target containing ``dn``, or None.
+        """
+        if not dn:
+            return None
+        dn = dn.lower()
+        for target, base in self.bases:
+            if dn.endswith("," + base.lower()):
+                return target
+        return None
+
+    # --- syncrepl messages -> events
+
+    def _entry(self, response: dict) -> ChangeEvent | None:
+        value = _control_value(response, SYNC_STATE_OID)
+        if value is None:
+            raise ChangeFeedUnavailable("The server answered without Sync State controls (no syncprov overlay?).")
+        state, entry_uuid, cookie = decode_sync_state(value)
+        if cookie:
+            self.cookie = cookie
+        dn = response.get("dn")
+        if state == "delete":
+            return self._deleted(entry_uuid, dn)
+        self._seen.add(entry_uuid)
+        old_dn = self._index.get(entry_uuid)
+        target, old_target = self.target_of(dn), self.target_of(old_dn)
+        if target is None:
+            self._index.pop(entry_uuid, None)
+        else:
+            self._index[entry_uuid] = dn
+        if state == "present" or (target is None and old_target is None):
+            return None
+        if old_dn is not None and old_dn.lower() != dn.lower():
+            kind = "moddn"
+        elif old_dn is not None:
+            kind = "modify"
+        else:
+            kind = state
+        return ChangeEvent(
+            kind, dn, target, entry_uuid, dict(response.get("attributes") or {}),
+            old_dn if kind == "moddn" else None, old_target if kind == "moddn" else None,
+        )
+
+    def _deleted(self, entry_uuid: str, dn: str | None = None) -> ChangeEvent | None:
+        known = self._index.pop(entry_uuid, None)
+        dn = dn or known
+        target = self.target_of(dn)
+        if target is None:
+            return None
+        return ChangeEvent("delete", dn, target, entry_uuid)
+
+    def _info(self, value: bytes, events: list) -> bool:
+        """
+        Apply a Sync Info message; return True when it ends the refresh phase.
+        """
+        info = decode_sync_info(value)
+        if info["cookie"]:
+            self.cookie = info["cookie"]
+        if info["kind"] == "id_set":
+            if info["refresh_deletes"]:
+                events.extend(event for event in map(self._deleted, info["uuids"]) if event is not None)
+            else:
+                self._seen.update(info["uuids"])
+            return False
+        if info["kind"] in ("refresh_present", "refresh_delete") and info["refresh_done"]:
+            if info["kind"] == "refresh_present":
+                self._drop_absent(events)
+            return True
+        return False
+
+    def _drop_absent(self, events: list) -> None:
+        # Present phase: watched entries the server did not mention are gone.
+        absent = [entry_uuid for entry_uuid in self._index if entry_uuid not in self._seen]
+        events.extend(event for event in map(self._deleted, absent) if event is not None)
+
+    def _start_refresh(self) -> None:
+        self._seen = set()
+        # Only the very first full load is quiet; a reload after an expired
+        # cookie is reported so that mirrors catch up.
+        self._quiet = self.cookie is None and not self._index and not self.initial
+
+    def _handle(self, response: dict, events: list) -> bool:
+        """
+        Apply one search response; return True when it ends the refresh phase.
+        """
+        kind = response.get("type")
+        if kind == "searchResEntry":
+            event = self._entry(response)
+            if event is not None and not self._quiet:
+                events.append(event)
+        elif kind == "intermediateResponse" and response.get("responseName") == SYNC_INFO_OID:
+            return self._info(response["responseValue"], events)
+        return False
+
+    def _deliver(self, events: list) -> Iterator[ChangeEvent]:
+        if self._quiet:
+            events = []
+        if events:
+            for mirror in self.mirrors:
+                mirror.apply_changes(events)
+        yield from events
+        if self.cookie != self._saved_cookie and self.cookie_store is not None:
+            self.cookie_store.save(self.key, self.cookie)
+        self._saved_cookie = self.cookie
+
+    # --- transports
+
+    def events(self) -> Iterator[ChangeEvent]:
+        """
+        Yield change events until ``stop`` is set, reconnecting (with the
+        last cookie) after connection errors.
+
+        Raises:
+            ChangeFeedUnavailable: The server does not support syncrepl.
+        """
+        run = self._persist if self.mode == "persist" else self._poll
+        delay = 1.0
+        while not self.stop.is_set():
+            try:
+                for event in run():
+                    delay = 1.0
+                    yield event
+            except LDAPException as exc:
+                logger.warning("Change feed interrupted (%s), reconnecting in %.0fs", exc, delay)
+                self.stop.wait(delay)
+                delay = min(delay * 2, _MAX_RECONNECT_DELAY)
+
+    def _poll(self) -> Iterator[ChangeEvent]:
+        while not self.stop.is_set():
+            self._start_refresh()
+            events = []
+            with self._pool.connection() as conn:
+                conn.search(
+                    self.root, "(objectClass=*)", search_scope=SUBTREE, attributes=self.attributes,
+                    controls=[sync_request_control(_REFRESH_ONLY, self.cookie)],
+                )
+                for response in conn.response or ():
+                    self._handle(response, events)
+                result = conn.result or {}
+            if self._failed(result):
+                continue
+            done = _control_value(result, SYNC_DONE_OID)
+            cookie, refresh_deletes = decode_sync_done(done) if done is not None else (None, False)
+            if cookie:
+                self.cookie = cookie
+            if not refresh_deletes:
+                self._drop_absent(events)
+            yield from self._deliver(events)
+            self._quiet = False
+            self.stop.wait(self.interval)
+
+    def _persist(self) -> Iterator[ChangeEvent]:
+        conn = self._connect()
+        search = conn.extend.standard.persistent_search(
+            self.root, "(objectClass=*)", search_scope=SUBTREE, attributes=self.attributes,
+            controls=[sync_request_control(_REFRESH_AND_PERSIST, self.cookie)],
+            notifications=False, streaming=False,
+        )
+        self._start_refresh()
+        refreshing, events = True, []
+        try:
+            while not self.stop.is_set():
+                response = search.next(block=True, timeout=1.0)
+                if response is None and (conn.closed or not conn.listening):
+                    # The receiver thread closes the connection on a dropped
+                    # socket and queues nothing: reconnect from the cookie.
+                    raise LDAPCommunicationError("change feed connection lost")
+                # Drain what is already queued: mirrors get one batch.
+                while response is not None:
+                    if response.get("type") == "searchResDone":
+                        yield from self._deliver(events)
+                        if not self._failed(response):
+                            raise LDAPException("sync search ended by the server")
+                        return
+                    if self._handle(response, events) and refreshing:
+                        refreshing = False
+                        yield from self._deliver(events)
+                        self._quiet = False
+                        events = []
+                    response = search.next(block=False)
+                # The refresh phase is delivered as a whole, at its end.
+                if not refreshing and events:
+                    yield from self._deliver(events)
+                    events = []
+        finally:
+            try:
+                search.stop()
+            except LDAPException:
+                pass
+
+    def _failed(self, result: dict) -> bool:
+        """
+        Check the result of a sync search; return True when it must be
+        retried without cookie.
+
+        Raises:
+            ChangeFeedUnavailable: The server does not support syncrepl.
+            LDAPException: Any other error (the feed reconnects).
+        """
+        code = result.get("result", 0)
+        if code == _SYNC_REFRESH_REQUIRED:
+            logger.warning("Sync cookie expired on %s, refreshing from scratch", self.settings.server)
+            self.cookie = None
+            return True
+        if code == _UNAVAILABLE_EXTENSION:
+            raise ChangeFeedUnavailable(f"Sync requests are not supported by {self.settings.server}.")
+        if code != 0:
+            raise LDAPException(f"sync search failed: {result.get('description')} {result.get('message')}")
+        return False
@@ -6,71 +6,62 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from ldap3 import MODIFY_ADD, MODIFY_DELETE
+from ldap3.utils.conv import escape_filter_chars
 
-from ldap_connection import get_connection
-import config
+from ldap_connection import get_connection, get_config, find_user_dn, read_entry
+from ldap_actions.results import ERROR, NOT_FOUND, UNCHANGED, UPDATED, UserResult, format_result
 
 
-def add_user_to_org(email: str, org_cn: str):
+def add_user_to_org(email: str, org_cn: str) -> UserResult:
     """
-    Add a user (by email) to an organization group.
+    Add a user (by email) to an organization group, removing them from
+    any other organization.
 
     Args:
         email (str): User email.
         org_cn (str): Organization common name.
     """
     conn = get_connection()
+    config = get_config()
 
     # Find user DN by email
-    conn.search(
-        search_base=config.LDAP_SEARCH_BASE,
-        search_filter=f"({config.LDAP_MAIL_ATTRIBUTE}={email})",
-        attributes=[],
-    )
-    if not conn.entries:
-        print(f"User not found: {email}")
-        return
+    user_dn = find_user_dn(conn, email)
+    if user_dn is None:
+        return UserResult("add_user_org", NOT_FOUND, f"User not found: {email}", mail=email)
 
-    user_dn = conn.entries[0].entry_dn
     org_dn = f"cn={org_cn},{config.LDAP_ORG_DN},{config.LDAP_SEARCH_BASE}"
 
-    # Check org exists
+    # Check org exists (base read, without its member list)
+    if read_entry(conn, org_dn) is None:
+        return UserResult("add_user_org", NOT_FOUND, f"Organization not found: {org_cn}", dn=user_dn, mail=email)
+
+    # Orgs the user currently belongs to (DNs only)
     conn.search(
         search_base=f"{config.LDAP_ORG_DN},{config.LDAP_SEARCH_BASE}",
-        search_filter=f"(cn={org_cn})",
-        attributes=["member"],
+        search_filter=f"(member={escape_filter_chars(user_dn)})",
+        attributes=[],
     )
-    if not conn.entries:
-        print(f"Organization not found: {org_cn}")
-        return
-
-    org_entry = conn.entries[0]
+    current_orgs = [entry.entry_dn for entry in conn.entries]
 
     # If already in target org, do nothing.
-    if "member" in org_entry and user_dn in org_entry.member.values:
-        print(f"User already in organization: {org_cn}")
-        return
+    if any(dn.lower() == org_dn.lower() for dn in current_orgs):
+        return UserResult("add_user_org", UNCHANGED, f"User already in organization: {org_cn}",
+                          dn=user_dn, mail=email, org=org_cn)
 
     # Remove user from any other orgs first
-    conn.search(
-        search_base=f"{config.LDAP_ORG_DN},{config.LDAP_SEARCH_BASE}",
-        search_filter=f"(member={user_dn})",
-        attributes=["member"],
-    )
-    for existing_org in conn.entries:
-        if existing_org.entry_dn != org_dn and "member" in existing_org:
-            try:
-                conn.modify(existing_org.entry_dn, {"member": [(MODIFY_DELETE, [user_dn])]})
-                print(f"Removed {user_dn} from {existing_org.entry_dn}")
-            except Exception as e:
-                print(f"Error removing user from {existing_org.entry_dn}: {e}")
-
-    print(f"Adding {user_dn} to {org_dn}")
-    try:
-        conn.modify(org_dn, {"member": [(MODIFY_ADD, [user_dn])]})
-        print("Organization update successful.")
-    except Exception as e:
-        print("Error adding user to organization:", e)
+    for existing_org_dn in current_orgs:
+        if not conn.modify(existing_org_dn, {"member": [(MODIFY_DELETE, [user_dn])]}):
+            return UserResult(
+                "add_user_org", ERROR,
+                f"Error removing user from {existing_org_dn}: {conn.result.get('description')}",
+                dn=user_dn, mail=email,
+            )
+
+    if not conn.modify(org_dn, {"member": [(MODIFY_ADD, [user_dn])]}):
+        return UserResult("add_user_org", ERROR,
+                          f"Error adding user to organization: {conn.result.get('description')}", dn=user_dn, mail=email)
+
+    return UserResult("add_user_org", UPDATED, "Organization update successful.", dn=user_dn, mail=email, org=org_cn)
 
 
 if __name__ == "__main__":
@@ -78,4 +69,4 @@ if __name__ == "__main__":
         print("Usage: python add_user_org.py <email> <ORG_CN>")
         sys.exit(1)
 
-    add_user_to_org(sys.argv[1], sys.argv[2])
+    print(format_result(add_user_to_org(sys.argv[1], sys.argv[2])))
@@ -1,30 +1,34 @@
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from ldap_connection import get_connection
-import config
+from ldap_connection import get_connection, get_config, read_entry
+from ldap_actions.results import CREATED, ERROR, UNCHANGED, GroupResult, format_result
 
-def create_org(org_cn, org_name=None):
+
+def create_org(org_cn, org_name=None) -> GroupResult:
     conn = get_connection()
-    org_dn = f"cn={org_cn},{config.LDAP_ORG_DN},{config.LDAP_SEARCH_BASE}"
+    config = get_config()
 
-    conn.search(org_dn, "(objectClass=*)")
+    org_dn = f"cn={org_cn},{config.LDAP_ORG_DN},{config.LDAP_SEARCH_BASE}"
 
-    if conn.entries:
-        print("Organization exists already.")
-        return
+    if read_entry(conn, org_dn) is not None:
+        return GroupResult("create_org", UNCHANGED, "Organization exists already.", dn=org_dn, cn=org_cn)
 
     attrs = {
         "cn": org_cn,
         "o": org_name if org_name else org_cn
     }
 
-    conn.add(org_dn, ["groupOfMembers", "top", "georchestraOrg"], attrs)
-    print(f"Organization created: {org_cn}")
+    if not conn.add(org_dn, ["groupOfMembers", "top", "georchestraOrg"], attrs):
+        return GroupResult("create_org", ERROR, f"Error while creating organization: {conn.result.get('description')}",
+                           cn=org_cn)
+
+    return GroupResult("create_org", CREATED, f"Organization created: {org_cn}", dn=org_dn, cn=org_cn, members=[])
+
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python create_org.py <org_cn> [name]")
         exit(1)
 
-    create_org(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    print(format_result(create_org(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)))
@@ -3,28 +3,23 @@
 import sys, os, uuid
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from ldap_connection import get_connection
-import config
+from ldap_connection import get_connection, get_config, read_entry
+from ldap_actions.results import CREATED, ERROR, UNCHANGED, GroupResult, format_result
 
 
-def create_role(role_cn: str, description: str = "Role created via script", members=None):
+def create_role(role_cn: str, description: str = "Role created via script", members=None) -> GroupResult:
     conn = get_connection()
+    config = get_config()
 
     role_dn = f"cn={role_cn},{config.LDAP_ROLE_DN},{config.LDAP_SEARCH_BASE}"
 
     # Vérifier si le rôle existe déjà
-    conn.search(
-        search_base=f"{config.LDAP_ROLE_DN},{config.LDAP_SEARCH_BASE}",
-        search_filter=f"(cn={role_cn})",
-        attributes=["cn"]
-    )
-
-    if conn.entries:
-        print(f"Role already exists: {role_cn}")
-        return role_dn
+    if read_entry(conn, role_dn) is not None:
+        return GroupResult("create_role", UNCHANGED, f"Role already exists: {role_cn}", dn=role_dn, cn=role_cn)
 
     if members is None:
         members = []
+    members = list(members)
 
     # UUID geOrchestra
     uuid_value = str(uuid.uuid4())
@@ -43,16 +38,12 @@ def create_role(role_cn: str, description: str = "Role created via script", memb
     if members:
         attributes["member"] = members
 
-    print(f"Creating role: {role_dn}")
-
-    try:
-        conn.add(role_dn, attributes=attributes)
-        print("Role successfully created.")
-    except Exception as e:
-        print("Error while creating role:", e)
-        return None
+    if not conn.add(role_dn, attributes=attributes):
+        return GroupResult("create_role", ERROR, f"Error while creating role: {conn.result.get('description')}",
+                           cn=role_cn)
 
-    return role_dn
+    return GroupResult("create_role", CREATED, "Role successfully created.", dn=role_dn, cn=role_cn,
+                       description=description, members=members)
 
 
 if __name__ == "__main__":
@@ -63,4 +54,4 @@ if __name__ == "__main__":
     role_cn = sys.argv[1]
     description = sys.argv[2] if len(sys.argv) > 2 else "Role created via script"
 
-    create_role(role_cn, description)
+    print(format_result(create_role(role_cn, description)))
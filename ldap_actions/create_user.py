@@ -1,45 +1,22 @@
 #!/usr/bin/env python3
 
-import sys, os, uuid, hashlib, base64
+import sys, os, uuid
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from ldap3 import MODIFY_ADD
-from ldap_connection import get_connection
-import config
+from georchestra_ldap.hashing import ssha
+from ldap_connection import get_connection, get_config, get_password_hasher, read_entry
+from ldap_actions.results import CREATED, ERROR, UNCHANGED, UserResult, format_result
 
 
 def hash_password(password: str) -> str:
-    """Retourne un mot de passe LDAP au format SSHA."""
-    salt = os.urandom(4)
-    sha = hashlib.sha1(password.encode("utf-8"))
-    sha.update(salt)
-    digest = sha.digest() + salt
-    return "{SSHA}" + base64.b64encode(digest).decode()
+    """Retourne un mot de passe LDAP au format SSHA (voir georchestra_ldap.hashing pour les autres schémas)."""
+    return ssha(password)
 
 
-def create_user(uid: str, email: str, given_name: str, sn: str, password: str):
-    conn = get_connection()
-
-    user_dn = f"uid={uid},ou=pendingusers,{config.LDAP_SEARCH_BASE}"
-
-    # Vérifier si l'utilisateur existe déjà
-    conn.search(
-        search_base=config.LDAP_SEARCH_BASE,
-        search_filter=f"(uid={uid})",
-        search_scope="SUBTREE",
-        attributes=["uid"]
-    )
-    if conn.entries:
-        print(f"User already exists: {uid}")
-        return
-
-    # Générer un UUID geOrchestra
-    uuid_value = str(uuid.uuid4())
-
-    # Hash du password
-    hashed_pwd = hash_password(password)
-
-    attributes = {
+def build_user_attributes(uid: str, email: str, given_name: str, sn: str, hashed_pwd: str) -> dict:
+    """Attributs d'une nouvelle entrée utilisateur geOrchestra."""
+    return {
         "objectClass": [
             "georchestraUser",
             "organizationalPerson",
@@ -55,38 +32,52 @@ def create_user(uid: str, email: str, given_name: str, sn: str, password: str):
         "givenName": given_name,
         "description": "USER",
         "knowledgeInformation": f"Auto-created ({uid})",
-        "georchestraObjectIdentifier": uuid_value,
+        # UUID geOrchestra
+        "georchestraObjectIdentifier": str(uuid.uuid4()),
         "userPassword": hashed_pwd
     }
 
-    print(f"Creating user: {user_dn}")
 
-    try:
-        conn.add(user_dn, attributes=attributes)
-        print("User successfully created in ou=pendingusers.")
-    except Exception as e:
-        print("Error while creating user:", e)
-        return
+def create_user(uid: str, email: str, given_name: str, sn: str, password: str) -> UserResult:
+    conn = get_connection()
+    config = get_config()
+
+    user_dn = f"uid={uid},{config.LDAP_PENDING_USERS_DN},{config.LDAP_SEARCH_BASE}"
+
+    # Vérifier si l'utilisateur existe déjà : le uid est le RDN, donc deux
+    # lectures directes (users puis pending users) suffisent
+    for existing_dn in (f"uid={uid},{config.LDAP_USERS_DN},{config.LDAP_SEARCH_BASE}", user_dn):
+        if read_entry(conn, existing_dn) is not None:
+            return UserResult("create_user", UNCHANGED, f"User already exists: {uid}",
+                              dn=existing_dn, uid=uid, mail=email)
+
+    # Hash du password (schéma configuré, SSHA par défaut)
+    hashed_pwd = get_password_hasher()(password)
+
+    attributes = build_user_attributes(uid, email, given_name, sn, hashed_pwd)
+
+    if not conn.add(user_dn, attributes=attributes):
+        return UserResult("create_user", ERROR, f"Error while creating user: {conn.result.get('description')}",
+                          uid=uid, mail=email)
+
+    result = UserResult("create_user", CREATED, "User successfully created in ou=pendingusers.",
+                        dn=user_dn, uid=uid, mail=email, pending=True)
 
     # === Ajouter USER role ===
-    user_role_dn = f"cn=USER,{config.LDAP_ROLE_DN},{config.LDAP_SEARCH_BASE}"
-    print(f"Adding user to USER role → {user_role_dn}")
-    try:
-        conn.modify(user_role_dn, {"member": [(MODIFY_ADD, [user_dn])]})
-        print("Added USER role.")
-    except Exception as e:
-        print("Error adding USER role:", e)
+    user_role_dn = f"cn={config.LDAP_DEFAULT_ROLE_CN},{config.LDAP_ROLE_DN},{config.LDAP_SEARCH_BASE}"
+    if conn.modify(user_role_dn, {"member": [(MODIFY_ADD, [user_dn])]}):
+        result.roles = [config.LDAP_DEFAULT_ROLE_CN]
+    else:
+        result.message += f" Error adding {config.LDAP_DEFAULT_ROLE_CN} role: {conn.result.get('description')}"
 
     # === Ajouter organization C2C ===
-    org_dn = f"cn=C2C,{config.LDAP_ORG_DN},{config.LDAP_SEARCH_BASE}"
-    print(f"Adding user to organization C2C → {org_dn}")
-    try:
-        conn.modify(org_dn, {"member": [(MODIFY_ADD, [user_dn])]})
-        print("Added to organization C2C.")
-    except Exception as e:
-        print("Error adding organization C2C:", e)
+    org_dn = f"cn={config.LDAP_DEFAULT_ORG_CN},{config.LDAP_ORG_DN},{config.LDAP_SEARCH_BASE}"
+    if conn.modify(org_dn, {"member": [(MODIFY_ADD, [user_dn])]}):
+        result.org = config.LDAP_DEFAULT_ORG_CN
+    else:
+        result.message += f" Error adding organization {config.LDAP_DEFAULT_ORG_CN}: {conn.result.get('description')}"
 
-    return user_dn
+    return result
 
 
 if __name__ == "__main__":
@@ -95,4 +86,4 @@ if __name__ == "__main__":
         sys.exit(1)
 
     _, uid, email, given, sn, pwd = sys.argv
-    create_user(uid, email, given, sn, pwd)
+    print(format_result(create_user(uid, email, given, sn, pwd)))
@@ -4,48 +4,34 @@ import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 from ldap3 import MODIFY_DELETE
-from ldap_connection import get_connection
-import config
+from ldap_connection import get_connection, get_config, read_entry
+from ldap_actions.results import DELETED, ERROR, NOT_FOUND, GroupResult, format_result
 
 
-def delete_role(role_cn: str):
+def delete_role(role_cn: str) -> GroupResult:
     conn = get_connection()
+    config = get_config()
 
     role_dn = f"cn={role_cn},{config.LDAP_ROLE_DN},{config.LDAP_SEARCH_BASE}"
 
     # 1) Vérifier si le rôle existe
-    conn.search(
-        search_base=f"{config.LDAP_ROLE_DN},{config.LDAP_SEARCH_BASE}",
-        search_filter=f"(cn={role_cn})",
-        attributes=["member"]
-    )
-
-    if not conn.entries:
-        print(f"Role not found: {role_cn}")
-        return
-
-    role_entry = conn.entries[0]
-
-    # 2) Retirer tous les membres du rôle
-    if "member" in role_entry:
-        print("Removing all members from role...")
-        for member_dn in role_entry.member.values:
-            try:
-                conn.modify(
-                    role_dn,
-                    {"member": [(MODIFY_DELETE, [member_dn])]}
-                )
-                print(f" - Removed {member_dn}")
-            except Exception as e:
-                print(f"Error removing member {member_dn}: {e}")
+    role_entry = read_entry(conn, role_dn, ["member"])
+    if role_entry is None:
+        return GroupResult("delete_role", NOT_FOUND, f"Role not found: {role_cn}", cn=role_cn)
+
+    members = list(role_entry.member.values) if "member" in role_entry else []
+
+    # 2) Retirer tous les membres du rôle (une seule modification)
+    if members and not conn.modify(role_dn, {"member": [(MODIFY_DELETE, [])]}):
+        return GroupResult("delete_role", ERROR, f"Error removing members: {conn.result.get('description')}",
+                           dn=role_dn, cn=role_cn, members=members)
 
     # 3) Supprimer le rôle
-    print(f"Deleting role: {role_dn}")
-    try:
-        conn.delete(role_dn)
-        print("Role successfully deleted.")
-    except Exception as e:
-        print("Error deleting role:", e)
+    if not conn.delete(role_dn):
+        return GroupResult("delete_role", ERROR, f"Error deleting role: {conn.result.get('description')}",
+                           dn=role_dn, cn=role_cn, members=[])
+
+    return GroupResult("delete_role", DELETED, "Role successfully deleted.", dn=role_dn, cn=role_cn, members=members)
 
 
 if __name__ == "__main__":
@@ -53,4 +39,4 @@ if __name__ == "__main__":
         print("Usage: python delete_role.py <role_cn>")
         sys.exit(1)
 
-    delete_role(sys.argv[1])
+    print(format_result(delete_role(sys.argv[1])))
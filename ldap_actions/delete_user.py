@@ -3,53 +3,31 @@
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from ldap_connection import get_connection
-import config
+from ldap3 import MODIFY_DELETE
+from ldap_connection import get_connection, find_user_memberships
+from ldap_actions.results import DELETED, ERROR, NOT_FOUND, UserResult, format_result
 
 
-def delete_user(email: str):
+def delete_user(email: str) -> UserResult:
     conn = get_connection()
 
     # 1) Trouver l'utilisateur par email
-    conn.search(
-        search_base=config.LDAP_SEARCH_BASE,
-        search_filter=f"({config.LDAP_MAIL_ATTRIBUTE}={email})",
-        search_scope="SUBTREE",
-        attributes=["uid", "memberOf"]
-    )
-
-    if not conn.entries:
-        print(f"User not found: {email}")
-        return
-
-    user = conn.entries[0]
-    user_dn = user.entry_dn
-
-    print(f"Found user: {user_dn}")
+    user_dn, groups = find_user_memberships(conn, email)
+    if user_dn is None:
+        return UserResult("delete_user", NOT_FOUND, f"User not found: {email}", mail=email)
 
     # 2) Retirer l'utilisateur de tous ses rôles
-    if "memberOf" in user:
-        print("Removing user from roles...")
-        for role_dn in user.memberOf.values:
-            try:
-                conn.modify(
-                    role_dn,
-                    {"member": [(conn.MODIFY_DELETE, [user_dn])]}
-                )
-                print(f" - Removed from {role_dn}")
-            except Exception as e:
-                print(f"Error removing from {role_dn}: {e}")
+    removed_from = []
+    for role_dn in groups:
+        if conn.modify(role_dn, {"member": [(MODIFY_DELETE, [user_dn])]}):
+            removed_from.append(role_dn)
 
     # 3) Supprimer l'utilisateur
-    print(f"Deleting user entry: {user_dn}")
-    try:
-        conn.delete(user_dn)
-        print("User successfully deleted.")
-    except Exception as e:
-        print("Error deleting user:", e)
-        return
+    if not conn.delete(user_dn):
+        return UserResult("delete_user", ERROR, f"Error deleting user: {conn.result.get('description')}",
+                          dn=user_dn, mail=email, groups=removed_from)
 
-    return True
+    return UserResult("delete_user", DELETED, "User successfully deleted.", dn=user_dn, mail=email, groups=removed_from)
 
 
 if __name__ == "__main__":
@@ -57,4 +35,4 @@ if __name__ == "__main__":
         print("Usage: python delete_user.py <email>")
         sys.exit(1)
 
-    delete_user(sys.argv[1])
+    print(format_result(delete_user(sys.argv[1])))
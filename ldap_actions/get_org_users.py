@@ -5,41 +5,28 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from ldap_connection import get_connection
-import config
+from ldap_connection import get_connection, get_config, read_entry
+from ldap_actions.results import NOT_FOUND, GroupResult, format_result
 
 
-def get_org_users(org_cn: str):
+def get_org_users(org_cn: str) -> GroupResult:
     """
-    Return and print the members (DNs) of an organization.
+    Return the members (DNs) of an organization.
 
     Args:
         org_cn (str): Common name of the organization.
     """
     conn = get_connection()
+    config = get_config()
 
     org_dn = f"cn={org_cn},{config.LDAP_ORG_DN},{config.LDAP_SEARCH_BASE}"
-    conn.search(
-        search_base=org_dn,
-        search_filter="(objectClass=*)",
-        attributes=["member"],
-    )
 
-    if not conn.entries:
-        print(f"Organization not found: {org_cn}")
-        return []
+    org_entry = read_entry(conn, org_dn, ["member"])
+    if org_entry is None:
+        return GroupResult("get_org_users", NOT_FOUND, f"Organization not found: {org_cn}", cn=org_cn, members=[])
 
-    org_entry = conn.entries[0]
     members = list(org_entry.member.values) if "member" in org_entry else []
-
-    print("=== Organization Members ===")
-    if members:
-        for m in members:
-            print(f"- {m}")
-    else:
-        print("No members")
-
-    return members
+    return GroupResult("get_org_users", dn=org_dn, cn=org_cn, members=members)
 
 
 if __name__ == "__main__":
@@ -47,4 +34,4 @@ if __name__ == "__main__":
         print("Usage: python get_org_users.py <ORG_CN>")
         sys.exit(1)
 
-    get_org_users(sys.argv[1])
+    print(format_result(get_org_users(sys.argv[1])))
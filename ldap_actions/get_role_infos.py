@@ -5,46 +5,34 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from ldap_connection import get_connection
-import config
+from ldap_connection import get_connection, get_config, read_entry
+from ldap_actions.results import NOT_FOUND, GroupResult, format_result
 
 
-def get_role_infos(role_cn: str):
+def get_role_infos(role_cn: str) -> GroupResult:
     """
-    Return the ldap3 entry for a role searched by cn and print its attributes/members.
+    Return a role searched by cn: DN, description and members.
     """
     conn = get_connection()
-
-    conn.search(
-        search_base=f"{config.LDAP_ROLE_DN},{config.LDAP_SEARCH_BASE}",
-        search_filter=f"(cn={role_cn})",
-        attributes=["cn", "description", "member"],
+    config = get_config()
+
+    role_dn = f"cn={role_cn},{config.LDAP_ROLE_DN},{config.LDAP_SEARCH_BASE}"
+    role = read_entry(conn, role_dn, ["cn", "description", "member"])
+    if role is None:
+        return GroupResult("get_role_infos", NOT_FOUND, f"Role not found: {role_cn}", cn=role_cn)
+
+    return GroupResult(
+        "get_role_infos",
+        dn=role.entry_dn,
+        cn=role.cn.value if "cn" in role else None,
+        description=role.description.value if "description" in role else None,
+        members=list(role.member.values) if "member" in role else [],
     )
 
-    if not conn.entries:
-        print(f"Role not found: {role_cn}")
-        return None
-
-    role = conn.entries[0]
-
-    print("=== Role Information ===")
-    print(f"DN: {role.entry_dn}")
-    print(f"cn: {role.cn.value if 'cn' in role else None}")
-    print(f"description: {role.description.value if 'description' in role else None}")
-
-    print("\nMembers:")
-    if "member" in role:
-        for m in role.member.values:
-            print(f" - {m}")
-    else:
-        print("No members")
-
-    return role
-
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python get_role_infos.py <ROLE_CN>")
         sys.exit(1)
 
-    get_role_infos(sys.argv[1])
+    print(format_result(get_role_infos(sys.argv[1])))
@@ -5,41 +5,28 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from ldap_connection import get_connection
-import config
+from ldap_connection import get_connection, get_config, read_entry
+from ldap_actions.results import NOT_FOUND, GroupResult, format_result
 
 
-def get_role_users(role_cn: str):
+def get_role_users(role_cn: str) -> GroupResult:
     """
-    Return and print the members (DNs) of a role.
+    Return the members (DNs) of a role.
 
     Args:
         role_cn (str): Common name of the role.
     """
     conn = get_connection()
+    config = get_config()
 
     role_dn = f"cn={role_cn},{config.LDAP_ROLE_DN},{config.LDAP_SEARCH_BASE}"
-    conn.search(
-        search_base=role_dn,
-        search_filter="(objectClass=*)",
-        attributes=["member"],
-    )
 
-    if not conn.entries:
-        print(f"Role not found: {role_cn}")
-        return []
+    role_entry = read_entry(conn, role_dn, ["member"])
+    if role_entry is None:
+        return GroupResult("get_role_users", NOT_FOUND, f"Role not found: {role_cn}", cn=role_cn, members=[])
 
-    role_entry = conn.entries[0]
     members = list(role_entry.member.values) if "member" in role_entry else []
-
-    print("=== Role Members ===")
-    if members:
-        for m in members:
-            print(f"- {m}")
-    else:
-        print("No members")
-
-    return members
+    return GroupResult("get_role_users", dn=role_dn, cn=role_cn, members=members)
 
 
 if __name__ == "__main__":
@@ -47,4 +34,4 @@ if __name__ == "__main__":
         print("Usage: python get_role_users.py <ROLE_CN>")
         sys.exit(1)
 
-    get_role_users(sys.argv[1])
+    print(format_result(get_role_users(sys.argv[1])))
@@ -5,47 +5,33 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from ldap_connection import get_connection
-import config
+from ldap_connection import get_connection, find_user
+from ldap_actions.results import NOT_FOUND, UserResult, format_result
 
 
-def get_user_infos(email: str):
+def get_user_infos(email: str) -> UserResult:
     """
-    Return the ldap3 entry for a user searched by email and print its main attributes.
+    Return a user searched by email: DN, uid, cn, mail and groups (memberOf).
     """
     conn = get_connection()
 
-    conn.search(
-        search_base=config.LDAP_SEARCH_BASE,
-        search_filter=f"({config.LDAP_MAIL_ATTRIBUTE}={email})",
-        attributes=["cn", "uid", "mail", "memberOf"],
+    user = find_user(conn, email, ["cn", "uid", "mail", "memberOf"])
+    if user is None:
+        return UserResult("get_user_infos", NOT_FOUND, "User not found.", mail=email)
+
+    return UserResult(
+        "get_user_infos",
+        dn=user.entry_dn,
+        uid=user.uid.value if "uid" in user else None,
+        cn=user.cn.value if "cn" in user else None,
+        mail=user.mail.value if "mail" in user else None,
+        groups=list(user.memberOf.values) if "memberOf" in user else [],
     )
 
-    if not conn.entries:
-        print("User not found.")
-        return None
-
-    user = conn.entries[0]
-
-    print("=== User Information ===")
-    print(f"DN: {user.entry_dn}")
-    print(f"uid: {user.uid.value if 'uid' in user else None}")
-    print(f"cn: {user.cn.value if 'cn' in user else None}")
-    print(f"mail: {user.mail.value if 'mail' in user else None}")
-
-    print("\nGroups (memberOf):")
-    if "memberOf" in user:
-        for m in user.memberOf.values:
-            print(f" - {m}")
-    else:
-        print("No groups")
-
-    return user
-
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python get_user_infos.py <email>")
         sys.exit(1)
 
-    get_user_infos(sys.argv[1])
+    print(format_result(get_user_infos(sys.argv[1])))
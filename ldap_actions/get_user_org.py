@@ -5,47 +5,33 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from ldap_connection import get_connection
-import config
+from ldap_connection import get_connection, get_config, find_user_memberships
+from ldap_actions.results import NOT_FOUND, UserResult, format_result
 
 
-def get_user_org(email: str):
+def get_user_org(email: str) -> UserResult:
     """
-    Return and print the organization CN for a user (by email).
+    Return the organization CN of a user (by email).
 
     Args:
         email (str): User email.
     """
     conn = get_connection()
+    config = get_config()
 
     # Find user
-    conn.search(
-        search_base=config.LDAP_SEARCH_BASE,
-        search_filter=f"({config.LDAP_MAIL_ATTRIBUTE}={email})",
-        attributes=["memberOf"],
-    )
-    if not conn.entries:
-        print(f"User not found: {email}")
-        return None
-
-    user = conn.entries[0]
+    user_dn, groups = find_user_memberships(conn, email)
+    if user_dn is None:
+        return UserResult("get_user_org", NOT_FOUND, f"User not found: {email}", mail=email)
 
     org_suffix = f"{config.LDAP_ORG_DN},{config.LDAP_SEARCH_BASE}"
     org_cn = None
+    for group_dn in groups:
+        if group_dn.endswith(org_suffix):
+            org_cn = group_dn.split(",")[0].split("=")[1]
+            break
 
-    if "memberOf" in user:
-        for group_dn in user.memberOf.values:
-            if group_dn.endswith(org_suffix):
-                org_cn = group_dn.split(",")[0].split("=")[1]
-                break
-
-    print("=== User Organization ===")
-    if org_cn:
-        print(org_cn)
-    else:
-        print("No organization found")
-
-    return org_cn
+    return UserResult("get_user_org", dn=user_dn, mail=email, org=org_cn)
 
 
 if __name__ == "__main__":
@@ -53,4 +39,4 @@ if __name__ == "__main__":
         print("Usage: python get_user_org.py <email>")
         sys.exit(1)
 
-    get_user_org(sys.argv[1])
+    print(format_result(get_user_org(sys.argv[1])))
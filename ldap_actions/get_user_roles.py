@@ -5,49 +5,36 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from ldap_connection import get_connection
-import config
+from ldap_connection import get_connection, get_config, find_user_memberships
+from ldap_actions.results import NOT_FOUND, UserResult, format_result
 
 
-def get_user_roles(email: str):
+def get_user_roles(email: str) -> UserResult:
     """
-    Return a list of role CNs for a given user email and print them.
+    Return the role CNs of a user (by email).
 
     Args:
         email (str): User email.
     """
     conn = get_connection()
+    config = get_config()
 
     # 1) trouver l'utilisateur
-    conn.search(
-        search_base=config.LDAP_SEARCH_BASE,
-        search_filter=f"({config.LDAP_MAIL_ATTRIBUTE}={email})",
-        attributes=["memberOf"],
-    )
-
-    if not conn.entries:
-        print("User not found.")
-        return []
-
-    user = conn.entries[0]
+    user_dn, groups = find_user_memberships(conn, email)
+    if user_dn is None:
+        return UserResult("get_user_roles", NOT_FOUND, "User not found.", mail=email, roles=[])
 
     # 2) filtrer uniquement les rôles = groupes sous ou=roles
     roles = []
-    if "memberOf" in user:
-        role_suffix = f"{config.LDAP_ROLE_DN},{config.LDAP_SEARCH_BASE}"
-        for group_dn in user.memberOf.values:
-            if group_dn.endswith(role_suffix):
-                role_cn = group_dn.split(",")[0].split("=")[1]
-                roles.append(role_cn)
+    role_suffix = f"{config.LDAP_ROLE_DN},{config.LDAP_SEARCH_BASE}"
 
-    print("=== User Roles ===")
-    if roles:
-        for r in roles:
-            print(f"- {r}")
-    else:
-        print("No roles")
+    for group_dn in groups:
+        if group_dn.endswith(role_suffix):
+            # group_dn = "cn=ADMIN,ou=roles,dc=georchestra,dc=org"
+            role_cn = group_dn.split(",")[0].split("=")[1]
+            roles.append(role_cn)
 
-    return roles
+    return UserResult("get_user_roles", dn=user_dn, mail=email, roles=roles)
 
 
 if __name__ == "__main__":
@@ -55,4 +42,4 @@ if __name__ == "__main__":
         print("Usage: python get_user_roles.py <email>")
         sys.exit(1)
 
-    get_user_roles(sys.argv[1])
+    print(format_result(get_user_roles(sys.argv[1])))
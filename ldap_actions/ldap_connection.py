@@ -1,4 +1,8 @@
-from ldap3 import Server, Connection, ALL
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from ldap3 import Connection
+from ldap3.utils.conv import escape_filter_chars
 import sys, os
 
 # Ajoute le dossier parent (où se trouve config.py)
@@ -6,13 +10,65 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
 import config
 
+# Connection and settings lent by a caller (e.g. GeorchestraLdapClient) for
+# the duration of an action. Context-local, so threads never share them.
+_active_connection = ContextVar("ldap_actions_active_connection", default=None)
+_active_config = ContextVar("ldap_actions_active_config", default=None)
+_active_cache = ContextVar("ldap_actions_active_cache", default=None)
+
+
+@contextmanager
+def use_connection(conn, settings=None, cache=None):
+    """
+    Make ``get_connection()`` return ``conn`` inside the ``with`` block instead
+    of opening a new connection, and ``get_config()`` return ``settings`` (any
+    object exposing the ``LDAP_*`` names of ``config.py``) when given.
+    ``cache`` (a ``georchestra_ldap.cache.DirectoryCache``) is used by the
+    user lookup helpers below.
+    """
+    conn_token = _active_connection.set(conn)
+    config_token = _active_config.set(settings) if settings is not None else None
+    cache_token = _active_cache.set(cache)
+    try:
+        yield conn
+    finally:
+        _active_cache.reset(cache_token)
+        if config_token is not None:
+            _active_config.reset(config_token)
+        _active_connection.reset(conn_token)
+
+
+def get_config():
+    """
+    Return the settings of the current action: the ones given to
+    ``use_connection()``, or the ``config`` module for standalone scripts.
+    """
+    active = _active_config.get()
+    return active if active is not None else config
+
+
 def get_connection():
-    server = Server(
-        config.LDAP_SERVER,
+    conn = _active_connection.get()
+    if conn is not None:
+        return conn
+
+    config = get_config()
+
+    # Imported here: georchestra_ldap itself imports the ldap_actions modules.
+    from georchestra_ldap.config import LdapSettings
+    from georchestra_ldap.schema_cache import get_server
+
+    # Root DSE and schema are downloaded once per process (or read from
+    # LDAP_SCHEMA_CACHE) instead of on every connection.
+    server = get_server(LdapSettings(
+        server=config.LDAP_SERVER,
         port=config.LDAP_PORT,
         use_ssl=config.LDAP_USE_SSL,
-        get_info=ALL
-    )
+        user_dn=config.LDAP_USER_DN,
+        password=config.LDAP_PASSWORD,
+        schema_cache_path=getattr(config, "LDAP_SCHEMA_CACHE", None),
+        schema_cache_ttl=getattr(config, "LDAP_SCHEMA_CACHE_TTL", 3600),
+    ))
 
     conn = Connection(
         server,
@@ -21,3 +77,129 @@ def get_connection():
         auto_bind=True
     )
     return conn
+
+
+def get_password_hasher():
+    """
+    Return the password hasher of the current settings: ``LDAP_PASSWORD_HASHER``
+    when set, else the ``LDAP_PASSWORD_SCHEME`` scheme (SSHA by default).
+    """
+    config = get_config()
+    hasher = getattr(config, "LDAP_PASSWORD_HASHER", None)
+    if hasher is not None:
+        return hasher
+
+    from georchestra_ldap.hashing import get_hasher
+
+    return get_hasher(getattr(config, "LDAP_PASSWORD_SCHEME", "ssha"))
+
+
+def user_bases(config=None, pending_first=False):
+    """
+    Return the two branches holding users: ``[users, pending users]``
+    (reversed with ``pending_first``).
+    """
+    config = config or get_config()
+    bases = [
+        f"{config.LDAP_USERS_DN},{config.LDAP_SEARCH_BASE}",
+        f"{config.LDAP_PENDING_USERS_DN},{config.LDAP_SEARCH_BASE}",
+    ]
+    return bases[::-1] if pending_first else bases
+
+
+def read_entry(conn, dn, attributes=()):
+    """
+    Read one entry whose DN is known with a base-scope search; return it or
+    None when it does not exist. Only ``attributes`` are requested (none by
+    default).
+    """
+    conn.search(
+        search_base=dn,
+        search_filter="(objectClass=*)",
+        search_scope="BASE",
+        attributes=list(attributes)
+    )
+    return conn.entries[0] if conn.entries else None
+
+
+def has_member(conn, group_dn, member_dn):
+    """
+    Tell whether ``member_dn`` is a ``member`` of ``group_dn`` with one
+    base-scope search (the server compares, the member list is not
+    transferred). Return None when the group does not exist.
+    """
+    conn.search(
+        search_base=group_dn,
+        search_filter=f"(member={escape_filter_chars(member_dn)})",
+        search_scope="BASE",
+        attributes=[]
+    )
+    if conn.entries:
+        return True
+    # noSuchObject: the group itself is missing
+    return None if conn.result.get("result") == 32 else False
+
+
+def find_user(conn, email, attributes=(), pending_first=False):
+    """
+    Return the entry of the user with this email, or None.
+
+    Only the users and pending users branches are searched (one after the
+    other, stopping at the first match) instead of the whole
+    ``LDAP_SEARCH_BASE`` tree, and only ``attributes`` are requested.
+    """
+    config = get_config()
+    search_filter = f"({config.LDAP_MAIL_ATTRIBUTE}={escape_filter_chars(email)})"
+    for base in user_bases(config, pending_first):
+        conn.search(
+            search_base=base,
+            search_filter=search_filter,
+            search_scope="SUBTREE",
+            attributes=list(attributes)
+        )
+        if conn.entries:
+            return conn.entries[0]
+    return None
+
+
+def find_user_dn(conn, email, pending_first=False):
+    """
+    Return the DN of the user with this email, or None.
+    """
+    cache = _active_cache.get()
+    if cache is not None:
+        user_dn = cache.get_dn(email)
+        if user_dn is not None:
+            return user_dn
+
+    user = find_user(conn, email, pending_first=pending_first)
+    if user is None:
+        return None
+
+    user_dn = user.entry_dn
+    if cache is not None:
+        cache.put_dn(email, user_dn)
+    return user_dn
+
+
+def find_user_memberships(conn, email):
+    """
+    Return ``(user_dn, memberOf values)`` for the user with this email, or
+    ``(None, [])`` when not found.
+    """
+    cache = _active_cache.get()
+    if cache is not None:
+        user_dn = cache.get_dn(email)
+        groups = cache.get_memberships(user_dn) if user_dn is not None else None
+        if groups is not None:
+            return user_dn, list(groups)
+
+    user = find_user(conn, email, ["memberOf"])
+    if user is None:
+        return None, []
+
+    groups = list(user.memberOf.values) if "memberOf" in user else []
+    if cache is not None:
+        cache.put_dn(email, user.entry_dn)
+        cache.put_memberships(user.entry_dn, groups)
+    return user.entry_dn, groups
@@ -3,56 +3,38 @@
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from ldap_connection import get_connection
-import config
+from ldap_connection import get_connection, get_config, find_user_dn
+from ldap_actions.results import ERROR, NOT_FOUND, UNCHANGED, UPDATED, UserResult, format_result
 
 
-def moderate_user(email: str):
+def moderate_user(email: str) -> UserResult:
     conn = get_connection()
+    config = get_config()
 
     # 1) Trouver l'utilisateur par email
-    conn.search(
-        search_base=config.LDAP_SEARCH_BASE,
-        search_filter=f"({config.LDAP_MAIL_ATTRIBUTE}={email})",
-        search_scope="SUBTREE",
-        attributes=["uid"]
-    )
-
-    if not conn.entries:
-        print(f"User not found: {email}")
-        return
-
-    user = conn.entries[0]
-    old_dn = user.entry_dn
-
-    print(f"Found user: {old_dn}")
+    old_dn = find_user_dn(conn, email, pending_first=True)
+    if old_dn is None:
+        return UserResult("moderate_user", NOT_FOUND, f"User not found: {email}", mail=email)
 
     # 2) Vérifier qu'il est bien en pending
     if "ou=pendingusers" not in old_dn:
-        print("User is NOT in ou=pendingusers — nothing to do.")
-        return
+        return UserResult("moderate_user", UNCHANGED, "User is NOT in ou=pendingusers — nothing to do.",
+                          dn=old_dn, mail=email, pending=False)
 
-    uid = user.uid.value
+    # Les DN geOrchestra sont de la forme uid=<uid>,ou=pendingusers,...
+    uid = old_dn.split(",")[0].split("=")[1]
 
     # 3) Construire le DN cible avec la config correcte
     new_superior = f"{config.LDAP_USERS_DN},{config.LDAP_SEARCH_BASE}"
     new_dn = f"uid={uid},{new_superior}"
 
-    print(f"Activating user → moving to: {new_dn}")
-
     # 4) Déplacer l'utilisateur
-    try:
-        conn.modify_dn(
-            dn=old_dn,
-            relative_dn=f"uid={uid}",
-            new_superior=new_superior
-        )
-        print("User successfully moved to ou=users.")
-    except Exception as e:
-        print("Error while moving user:", e)
-        return
+    if not conn.modify_dn(dn=old_dn, relative_dn=f"uid={uid}", new_superior=new_superior):
+        return UserResult("moderate_user", ERROR, f"Error while moving user: {conn.result.get('description')}",
+                          dn=old_dn, mail=email, pending=True)
 
-    return new_dn
+    return UserResult("moderate_user", UPDATED, f"User successfully moved to {new_dn}.",
+                      dn=new_dn, uid=uid, mail=email, pending=False)
 
 
 if __name__ == "__main__":
@@ -60,4 +42,4 @@ if __name__ == "__main__":
         print("Usage: python moderate_user.py <email>")
         sys.exit(1)
 
-    moderate_user(sys.argv[1])
+    print(format_result(moderate_user(sys.argv[1])))
@@ -5,30 +5,25 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from ldap_connection import get_connection
-import config
+from ldap_connection import get_connection, get_config, read_entry
+from ldap_actions.results import NOT_FOUND, GroupResult, format_result
 
 
-def org_exists(org_cn: str) -> bool:
+def org_exists(org_cn: str) -> GroupResult:
     """
-    Return True if an organization exists under ``LDAP_ORG_DN``.
+    Look an organization up under ``LDAP_ORG_DN``; the result is truthy if it exists.
 
     Args:
         org_cn (str): Common name of the organization to check.
     """
     conn = get_connection()
-    conn.search(
-        search_base=f"{config.LDAP_ORG_DN},{config.LDAP_SEARCH_BASE}",
-        search_filter=f"(cn={org_cn})",
-        attributes=["cn", "o"],
-    )
+    config = get_config()
 
-    if conn.entries:
-        print(f"Organization exists: {org_cn}")
-        return True
+    org_dn = f"cn={org_cn},{config.LDAP_ORG_DN},{config.LDAP_SEARCH_BASE}"
+    if read_entry(conn, org_dn) is not None:
+        return GroupResult("org_exists", message=f"Organization exists: {org_cn}", dn=org_dn, cn=org_cn)
 
-    print(f"Organization not found: {org_cn}")
-    return False
+    return GroupResult("org_exists", NOT_FOUND, f"Organization not found: {org_cn}", cn=org_cn)
 
 
 if __name__ == "__main__":
@@ -36,4 +31,4 @@ if __name__ == "__main__":
         print("Usage: python org_exists.py <ORG_CN>")
         sys.exit(1)
 
-    org_exists(sys.argv[1])
+    print(format_result(org_exists(sys.argv[1])))
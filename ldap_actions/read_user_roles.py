@@ -3,45 +3,41 @@
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from ldap_connection import get_connection
-import config
+from ldap_connection import get_connection, get_config, find_user_memberships
+from ldap_actions.results import NOT_FOUND, UserResult, format_result
+
 
 def read_user_roles(email):
+    """
+    Return the role CNs of a user (by email).
+
+    Args:
+        email (str): User email.
+    """
     conn = get_connection()
+    config = get_config()
 
     # 1) trouver l'utilisateur
-    conn.search(
-        search_base=config.LDAP_SEARCH_BASE,
-        search_filter=f"({config.LDAP_MAIL_ATTRIBUTE}={email})",
-        attributes=["memberOf"]
-    )
-
-    if not conn.entries:
-        print("User not found.")
-        return
-
-    user = conn.entries[0]
+    user_dn, groups = find_user_memberships(conn, email)
+    if user_dn is None:
+        return UserResult("read_user_roles", NOT_FOUND, "User not found.", mail=email, roles=[])
 
     # 2) filtrer uniquement les rôles = groupes sous ou=roles
     roles = []
-    if "memberOf" in user:
-        role_suffix = f"{config.LDAP_ROLE_DN},{config.LDAP_SEARCH_BASE}"
-        for group_dn in user.memberOf.values:
-            if group_dn.endswith(role_suffix):
-                # group_dn = "cn=ADMIN,ou=roles,dc=georchestra,dc=org"
-                role_cn = group_dn.split(",")[0].split("=")[1]
-                roles.append(role_cn)
-
-    print("=== User Roles ===")
-    if roles:
-        for r in roles:
-            print(f"- {r}")
-    else:
-        print("No roles")
+    role_suffix = f"{config.LDAP_ROLE_DN},{config.LDAP_SEARCH_BASE}"
+
+    for group_dn in groups:
+        if group_dn.endswith(role_suffix):
+            # group_dn = "cn=ADMIN,ou=roles,dc=georchestra,dc=org"
+            role_cn = group_dn.split(",")[0].split("=")[1]
+            roles.append(role_cn)
+
+    return UserResult("read_user_roles", dn=user_dn, mail=email, roles=roles)
+
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python read_user_roles.py <email>")
         exit(1)
 
-    read_user_roles(sys.argv[1])
+    print(format_result(read_user_roles(sys.argv[1])))
@@ -0,0 +1,130 @@
+"""
+Result objects returned by the ldap_actions functions.
+
+The actions do no terminal I/O: they return one of these small objects and
+the scripts' ``__main__`` blocks (or any caller that wants the historical
+output) print it with :func:`format_result` / ``str(result)``.
+"""
+
+from __future__ import annotations
+
+# Statuts possibles d'une action
+OK = "ok"
+CREATED = "created"
+UPDATED = "updated"
+DELETED = "deleted"
+UNCHANGED = "unchanged"
+NOT_FOUND = "not_found"
+ERROR = "error"
+
+
+class ActionResult:
+    """
+    Outcome of an action: ``status`` is one of the constants above and
+    ``message`` a short human readable line. A result is truthy unless the
+    target was not found or the action failed.
+    """
+
+    __slots__ = ("action", "status", "message")
+    # Names of the subclass fields, filled by __init_subclass__.
+    _field_names: tuple = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._field_names = cls._field_names + tuple(cls.__dict__.get("__slots__", ()))
+
+    def __init__(self, action: str, status: str = OK, message: str | None = None, **fields):
+        self.action = action
+        self.status = status
+        self.message = message
+        for name in self._field_names:
+            setattr(self, name, fields.pop(name, None))
+        if fields:
+            raise TypeError(f"Unknown result field(s): {', '.join(fields)}")
+
+    @property
+    def ok(self) -> bool:
+        return self.status not in (NOT_FOUND, ERROR)
+
+    def __bool__(self) -> bool:
+        return self.ok
+
+    def as_dict(self) -> dict:
+        data = {"action": self.action, "status": self.status, "message": self.message}
+        data.update((name, getattr(self, name)) for name in self._field_names)
+        return data
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{key}={value!r}" for key, value in self.as_dict().items() if value is not None)
+        return f"{type(self).__name__}({fields})"
+
+    def __str__(self) -> str:
+        return format_result(self)
+
+
+class UserResult(ActionResult):
+    """
+    Result of a user action: DN, main attributes, roles (CNs), organization
+    (CN), ``memberOf`` groups and pending state, as far as the action knows them.
+    """
+
+    __slots__ = ("dn", "uid", "cn", "mail", "roles", "org", "groups", "pending")
+
+
+class GroupResult(ActionResult):
+    """
+    Result of a role/organization action: DN, cn, description and member DNs.
+    """
+
+    __slots__ = ("dn", "cn", "description", "members")
+
+
+def _lines(title: str, values, empty: str, bullet: str = "- ") -> list:
+    lines = [title]
+    if values:
+        lines.extend(f"{bullet}{value}" for value in values)
+    else:
+        lines.append(empty)
+    return lines
+
+
+def format_result(result: ActionResult) -> str:
+    """
+    Render a result the way the historical scripts printed it.
+    """
+    if not result.ok or result.status == UNCHANGED:
+        return result.message or result.status
+    action = result.action
+
+    if action in ("get_user_infos", "read_user_infos"):
+        lines = [
+            "=== User Information ===",
+            f"DN: {result.dn}",
+            f"uid: {result.uid}",
+            f"cn: {result.cn}",
+            f"mail: {result.mail}",
+            "",
+        ]
+        lines += _lines("Groups (memberOf):", result.groups, "No groups", " - ")
+        return "\n".join(lines)
+    if action in ("get_user_roles", "read_user_roles"):
+        return "\n".join(_lines("=== User Roles ===", result.roles, "No roles"))
+    if action == "get_user_org":
+        return "\n".join(["=== User Organization ===", result.org or "No organization found"])
+    if action == "user_is_pending":
+        return f"User DN: {result.dn}\nIs pending: {result.pending}"
+    if action == "get_role_users":
+        return "\n".join(_lines("=== Role Members ===", result.members, "No members"))
+    if action == "get_org_users":
+        return "\n".join(_lines("=== Organization Members ===", result.members, "No members"))
+    if action == "get_role_infos":
+        lines = [
+            "=== Role Information ===",
+            f"DN: {result.dn}",
+            f"cn: {result.cn}",
+            f"description: {result.description}",
+            "",
+        ]
+        lines += _lines("Members:", result.members, "No members", " - ")
+        return "\n".join(lines)
+    return result.message or result.status
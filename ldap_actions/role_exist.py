@@ -5,29 +5,25 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from ldap_connection import get_connection
-import config
+from ldap_connection import get_connection, get_config, read_entry
+from ldap_actions.results import NOT_FOUND, GroupResult, format_result
 
 
-def role_exists(role_cn: str) -> bool:
+def role_exists(role_cn: str) -> GroupResult:
     """
-    Return True if a role exists under ``LDAP_ROLE_DN``.
+    Look a role up under ``LDAP_ROLE_DN``; the result is truthy if it exists.
 
     Args:
         role_cn (str): Common name of the role to check.
     """
     conn = get_connection()
-    conn.search(
-        search_base=f"{config.LDAP_ROLE_DN},{config.LDAP_SEARCH_BASE}",
-        search_filter=f"(cn={role_cn})",
-        attributes=["cn"],
-    )
-    if conn.entries:
-        print(f"Role exists: {role_cn}")
-        return True
+    config = get_config()
 
-    print(f"Role not found: {role_cn}")
-    return False
+    role_dn = f"cn={role_cn},{config.LDAP_ROLE_DN},{config.LDAP_SEARCH_BASE}"
+    if read_entry(conn, role_dn) is not None:
+        return GroupResult("role_exists", message=f"Role exists: {role_cn}", dn=role_dn, cn=role_cn)
+
+    return GroupResult("role_exists", NOT_FOUND, f"Role not found: {role_cn}", cn=role_cn)
 
 
 if __name__ == "__main__":
@@ -35,4 +31,4 @@ if __name__ == "__main__":
         print("Usage: python role_exist.py <ROLE_CN>")
         sys.exit(1)
 
-    role_exists(sys.argv[1])
+    print(format_result(role_exists(sys.argv[1])))
@@ -1,22 +1,27 @@
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from ldap_connection import get_connection
-import config
+from ldap3 import MODIFY_ADD
+from ldap_connection import get_connection, get_config
+from ldap_actions.results import ERROR, UPDATED, UserResult, format_result
 
-def update_user_org(user_dn, org_cn):
+
+def update_user_org(user_dn, org_cn) -> UserResult:
     conn = get_connection()
+    config = get_config()
 
     org_group_dn = f"cn={org_cn},{config.LDAP_ORG_DN},{config.LDAP_SEARCH_BASE}"
 
-    conn.modify(org_group_dn, {
-        "member": [(conn.MODIFY_ADD, [user_dn])]
-    })
-    print(f"User added to org {org_cn}")
+    if not conn.modify(org_group_dn, {"member": [(MODIFY_ADD, [user_dn])]}):
+        return UserResult("update_user_org", ERROR,
+                          f"Error adding user to org {org_cn}: {conn.result.get('description')}", dn=user_dn)
+
+    return UserResult("update_user_org", UPDATED, f"User added to org {org_cn}", dn=user_dn, org=org_cn)
+
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
         print("Usage: python update_org_user.py <user_dn> <org_cn>")
         exit(1)
 
-    update_user_org(sys.argv[1], sys.argv[2])
+    print(format_result(update_user_org(sys.argv[1], sys.argv[2])))
@@ -1,17 +1,24 @@
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from ldap3 import MODIFY_REPLACE
 from ldap_connection import get_connection
-import config
+from ldap_actions.results import ERROR, UPDATED, UserResult, format_result
 
-def update_lastname(user_dn, new_lastname):
+
+def update_lastname(user_dn, new_lastname) -> UserResult:
     conn = get_connection()
-    conn.modify(user_dn, {"sn": [(conn.MODIFY_REPLACE, [new_lastname])]})
-    print(f"Lastname updated to {new_lastname}")
+
+    if not conn.modify(user_dn, {"sn": [(MODIFY_REPLACE, [new_lastname])]}):
+        return UserResult("update_lastname", ERROR,
+                          f"Error updating lastname: {conn.result.get('description')}", dn=user_dn)
+
+    return UserResult("update_lastname", UPDATED, f"Lastname updated to {new_lastname}", dn=user_dn)
+
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
         print("Usage: python update_user_name.py <user_dn> <lastname>")
         exit(1)
 
-    update_lastname(sys.argv[1], sys.argv[2])
+    print(format_result(update_lastname(sys.argv[1], sys.argv[2])))
@@ -5,35 +5,35 @@ import os
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from ldap_connection import get_connection
-import config
+from ldap_connection import get_connection, get_config, find_user_dn
+from ldap_actions.results import NOT_FOUND, UserResult, format_result
 
 
-def user_is_pending(email: str) -> bool:
+def user_pending_status(email: str) -> UserResult:
     """
-    Return True if the user (by email) is located under ``LDAP_PENDING_USERS_DN``.
+    Return the DN of a user (by email) and whether it is located under
+    ``LDAP_PENDING_USERS_DN`` (``result.pending``).
 
     Args:
         email (str): User email.
     """
     conn = get_connection()
-    conn.search(
-        search_base=config.LDAP_SEARCH_BASE,
-        search_filter=f"({config.LDAP_MAIL_ATTRIBUTE}={email})",
-        search_scope="SUBTREE",
-        attributes=["dn"],
-    )
-
-    if not conn.entries:
-        print(f"User not found: {email}")
-        return False
-
-    user_dn = conn.entries[0].entry_dn
+    config = get_config()
+
+    user_dn = find_user_dn(conn, email)
+    if user_dn is None:
+        return UserResult("user_is_pending", NOT_FOUND, f"User not found: {email}", mail=email, pending=False)
+
     pending_suffix = f"{config.LDAP_PENDING_USERS_DN},{config.LDAP_SEARCH_BASE}"
-    is_pending = pending_suffix in user_dn
-    print(f"User DN: {user_dn}")
-    print(f"Is pending: {is_pending}")
-    return is_pending
+    return UserResult("user_is_pending", dn=user_dn, mail=email, pending=pending_suffix in user_dn)
+
+
+def user_is_pending(email: str) -> bool:
+    """
+    Tell whether the user (by email) is located under ``LDAP_PENDING_USERS_DN``.
+    False when the user does not exist (see :func:`user_pending_status`).
+    """
+    return bool(user_pending_status(email).pending)
 
 
 if __name__ == "__main__":
@@ -41,4 +41,4 @@ if __name__ == "__main__":
         print("Usage: python user_is_pending.py <email>")
         sys.exit(1)
 
-    user_is_pending(sys.argv[1])
+    print(format_result(user_pending_status(sys.argv[1])))
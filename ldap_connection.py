@@ -3,6 +3,28 @@ Compat helper so legacy imports like ``import ldap_connection`` continue to work
 after packaging. Delegates to ``ldap_actions.ldap_connection``.
 """
 
-from ldap_actions.ldap_connection import get_connection
+from ldap_actions.ldap_connection import (
+    find_user,
+    find_user_dn,
+    find_user_memberships,
+    get_config,
+    get_connection,
+    get_password_hasher,
+    has_member,
+    read_entry,
+    use_connection,
+    user_bases,
+)
 
-__all__ = ["get_connection"]
+__all__ = [
+    "find_user",
+    "find_user_dn",
+    "find_user_memberships",
+    "get_config",
+    "get_connection",
+    "get_password_hasher",
+    "has_member",
+    "read_entry",
+    "use_connection",
+    "user_bases",
+]
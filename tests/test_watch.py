@@ -0,0 +1,65 @@
+import threading
+
+from georchestra_ldap.config import LdapSettings
+from georchestra_ldap.watch import ChangeFeed
+
+
+class _Search:
+    def __init__(self, conn):
+        self.conn = conn
+        self.stopped = False
+
+    def next(self, block=False, timeout=None):
+        # Nothing queued, as when ldap3's receiver thread lost the socket.
+        if self.conn.on_next is not None:
+            self.conn.on_next()
+        return None
+
+    def stop(self):
+        self.stopped = True
+
+
+class _Connection:
+    """
+    Stand-in for the ``ASYNC_STREAM`` connection of ``persist`` mode.
+    """
+
+    def __init__(self, closed, on_next=None):
+        self.closed = closed
+        self.listening = not closed
+        self.on_next = on_next
+        self.searches = []
+        self.controls = []
+        self.extend = self
+        self.standard = self
+
+    def persistent_search(self, *args, controls=None, **kwargs):
+        self.controls.append(controls)
+        search = _Search(self)
+        self.searches.append(search)
+        return search
+
+
+def test_persist_reconnects_from_cookie_when_the_connection_drops():
+    stop = threading.Event()
+    polls = []
+
+    def _give_up():
+        # Without drop detection the feed would wait on this connection forever.
+        polls.append(1)
+        if len(polls) > 3:
+            stop.set()
+
+    dropped = _Connection(closed=True, on_next=_give_up)
+    alive = _Connection(closed=False, on_next=stop.set)
+    connections = [dropped, alive]
+    feed = ChangeFeed(None, LdapSettings(), mode="persist", stop=stop, connect=lambda: connections.pop(0))
+    feed.cookie = b"rid=001,csn=20260101000000.000000Z#000000#000#000000"
+
+    assert list(feed.events()) == []
+
+    assert len(polls) == 1
+    assert connections == []  # reconnected after the drop
+    assert dropped.searches[0].stopped
+    cookie_control = alive.controls[0][0]
+    assert feed.cookie in cookie_control[2]